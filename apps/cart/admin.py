@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Cart, CartItem
+from .models import Cart, CartItem, StockReservation
 
 class CartItemInline(admin.TabularInline):
     model = CartItem
@@ -10,4 +10,11 @@ class CartItemInline(admin.TabularInline):
 class CartAdmin(admin.ModelAdmin):
     list_display = ['user', 'item_count', 'updated_at', 'is_active']
     inlines = [CartItemInline]
-    search_fields = ['user__email']
\ No newline at end of file
+    search_fields = ['user__email']
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['cart', 'product', 'quantity', 'expires_at']
+    list_select_related = ['cart__user', 'product']
+    raw_id_fields = ['cart', 'product']
+    ordering = ['expires_at']
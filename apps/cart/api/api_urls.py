@@ -7,4 +7,6 @@ urlpatterns = [
     path('', api_views.CartAPIView.as_view(), name='detail'),
     path('items/', api_views.CartItemAPIView.as_view(), name='add_item'),
     path('items/<int:product_id>/', api_views.CartItemAPIView.as_view(), name='item_detail'),
+    path('items/bulk/', api_views.CartBulkItemsAPIView.as_view(), name='bulk_add'),
+    path('reorder/<str:order_number>/', api_views.CartReorderAPIView.as_view(), name='reorder'),
 ]
\ No newline at end of file
@@ -3,11 +3,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404
 
-from .services import CartService
-from .serializers import CartSerializer
+from apps.cart.services import CartService
+from apps.orders.models import Order
+from django_ecommerce.fieldsets import SparseFieldsetViewMixin
+from .serializers import CartBulkSerializer, CartSerializer
 
-class CartAPIView(APIView):
+class CartAPIView(SparseFieldsetViewMixin, APIView):
     """
     GET: View your cart.
     DELETE: Empty your cart.
@@ -16,14 +19,14 @@ class CartAPIView(APIView):
 
     def get(self, request):
         cart = CartService.get_cart(request.user)
-        serializer = CartSerializer(cart)
+        serializer = self.get_fieldset_serializer(CartSerializer, cart)
         return Response(serializer.data)
 
     def delete(self, request):
         CartService.clear_cart(request.user)
         return Response({"message": "Cart cleared successfully"}, status=status.HTTP_200_OK)
 
-class CartItemAPIView(APIView):
+class CartItemAPIView(SparseFieldsetViewMixin, APIView):
     """
     POST: Add item.
     PUT: Update quantity.
@@ -40,7 +43,7 @@ class CartItemAPIView(APIView):
 
         try:
             cart = CartService.add_to_cart(request.user, product_id, quantity)
-            return Response(CartSerializer(cart).data, status=201)
+            return Response(self.get_fieldset_serializer(CartSerializer, cart).data, status=201)
         except ValidationError as e:
             return Response({"error": str(e)}, status=400)
         except Exception:
@@ -55,11 +58,49 @@ class CartItemAPIView(APIView):
             
         try:
             cart = CartService.update_quantity(request.user, product_id, int(quantity))
-            return Response(CartSerializer(cart).data)
+            return Response(self.get_fieldset_serializer(CartSerializer, cart).data)
         except ValidationError as e:
             return Response({"error": str(e)}, status=400)
 
     def delete(self, request, product_id):
         """Expects URL like /api/cart/items/1/"""
         cart = CartService.remove_from_cart(request.user, product_id)
-        return Response(CartSerializer(cart).data)
\ No newline at end of file
+        return Response(self.get_fieldset_serializer(CartSerializer, cart).data)
+
+
+class CartBulkResponseMixin(SparseFieldsetViewMixin):
+
+    def bulk_response(self, cart, results):
+        """Per-item results plus the cart; 409 when nothing could be added."""
+        added = any(result['added'] for result in results)
+        return Response(
+            {'results': results, 'cart': self.get_fieldset_serializer(CartSerializer, cart).data},
+            status=status.HTTP_200_OK if added else status.HTTP_409_CONFLICT,
+        )
+
+
+class CartBulkItemsAPIView(CartBulkResponseMixin, APIView):
+    """
+    POST: Add many items at once (restore a saved list).
+    Body: {"items": [{"product_id": 1, "quantity": 2}, ...]}
+    Each product gets as much as is in stock; see `results` for what was added.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = CartBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart, results = CartService.add_items(
+            request.user, [(item['product_id'], item['quantity']) for item in serializer.validated_data['items']]
+        )
+        return self.bulk_response(cart, results)
+
+
+class CartReorderAPIView(CartBulkResponseMixin, APIView):
+    """POST: Buy again - add every line of one of your orders to the cart."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, order_number):
+        order = get_object_or_404(Order, order_number=order_number, user=request.user)
+        cart, results = CartService.reorder(request.user, order)
+        return self.bulk_response(cart, results)
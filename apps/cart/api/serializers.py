@@ -1,8 +1,10 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Cart, CartItem
-from apps.products.serializers import ProductSerializer 
+from apps.cart.models import Cart, CartItem
+from apps.products.api.serializers import ProductSerializer
+from django_ecommerce.fieldsets import SparseFieldsetMixin
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # Nested serializer to show full product details
     product = ProductSerializer(read_only=True)
     # Write-only field for inputting product ID
@@ -12,12 +14,26 @@ class CartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ['id', 'product', 'product_id', 'quantity', 'subtotal']
+        field_sources = {'subtotal': ['quantity', 'product__price']}
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     item_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Cart
-        fields = ['id', 'user', 'items', 'total_price', 'item_count', 'updated_at']
\ No newline at end of file
+        fields = ['id', 'user', 'items', 'total_price', 'item_count', 'updated_at']
+        # Cart.summary aggregates in SQL (or reuses prefetched items), so the
+        # totals alone need nothing loaded
+        field_sources = {'total_price': [], 'item_count': []}
+
+
+class CartBulkItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, max_value=1000)
+
+
+class CartBulkSerializer(serializers.Serializer):
+    """Input of POST /api/v1/cart/items/bulk/: {"items": [{"product_id": 1, "quantity": 2}, ...]}"""
+    items = CartBulkItemSerializer(many=True, allow_empty=False, max_length=settings.CART_BULK_MAX_ITEMS)
@@ -0,0 +1,474 @@
+"""
+Cart storage backends (settings.CART_BACKEND); CartService delegates here.
+
+DatabaseCartBackend keeps Cart/CartItem rows current on every operation.
+
+RedisCartBackend keeps the cart in Redis and writes it back to Cart/CartItem
+asynchronously (flush_dirty_carts, run by Celery beat) for analytics and
+recovery:
+
+    cart:<user_id>:items   hash  product_id -> quantity
+    cart:<user_id>:meta    hash  loaded, cart_id, updated_at
+    cart:dirty             set   user ids waiting for write-behind
+
+Stock is still reserved on the product row under select_for_update, exactly
+as before; Redis only replaces the cart rows. Cart changes are applied to
+Redis as commutative deltas (HINCRBY) after the reservation commits, so a
+rolled-back reservation never shows up in the cart. A cart missing from
+Redis (eviction, lost instance) is reloaded from the tables on first read.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from apps.products.models import Product
+from . import reservations
+from .models import Cart, CartItem
+
+try:
+    import redis
+except ImportError:  # Only needed for RedisCartBackend
+    redis = None
+
+
+class DatabaseCartBackend:
+    """Cart and items as rows, written on every operation."""
+
+    def get_cart(self, user):
+        """Get or create a cart for the user."""
+        cart, created = Cart.objects.get_or_create(user=user, is_active=True)
+        user.cart = cart  # Same instance (and memoized summary) for request.user.cart in templates
+        return cart
+
+    @transaction.atomic
+    def add_to_cart(self, user, product_id, quantity=1):
+        """
+        Add item to cart and safely reserve stock.
+        """
+        cart = self.get_cart(user)
+
+        # 1. Lock the Product Row (Prevent Race Conditions)
+        try:
+            product = Product.objects.select_for_update().get(id=product_id)
+        except Product.DoesNotExist:
+            raise ValidationError("Product not found.")
+
+        # 2. Check and Reserve Stock
+        # (Assuming reserve_stock returns True if successful, defined in Product model)
+        if not product.reserve_stock(quantity):
+            raise ValidationError(f"Insufficient stock. Only {product.available_stock} remaining.")
+
+        # 3. Create or Update Cart Item
+        item, created = CartItem.objects.get_or_create(
+            cart=cart,
+            product=product,
+            defaults={'quantity': 0}
+        )
+
+        item.quantity += quantity
+        item.save()
+        reservations.hold(cart.id, {product.id: item.quantity})
+
+        cart.items_changed()
+        return cart
+
+    @transaction.atomic
+    def update_quantity(self, user, product_id, new_quantity):
+        """
+        Update item quantity. Handles both stock increase (reserve) and decrease (release).
+        """
+        if new_quantity < 1:
+            return self.remove_from_cart(user, product_id)
+
+        cart = self.get_cart(user)
+
+        # Lock product
+        product = Product.objects.select_for_update().get(id=product_id)
+
+        try:
+            item = CartItem.objects.get(cart=cart, product=product)
+        except CartItem.DoesNotExist:
+            raise ValidationError("Item not in cart.")
+
+        diff = new_quantity - item.quantity
+
+        if diff > 0:
+            # User wants MORE items -> Reserve more stock
+            if not product.reserve_stock(diff):
+                raise ValidationError("Insufficient stock for update.")
+        elif diff < 0:
+            # User wants FEWER items -> Release stock back to pool
+            product.release_reserved_stock(abs(diff))
+
+        item.quantity = new_quantity
+        item.save()
+        reservations.hold(cart.id, {product.id: new_quantity})
+        cart.items_changed()
+        return cart
+
+    @transaction.atomic
+    def remove_from_cart(self, user, product_id):
+        """
+        Remove item and release held stock.
+        """
+        cart = self.get_cart(user)
+
+        # Product lock first, then the line: the sweeper may have released and dropped it meanwhile
+        reservations.lock_products([product_id])
+        try:
+            item = CartItem.objects.get(cart=cart, product_id=product_id)
+        except CartItem.DoesNotExist:
+            return cart
+
+        # Release the reserved stock
+        reservations.release({product_id: item.quantity})
+
+        item.delete()
+        reservations.hold(cart.id, {product_id: 0})
+        cart.items_changed()
+        return cart
+
+    @transaction.atomic
+    def clear_cart(self, user):
+        """
+        Empty cart and release ALL reserved stock.
+        """
+        cart = self.get_cart(user)
+        items = cart.items.all()
+
+        reservations.release(dict(items.values_list('product_id', 'quantity')))
+        items.delete()
+        reservations.drop(cart.id)
+        cart.items_changed()
+        return cart
+
+    @transaction.atomic
+    def merge(self, user, quantities):
+        """Add quantities to the user's cart, reserving what is available."""
+        cart = self.get_cart(user)
+        reserved, short = reservations.reserve_available(quantities)
+
+        existing = {item.product_id: item for item in cart.items.filter(product_id__in=reserved)}
+        for product_id, item in existing.items():
+            item.quantity += reserved[product_id]
+        CartItem.objects.bulk_update(existing.values(), ['quantity'])
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_id=product_id, quantity=quantity)
+            for product_id, quantity in reserved.items()
+            if product_id not in existing
+        ])
+        reservations.hold(cart.id, {
+            product_id: existing[product_id].quantity if product_id in existing else quantity
+            for product_id, quantity in reserved.items()
+        })
+        cart.items_changed()
+        return cart, short
+
+    def drop_lines(self, lines):
+        """Remove lines whose reservation lapsed: (cart_id, user_id, product_id) triples."""
+        if not lines:
+            return
+        by_cart = {}
+        for cart_id, _, product_id in lines:
+            by_cart.setdefault(cart_id, []).append(product_id)
+        condition = Q()
+        for cart_id, product_ids in by_cart.items():
+            condition |= Q(cart_id=cart_id, product_id__in=product_ids)
+        CartItem.objects.filter(condition).delete()
+        if settings.CART_DENORMALIZED_TOTALS:
+            Cart.objects.filter(id__in=by_cart).refresh_totals()
+
+
+class RedisCartItems:
+    """
+    The slice of a CartItem related manager that cart views, templates and
+    serializers use: select_related/prefetch_related/all/count/exists and
+    iteration. Products are loaded in one query on first use.
+    """
+
+    def __init__(self, cart, quantities):
+        self._cart = cart
+        self._quantities = quantities
+        self._items = None
+
+    def _load(self):
+        if self._items is None:
+            products = Product.objects.select_related('category').in_bulk(list(self._quantities))
+            self._items = [
+                CartItem(cart_id=self._cart.id, product=products[product_id], quantity=quantity)
+                for product_id, quantity in sorted(self._quantities.items())
+                if product_id in products  # Deleted since it was added
+            ]
+        return self._items
+
+    def select_related(self, *fields):
+        return self
+
+    def prefetch_related(self, *lookups):
+        models.prefetch_related_objects([item.product for item in self._load()], *(
+            lookup.removeprefix('product__') for lookup in lookups
+        ))
+        return self
+
+    def all(self):
+        return self
+
+    def count(self):
+        return len(self._quantities)
+
+    def exists(self):
+        return bool(self._quantities)
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+
+class RedisCart:
+    """Read model of a Redis cart with Cart's attributes."""
+    is_active = True
+
+    def __init__(self, user, quantities, cart_id=None, updated_at=None):
+        self.user = user
+        self.user_id = user.pk
+        self.id = self.pk = cart_id
+        self.updated_at = updated_at
+        self.quantities = quantities
+        self.items = RedisCartItems(self, quantities)
+
+    def __str__(self):
+        return f"Cart for {self.user.email}"
+
+    @property
+    def total_price(self):
+        return sum((item.subtotal for item in self.items), Decimal('0.00'))
+
+    @property
+    def item_count(self):
+        return sum(self.quantities.values())
+
+
+class RedisCartBackend:
+    """Cart in Redis hashes, written back to the tables asynchronously."""
+    DIRTY_KEY = 'cart:dirty'
+
+    def __init__(self, client=None):
+        self.client = client or redis.Redis.from_url(settings.CART_REDIS_URL, decode_responses=True)
+
+    @staticmethod
+    def _items_key(user_id):
+        return f'cart:{user_id}:items'
+
+    @staticmethod
+    def _meta_key(user_id):
+        return f'cart:{user_id}:meta'
+
+    # --- Reads ---
+
+    def _read(self, user_id):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(self._items_key(user_id))
+        pipe.hgetall(self._meta_key(user_id))
+        items, meta = pipe.execute()
+        return {int(pid): int(q) for pid, q in items.items() if int(q) > 0}, meta
+
+    def _state(self, user_id):
+        quantities, meta = self._read(user_id)
+        if not meta.get('loaded'):
+            self._load_from_db(user_id)
+            quantities, meta = self._read(user_id)
+        return quantities, meta
+
+    def _load_from_db(self, user_id):
+        """Recovery: seed Redis from the last written-back state, once."""
+        cart = Cart.objects.filter(user_id=user_id, is_active=True).first()
+        quantities = dict(cart.items.values_list('product_id', 'quantity')) if cart else {}
+        items_key, meta_key = self._items_key(user_id), self._meta_key(user_id)
+
+        def _seed(pipe):
+            if pipe.hget(meta_key, 'loaded'):
+                return  # Someone else got there first
+            pipe.multi()
+            pipe.delete(items_key)
+            if quantities:
+                pipe.hset(items_key, mapping=quantities)
+            pipe.hset(meta_key, mapping={'loaded': 1, 'cart_id': cart.id if cart else ''})
+            pipe.expire(items_key, settings.CART_REDIS_TTL)
+            pipe.expire(meta_key, settings.CART_REDIS_TTL)
+
+        self.client.transaction(_seed, meta_key)
+
+    def _cart(self, user, quantities, meta):
+        updated_at = meta.get('updated_at')
+        return RedisCart(
+            user, quantities,
+            cart_id=int(meta['cart_id']) if meta.get('cart_id') else None,
+            updated_at=datetime.fromtimestamp(float(updated_at), tz=dt_timezone.utc) if updated_at else None,
+        )
+
+    def get_cart(self, user):
+        return self._cart(user, *self._state(user.pk))
+
+    # --- Writes ---
+    # Each one returns the cart as it will be after commit: the Redis write
+    # itself waits for the commit (see _after_commit).
+
+    def _cart_id(self, user, meta):
+        """The Cart row that reservations hang off (created on first change)."""
+        if meta.get('cart_id'):
+            return int(meta['cart_id'])
+        cart, _ = Cart.objects.get_or_create(user=user, defaults={'is_active': True})
+        meta['cart_id'] = cart.id
+        return cart.id
+
+    def _after_commit(self, user_id, apply, cart_id):
+        """Apply `apply(pipe)` to Redis once the reservation has committed."""
+        def _write():
+            items_key, meta_key = self._items_key(user_id), self._meta_key(user_id)
+            pipe = self.client.pipeline()
+            apply(pipe, items_key)
+            pipe.hset(meta_key, mapping={'loaded': 1, 'updated_at': time.time(), 'cart_id': cart_id})
+            pipe.expire(items_key, settings.CART_REDIS_TTL)
+            pipe.expire(meta_key, settings.CART_REDIS_TTL)
+            pipe.sadd(self.DIRTY_KEY, user_id)
+            pipe.execute()
+        transaction.on_commit(_write)
+
+    @transaction.atomic
+    def add_to_cart(self, user, product_id, quantity=1):
+        try:
+            product = Product.objects.select_for_update().get(id=product_id)
+        except Product.DoesNotExist:
+            raise ValidationError("Product not found.")
+        if not product.reserve_stock(quantity):
+            raise ValidationError(f"Insufficient stock. Only {product.available_stock} remaining.")
+
+        quantities, meta = self._state(user.pk)
+        cart_id = self._cart_id(user, meta)
+        reservations.adjust(cart_id, {product.id: quantity})
+        self._after_commit(user.pk, lambda pipe, key: pipe.hincrby(key, product.id, quantity), cart_id)
+        return self._cart(user, {**quantities, product.id: quantities.get(product.id, 0) + quantity}, meta)
+
+    @transaction.atomic
+    def update_quantity(self, user, product_id, new_quantity):
+        if new_quantity < 1:
+            return self.remove_from_cart(user, product_id)
+
+        product = Product.objects.select_for_update().get(id=product_id)
+        quantities, meta = self._state(user.pk)
+        if product.id not in quantities:
+            raise ValidationError("Item not in cart.")
+
+        # A delta rather than a SET, so concurrent updates keep cart and reservations in step
+        diff = new_quantity - quantities[product.id]
+        if diff > 0:
+            if not product.reserve_stock(diff):
+                raise ValidationError("Insufficient stock for update.")
+        elif diff < 0:
+            product.release_reserved_stock(abs(diff))
+
+        if diff:
+            cart_id = self._cart_id(user, meta)
+            reservations.adjust(cart_id, {product.id: diff})
+            self._after_commit(user.pk, lambda pipe, key: pipe.hincrby(key, product.id, diff), cart_id)
+        return self._cart(user, {**quantities, product.id: new_quantity}, meta)
+
+    @transaction.atomic
+    def remove_from_cart(self, user, product_id):
+        product = Product.objects.select_for_update().filter(id=product_id).first()
+        quantities, meta = self._state(user.pk)
+        if product is None or product.id not in quantities:
+            return self._cart(user, quantities, meta)
+
+        product.release_reserved_stock(quantities.pop(product.id))
+        cart_id = self._cart_id(user, meta)
+        reservations.hold(cart_id, {product.id: 0})
+        self._after_commit(user.pk, lambda pipe, key: pipe.hdel(key, product.id), cart_id)
+        return self._cart(user, quantities, meta)
+
+    @transaction.atomic
+    def clear_cart(self, user):
+        quantities, meta = self._state(user.pk)
+        reservations.release(quantities)
+        cart_id = self._cart_id(user, meta)
+        reservations.drop(cart_id)
+        self._after_commit(user.pk, lambda pipe, key: pipe.delete(key), cart_id)
+        return self._cart(user, {}, meta)
+
+    @transaction.atomic
+    def merge(self, user, quantities):
+        quantities_now, meta = self._state(user.pk)
+        reserved, short = reservations.reserve_available(quantities)
+        if reserved:
+            def _apply(pipe, key):
+                for product_id, quantity in reserved.items():
+                    pipe.hincrby(key, product_id, quantity)
+            cart_id = self._cart_id(user, meta)
+            reservations.adjust(cart_id, reserved)
+            self._after_commit(user.pk, _apply, cart_id)
+        for product_id, quantity in reserved.items():
+            quantities_now[product_id] = quantities_now.get(product_id, 0) + quantity
+        return self._cart(user, quantities_now, meta), short
+
+    def drop_lines(self, lines):
+        """Remove lines whose reservation lapsed: (cart_id, user_id, product_id) triples."""
+        by_user = {}
+        for cart_id, user_id, product_id in lines:
+            by_user.setdefault((user_id, cart_id), []).append(product_id)
+        for (user_id, cart_id), product_ids in by_user.items():
+            self._after_commit(
+                user_id, lambda pipe, key, product_ids=product_ids: pipe.hdel(key, *product_ids), cart_id
+            )
+
+    # --- Write-behind ---
+
+    def flush_dirty_carts(self, limit=None):
+        """Write changed carts back to Cart/CartItem. Returns how many were written."""
+        user_ids = self.client.spop(self.DIRTY_KEY, limit or settings.CART_WRITE_BEHIND_BATCH) or []
+        for user_id in user_ids:
+            # Popped before reading: a change after this point marks the cart dirty again
+            quantities, _ = self._read(user_id)
+            try:
+                self.write_back(int(user_id), quantities)
+            except Exception:
+                self.client.sadd(self.DIRTY_KEY, user_id)  # Try again next round
+                raise
+        return len(user_ids)
+
+    @transaction.atomic
+    def write_back(self, user_id, quantities):
+        cart, _ = Cart.objects.get_or_create(user_id=user_id, defaults={'is_active': True})
+        existing = {item.product_id: item for item in cart.items.all()}
+        valid_ids = set(Product.objects.filter(id__in=quantities).values_list('id', flat=True))
+
+        cart.items.exclude(product_id__in=valid_ids).delete()
+        changed = []
+        for product_id in valid_ids & set(existing):
+            item = existing[product_id]
+            if item.quantity != quantities[product_id]:
+                item.quantity = quantities[product_id]
+                changed.append(item)
+        CartItem.objects.bulk_update(changed, ['quantity'])
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product_id=product_id, quantity=quantities[product_id])
+            for product_id in valid_ids - set(existing)
+        ])
+        cart.save(update_fields=['updated_at'])
+        cart.items_changed()
+        self.client.hset(self._meta_key(user_id), 'cart_id', cart.id)
+
+
+_backend = None
+
+
+def get_cart_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.CART_BACKEND)()
+    return _backend
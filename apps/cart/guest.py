@@ -0,0 +1,111 @@
+"""
+Guest carts: no Cart rows and no stock reservations until the shopper logs in.
+
+Small carts live entirely in a signed cookie; once a cart has more than
+GUEST_CART_COOKIE_MAX_ITEMS lines it moves to the cache (Redis) and the
+cookie only carries its token. Both expire after GUEST_CART_TTL. On login
+the quantities are merged into the user's cart and reserved in one
+transaction (CartService.merge_guest_cart, see signals.py).
+
+GuestCartMiddleware attaches `request.guest_cart` and writes it back to the
+response only when it changed, so browsing (and bot traffic) costs nothing.
+"""
+import secrets
+from decimal import Decimal
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from apps.products.models import Product
+from .backends import RedisCartItems
+
+SALT = 'apps.cart.guest'
+
+
+class GuestCart:
+    """Quantities by product id, with the read attributes of a Cart."""
+    id = pk = None
+    is_active = True
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.token = data.get('t')
+        self._quantities = None if self.token else {int(pid): q for pid, q in data.get('i', {}).items()}
+        self.modified = False
+
+    @classmethod
+    def from_request(cls, request):
+        data = request.COOKIES.get(settings.GUEST_CART_COOKIE)
+        if not data:
+            return cls()
+        try:
+            return cls(signing.loads(data, salt=SALT, max_age=settings.GUEST_CART_TTL))
+        except (signing.BadSignature, AttributeError, TypeError, ValueError):
+            return cls()  # Tampered, expired or malformed: start over
+
+    @staticmethod
+    def _cache_key(token):
+        return f'guest_cart_{token}'
+
+    @property
+    def quantities(self):
+        if self._quantities is None:
+            self._quantities = cache.get(self._cache_key(self.token)) or {}
+        return self._quantities
+
+    @property
+    def items(self):
+        return RedisCartItems(self, self.quantities)
+
+    @property
+    def total_price(self):
+        return sum((item.subtotal for item in self.items), Decimal('0.00'))
+
+    @property
+    def item_count(self):
+        return sum(self.quantities.values())
+
+    # --- Changes (no reservation: stock is checked, not held) ---
+
+    def add(self, product_id, quantity=1):
+        self.set(product_id, self.quantities.get(product_id, 0) + quantity)
+
+    def set(self, product_id, quantity):
+        if quantity < 1:
+            return self.remove(product_id)
+        product = Product.objects.filter(id=product_id, is_active=True).only('stock', 'reserved_stock').first()
+        if product is None:
+            raise ValidationError("Product not found.")
+        if quantity > product.available_stock:
+            raise ValidationError(f"Insufficient stock. Only {product.available_stock} remaining.")
+        self.quantities[product.id] = quantity
+        self.modified = True
+
+    def remove(self, product_id):
+        if self.quantities.pop(product_id, None) is not None:
+            self.modified = True
+
+    def clear(self):
+        self.quantities.clear()
+        self.modified = True
+
+    # --- Persistence ---
+
+    def save(self, response):
+        if not self.quantities:
+            if self.token:
+                cache.delete(self._cache_key(self.token))
+            response.delete_cookie(settings.GUEST_CART_COOKIE)
+            return
+
+        if self.token or len(self.quantities) > settings.GUEST_CART_COOKIE_MAX_ITEMS:
+            self.token = self.token or secrets.token_urlsafe(16)
+            cache.set(self._cache_key(self.token), self.quantities, settings.GUEST_CART_TTL)
+            data = {'t': self.token}
+        else:
+            data = {'i': self.quantities}
+        response.set_cookie(
+            settings.GUEST_CART_COOKIE, signing.dumps(data, salt=SALT, compress=True),
+            max_age=settings.GUEST_CART_TTL, httponly=True, samesite='Lax',
+            secure=settings.SESSION_COOKIE_SECURE,
+        )
@@ -0,0 +1,103 @@
+import json
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from apps.cart.backends import DatabaseCartBackend, RedisCartBackend
+from apps.products.management.commands.benchmark_recommender import percentile
+from apps.products.models import Product
+
+BENCHMARK_EMAIL = 'cart-benchmark@example.com'
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks cart operations per second under the database and Redis cart backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Rounds of the operation mix')
+        parser.add_argument('--products', type=int, default=5, help='Distinct products in the cart')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        products = list(
+            Product.objects.filter(is_active=True, stock__gte=10).order_by('id')
+            .values_list('id', flat=True)[:options['products']]
+        )
+        if len(products) < options['products']:
+            raise CommandError("Not enough products in stock; run seed_data or generate_dataset first.")
+        user, _ = get_user_model().objects.get_or_create(email=BENCHMARK_EMAIL, defaults={'first_name': 'Cart'})
+
+        backends = {'database': DatabaseCartBackend()}
+        try:
+            redis_backend = RedisCartBackend()
+            redis_backend.client.ping()
+            backends['redis'] = redis_backend
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f"Redis unavailable, skipping the redis backend: {e}"))
+
+        report = {'iterations': options['iterations'], 'products': len(products)}
+        for name, backend in backends.items():
+            self.stderr.write(f"Benchmarking {name}...")
+            report[name] = self.measure(backend, user, products, options['iterations'])
+        if 'redis' in report:
+            report['speedup'] = round(report['redis']['ops_per_second'] / report['database']['ops_per_second'], 2)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def measure(self, backend, user, products, iterations):
+        """
+        One round = what a shopper does on a cart page: add each product,
+        view the cart, change a quantity, remove one, view again. Every
+        operation runs in its own transaction, like a request with
+        ATOMIC_REQUESTS.
+        """
+        def op(func, *args):
+            with transaction.atomic():
+                result = func(user, *args)
+                if hasattr(result, 'items'):
+                    list(result.items.select_related('product').all())  # What the views render
+
+        def one_round():
+            for product_id in products:
+                op(backend.add_to_cart, product_id, 1)
+            op(backend.get_cart)
+            op(backend.update_quantity, products[0], 2)
+            op(backend.remove_from_cart, products[-1])
+            op(backend.get_cart)
+        ops_per_round = len(products) + 4
+
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        backend.clear_cart(user)
+        latencies = []
+        with connection.execute_wrapper(count_queries):
+            for _ in range(iterations):
+                started = time.perf_counter()
+                one_round()
+                latencies.append((time.perf_counter() - started) * 1000 / ops_per_round)
+                backend.clear_cart(user)  # Keep reservations from piling up
+        total_seconds = sum(latencies) * ops_per_round / 1000
+
+        result = {
+            'ops_per_second': round(iterations * ops_per_round / total_seconds, 1),
+            'op_ms_p50': round(percentile(latencies, 50), 3),
+            'op_ms_p99': round(percentile(latencies, 99), 3),
+            # Includes the per-round clear_cart
+            'queries_per_op': round(queries / (iterations * ops_per_round), 2),
+        }
+        if hasattr(backend, 'flush_dirty_carts'):
+            started = time.perf_counter()
+            backend.flush_dirty_carts()
+            result['write_behind_flush_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
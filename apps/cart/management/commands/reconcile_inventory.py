@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.cart.reconciliation import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Compares Product.reserved_stock with the live stock reservations (and stock with the ledger) and corrects drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without correcting it')
+        parser.add_argument('--batch-size', type=int, default=None, help='Products compared per query')
+
+    def handle(self, *args, **options):
+        report = reconcile(batch_size=options['batch_size'], fix=not options['dry_run'])
+        for row in report['sample']:
+            self.stdout.write(
+                f"  product {row['product_id']}: reserved_stock={row['reserved_stock']} expected={row['expected']}, "
+                f"stock={row['stock']} ledger={row['ledger_stock']}/{row['ledger_reserved_stock']}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"🔎 Checked {report['checked']} products in {report['duration_seconds']}s: "
+            f"{report['drifted']} drifted, {report['fixed']} fixed, {report['ledger_drifted']} missing from the ledger"
+        ))
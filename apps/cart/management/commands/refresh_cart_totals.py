@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.cart.models import Cart
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized Cart totals (CART_DENORMALIZED_TOTALS) in one UPDATE'
+
+    def handle(self, *args, **options):
+        updated = Cart.objects.refresh_totals()
+        self.stdout.write(self.style.SUCCESS(f"🧮 Refreshed totals of {updated} carts"))
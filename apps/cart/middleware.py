@@ -0,0 +1,15 @@
+from .guest import GuestCart
+
+
+class GuestCartMiddleware:
+    """Attach request.guest_cart; write it to the response only if it changed."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.guest_cart = GuestCart.from_request(request)
+        response = self.get_response(request)
+        if request.guest_cart.modified:
+            request.guest_cart.save(response)
+        return response
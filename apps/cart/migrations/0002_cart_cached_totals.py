@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cart", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="cached_item_count",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="cached_total_price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=12, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:31
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def reserve_existing_lines(apps, schema_editor):
+    """Lines of active carts already hold stock: give each a reservation."""
+    CartItem = apps.get_model("cart", "CartItem")
+    StockReservation = apps.get_model("cart", "StockReservation")
+    expires_at = timezone.now() + timedelta(seconds=settings.CART_RESERVATION_TTL)
+    lines = CartItem.objects.filter(cart__is_active=True).values_list("cart_id", "product_id", "quantity")
+    StockReservation.objects.bulk_create(
+        (
+            StockReservation(cart_id=cart_id, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for cart_id, product_id, quantity in lines.iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0002_stock_notify_trigger"),
+        ("cart", "0002_cart_cached_totals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "cart",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="cart.cart",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="products.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["expires_at", "id"], name="reservation_expiry_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="stockreservation",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="unique_cart_product_reservation"
+            ),
+        ),
+        migrations.RunPython(reserve_existing_lines, migrations.RunPython.noop),
+    ]
@@ -1,31 +1,96 @@
+from collections import namedtuple
+from decimal import Decimal
+from django.conf import settings
 from django.db import models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 from apps.products.models import Product
 
 User = get_user_model()
 
+CartSummary = namedtuple('CartSummary', ['item_count', 'total_price'])
+
+ZERO = Decimal('0.00')
+
+
+def _line_total():
+    return Sum(F('quantity') * F('product__price'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+class CartQuerySet(models.QuerySet):
+
+    def refresh_totals(self):
+        """Recompute the denormalized totals of these carts in one UPDATE."""
+        per_cart = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+        return self.update(
+            cached_item_count=Coalesce(Subquery(per_cart.annotate(n=Sum('quantity')).values('n')), 0),
+            cached_total_price=Coalesce(
+                Subquery(per_cart.annotate(t=_line_total()).values('t')),
+                Value(ZERO, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            ),
+        )
+
+
 class Cart(models.Model):
     """Shopping cart model."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Maintained only with CART_DENORMALIZED_TOTALS; NULL = not computed yet
+    cached_item_count = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cached_total_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, editable=False)
+
+    objects = CartQuerySet.as_manager()
     
     class Meta:
         ordering = ['-updated_at']
     
     def __str__(self):
         return f"Cart for {self.user.email}"
+
+    @cached_property
+    def summary(self):
+        """
+        Item count and total, read once per instance (i.e. per request): from
+        the denormalized columns when enabled, from already prefetched items,
+        or else with a single aggregate query.
+        """
+        if settings.CART_DENORMALIZED_TOTALS and self.cached_item_count is not None:
+            return CartSummary(self.cached_item_count, self.cached_total_price)
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            items = self.items.all()
+            return CartSummary(sum(item.quantity for item in items), sum((item.subtotal for item in items), ZERO))
+        return self._aggregate()
+
+    def _aggregate(self):
+        totals = self.items.aggregate(item_count=Sum('quantity'), total_price=_line_total())
+        return CartSummary(totals['item_count'] or 0, totals['total_price'] or ZERO)
+
+    def items_changed(self):
+        """
+        Call after changing items, inside the same transaction: forgets the
+        memoized summary and, when enabled, rewrites the denormalized totals.
+        """
+        self.__dict__.pop('summary', None)
+        if settings.CART_DENORMALIZED_TOTALS:
+            self.summary = self._aggregate()
+            self.cached_item_count, self.cached_total_price = self.summary
+            Cart.objects.filter(pk=self.pk).update(
+                cached_item_count=self.cached_item_count, cached_total_price=self.cached_total_price
+            )
     
     @property
     def total_price(self):
-        """Calculate total cart price dynamically."""
-        return sum(item.subtotal for item in self.items.all())
+        """Cart total (see summary)."""
+        return self.summary.total_price
     
     @property
     def item_count(self):
-        """Get total number of items in cart."""
-        return sum(item.quantity for item in self.items.all())
+        """Total number of items in cart (see summary)."""
+        return self.summary.item_count
 
 
 class CartItem(models.Model):
@@ -45,4 +110,29 @@ class CartItem(models.Model):
     @property
     def subtotal(self):
         """Calculate item subtotal."""
-        return self.product.price * self.quantity
\ No newline at end of file
+        return self.product.price * self.quantity
+
+class StockReservation(models.Model):
+    """
+    Stock held for one cart line until expires_at. Every cart change pushes
+    the cart's expiry forward; the sweeper (reservations.release_expired)
+    releases lapsed holds and drops their lines. Product.reserved_stock is
+    the sum of these rows.
+    """
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='unique_cart_product_reservation'),
+        ]
+        indexes = [
+            # The sweeper pages through expired rows by (expires_at, id)
+            models.Index(fields=['expires_at', 'id'], name='reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x product {self.product_id} for cart {self.cart_id} until {self.expires_at}"
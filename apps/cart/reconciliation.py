@@ -0,0 +1,140 @@
+"""
+Inventory drift reconciliation.
+
+Product.reserved_stock is a counter; the live StockReservation rows are the
+truth it should equal. reconcile() walks the catalogue in id-ordered chunks
+and compares the two with one annotated query per chunk (no locks). Drifted
+products are then locked (short transaction, id order like checkout and
+every cart path), compared again under the lock and corrected with one
+UPDATE. Every path that changes a product's reservations (cart changes,
+checkout's clear_cart, guest merges, the expiry sweeper) holds its row lock
+while doing so, so the corrected value can't race with them.
+
+The same query compares stock and reserved_stock with the inventory ledger
+(apps.products.ledger). A difference there is a change nobody recorded
+(a raw UPDATE, a fix made straight in the database): the counters are physical truth, so the
+ledger gets an adjust movement for it rather than the product a new value.
+
+Each run's report is logged and kept in the cache for the staff endpoint.
+"""
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.products.ledger import ledger_balance, record_movements
+from apps.products.models import InventoryMovement, Product
+from . import reservations
+from .models import StockReservation
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_KEY = 'inventory_reconciliation_report'
+
+
+def expected_reserved():
+    """reserved_stock as the reservations say it should be (annotation)."""
+    per_product = (
+        StockReservation.objects.filter(product=OuterRef('pk'))
+        .order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    return Coalesce(Subquery(per_product), 0)
+
+
+def reconcile(batch_size=None, fix=True):
+    """Check (and with fix, correct) every product. Returns the run's report."""
+    batch_size = batch_size or settings.INVENTORY_RECONCILE_BATCH
+    started = time.monotonic()
+    report = {
+        'checked': 0,
+        'drifted': 0,
+        'fixed': 0,
+        'over_reserved_units': 0,   # Held by nobody: shown as unavailable
+        'under_reserved_units': 0,  # Held by carts but counted as available
+        'max_drift': 0,
+        'ledger_drifted': 0,
+        'ledger_unrecorded_units': 0,  # Stock changes missing from the ledger
+        'sample': [],
+    }
+
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .annotate(expected=expected_reserved(), **ledger_balance())
+            .values_list('id', 'stock', 'reserved_stock', 'expected', 'ledger_stock', 'ledger_reserved_stock')[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        report['checked'] += len(rows)
+
+        drifted = []
+        for product_id, stock, reserved, expected, ledger_stock, ledger_reserved in rows:
+            unrecorded = (stock - ledger_stock, reserved - ledger_reserved)
+            if reserved == expected and unrecorded == (0, 0):
+                continue
+            drifted.append(product_id)
+            drift = reserved - expected
+            if drift:
+                report['drifted'] += 1
+                report['over_reserved_units' if drift > 0 else 'under_reserved_units'] += abs(drift)
+                report['max_drift'] = max(report['max_drift'], abs(drift))
+            if unrecorded != (0, 0):
+                report['ledger_drifted'] += 1
+                report['ledger_unrecorded_units'] += abs(unrecorded[0])
+            if len(report['sample']) < 20:
+                report['sample'].append({
+                    'product_id': product_id, 'reserved_stock': reserved, 'expected': expected,
+                    'stock': stock, 'ledger_stock': ledger_stock, 'ledger_reserved_stock': ledger_reserved,
+                })
+        if drifted and fix:
+            report['fixed'] += _fix(drifted)
+
+    report['duration_seconds'] = round(time.monotonic() - started, 3)
+    report['finished_at'] = timezone.now().isoformat()
+    report['dry_run'] = not fix
+    cache.set(REPORT_CACHE_KEY, report, None)
+
+    log = logger.warning if report['drifted'] or report['ledger_drifted'] else logger.info
+    log(
+        f"RECONCILE: {report['drifted']} of {report['checked']} products drifted "
+        f"(+{report['over_reserved_units']}/-{report['under_reserved_units']} units), fixed {report['fixed']}; "
+        f"{report['ledger_drifted']} had changes missing from the ledger"
+    )
+    return report
+
+
+@transaction.atomic
+def _fix(product_ids):
+    products = reservations.lock_products(product_ids)
+    # Compared again under the lock: checkout or a cart may have moved on since the scan
+    current = {
+        product_id: rest
+        for product_id, *rest in Product.objects.filter(id__in=product_ids)
+        .annotate(expected=expected_reserved(), **ledger_balance())
+        .values_list('id', 'expected', 'ledger_stock', 'ledger_reserved_stock')
+    }
+    # First the ledger catches up with the counters, then the counters are corrected (and recorded)
+    record_movements([
+        InventoryMovement(
+            product_id=product.id, kind=InventoryMovement.ADJUST, reference='reconcile',
+            stock_delta=product.stock - current[product.id][1],
+            reserved_delta=product.reserved_stock - current[product.id][2],
+        )
+        for product in products
+    ])
+    deltas = {
+        product.id: current[product.id][0] - product.reserved_stock
+        for product in products
+        if product.reserved_stock != current[product.id][0]
+    }
+    reservations.apply_deltas(products, deltas, kind=InventoryMovement.ADJUST, reference='reconcile')
+    return len(deltas)
+
+
+def last_report():
+    return cache.get(REPORT_CACHE_KEY)
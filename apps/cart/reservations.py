@@ -0,0 +1,213 @@
+"""
+Stock held by carts.
+
+Each cart line has a StockReservation (cart, product, quantity, expires_at)
+and Product.reserved_stock is the sum of them. Cart changes go through
+hold(), which also pushes the whole cart's expiry CART_RESERVATION_TTL into
+the future; viewing the cart or checkout does the same through touch().
+
+release_expired() is the sweeper (Celery beat, every minute): it walks the
+expired rows by (expires_at, id) in chunks, releases their stock and drops
+the lines from the carts. With CART_RESERVATION_EXACT_EXPIRY a delayed task
+per cart also runs it at the moment the cart's hold lapses.
+
+Lock order everywhere is product rows (in id order) first, then
+reservation rows, so the sweeper and cart operations can't deadlock.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from apps.products.ledger import record_movements
+from apps.products.models import InventoryMovement, Product
+from apps.products.services import stock_changed
+from .models import StockReservation
+
+
+def expiry():
+    return timezone.now() + timedelta(seconds=settings.CART_RESERVATION_TTL)
+
+
+def apply_deltas(products, deltas, kind=None, reference=''):
+    """
+    Add deltas[product_id] to reserved_stock of the (locked) products in one
+    UPDATE, and record the movements in the inventory ledger (reserve or
+    release by sign, unless a kind is given). update() skips signals, so
+    the stock hooks are run by stock_changed(), as reserve_stock() does.
+    """
+    if not deltas:
+        return
+    Product.objects.filter(id__in=deltas).update(reserved_stock=Greatest(
+        F('reserved_stock') + Case(
+            *(When(id=product_id, then=Value(delta)) for product_id, delta in deltas.items()),
+            default=Value(0), output_field=models.IntegerField(),
+        ),
+        Value(0),
+    ))
+    movements, changed = [], []
+    for product in products:
+        if product.id in deltas:
+            reserved = max(0, product.reserved_stock + deltas[product.id])
+            movements.append(InventoryMovement(
+                product_id=product.id,
+                kind=kind or (InventoryMovement.RESERVE if reserved > product.reserved_stock else InventoryMovement.RELEASE),
+                reserved_delta=reserved - product.reserved_stock,
+                reference=reference,
+            ))
+            product.reserved_stock = reserved
+            changed.append(product)
+    record_movements(movements)
+    stock_changed(changed)
+
+
+def lock_products(product_ids, **filters):
+    """select_for_update in id order, the lock order every stock path uses."""
+    return list(Product.objects.select_for_update().filter(id__in=product_ids, **filters).order_by('id'))
+
+
+def reserve_available(quantities):
+    """
+    Reserve up to quantities[product_id] of each product, as much as is
+    available: one locking query, one UPDATE. Returns ({product_id: reserved},
+    {product_id: quantity that couldn't be reserved}); missing and inactive
+    products come back entirely short. Call inside a transaction.
+    """
+    reserved, short = {}, dict(quantities)
+    products = lock_products(quantities, is_active=True)
+    for product in products:
+        wanted = short.pop(product.id)
+        granted = min(wanted, product.available_stock)
+        if granted > 0:
+            reserved[product.id] = granted
+        if granted < wanted:
+            short[product.id] = wanted - granted
+    apply_deltas(products, reserved)
+    return reserved, short
+
+
+def release(quantities):
+    """Give back quantities[product_id] of each product: one locking query, one UPDATE."""
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if quantities:
+        apply_deltas(lock_products(quantities), {product_id: -quantity for product_id, quantity in quantities.items()})
+
+
+def hold(cart_id, quantities):
+    """
+    Record what the cart now holds of these products (0 = nothing) and
+    extend the whole cart's reservations. The stock itself is reserved or
+    released by the caller.
+    """
+    expires_at = expiry()
+    gone = [product_id for product_id, quantity in quantities.items() if quantity <= 0]
+    if gone:
+        StockReservation.objects.filter(cart_id=cart_id, product_id__in=gone).delete()
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(cart_id=cart_id, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in quantities.items()
+            if quantity > 0
+        ],
+        update_conflicts=True, unique_fields=['cart', 'product'], update_fields=['quantity', 'expires_at'],
+    )
+    StockReservation.objects.filter(cart_id=cart_id).update(expires_at=expires_at)
+    _schedule_expiry(cart_id, expires_at)
+
+
+def adjust(cart_id, deltas):
+    """hold() relative to what the cart holds now (read under the caller's product locks)."""
+    current = dict(
+        StockReservation.objects.filter(cart_id=cart_id, product_id__in=deltas).values_list('product_id', 'quantity')
+    )
+    hold(cart_id, {product_id: current.get(product_id, 0) + delta for product_id, delta in deltas.items()})
+
+
+def drop(cart_id):
+    """Forget every reservation of the cart (after releasing its stock)."""
+    StockReservation.objects.filter(cart_id=cart_id).delete()
+
+
+def touch(user):
+    """
+    Cart activity without a change (viewing the cart, checkout): extend the
+    holds, but only once they are past half their lifetime, so page views
+    don't turn into a write each.
+    """
+    expires_at = expiry()
+    refresh_before = expires_at - timedelta(seconds=settings.CART_RESERVATION_TTL / 2)
+    stale = StockReservation.objects.filter(cart__user=user, expires_at__lt=refresh_before)
+    if stale.update(expires_at=expires_at):
+        cart_id = StockReservation.objects.filter(cart__user=user).values_list('cart_id', flat=True).first()
+        _schedule_expiry(cart_id, expires_at)
+
+
+def _schedule_expiry(cart_id, expires_at):
+    if not settings.CART_RESERVATION_EXACT_EXPIRY or cart_id is None:
+        return
+    from apps.notifications.tasks import release_expired_reservations
+
+    # Runs at the deadline; if the cart was active since, there is nothing expired to release
+    transaction.on_commit(lambda: release_expired_reservations.apply_async(
+        kwargs={'cart_id': cart_id}, eta=expires_at + timedelta(seconds=1)
+    ))
+
+
+def reserved_by_product(product_ids=None):
+    """What Product.reserved_stock should be, from the live reservations: {product_id: quantity}."""
+    reservations = StockReservation.objects.all()
+    if product_ids is not None:
+        reservations = reservations.filter(product_id__in=product_ids)
+    return dict(reservations.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total'))
+
+
+# --- Sweeper ---
+
+def release_expired(batch_size=None, cart_id=None):
+    """
+    Release every reservation that expired before now, in keyset chunks of
+    batch_size (one short transaction each). Returns the number of lines
+    released.
+    """
+    batch_size = batch_size or settings.CART_RESERVATION_SWEEP_BATCH
+    now = timezone.now()
+    expired = StockReservation.objects.filter(expires_at__lte=now)
+    if cart_id is not None:
+        expired = expired.filter(cart_id=cart_id)
+
+    released, cursor = 0, None
+    while True:
+        page = expired
+        if cursor:
+            page = page.filter(Q(expires_at__gt=cursor[0]) | Q(expires_at=cursor[0], id__gt=cursor[1]))
+        candidates = list(page.order_by('expires_at', 'id').values_list('expires_at', 'id', 'product_id')[:batch_size])
+        if not candidates:
+            return released
+        cursor = candidates[-1][:2]
+        released += _release_batch([c[1] for c in candidates], {c[2] for c in candidates}, now)
+        if len(candidates) < batch_size:
+            return released
+
+
+@transaction.atomic
+def _release_batch(reservation_ids, product_ids, now):
+    products = lock_products(product_ids)
+    # Re-read under lock: a cart may have been active since the candidates were read
+    rows = list(
+        StockReservation.objects.select_for_update(of=('self',))
+        .filter(id__in=reservation_ids, expires_at__lte=now)
+        .values_list('id', 'cart_id', 'cart__user_id', 'product_id', 'quantity')
+    )
+    if not rows:
+        return 0
+
+    deltas = {}
+    for _, _, _, product_id, quantity in rows:
+        deltas[product_id] = deltas.get(product_id, 0) - quantity
+    apply_deltas(products, deltas, reference='expired')
+    StockReservation.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+    from .backends import get_cart_backend
+    get_cart_backend().drop_lines([(cart_id, user_id, product_id) for _, cart_id, user_id, product_id, _ in rows])
+    return len(rows)
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from apps.products.models import Product
+from .models import Cart, CartItem
+from .services import CartService
+
+
+@receiver(user_logged_in)
+def merge_guest_cart(sender, request, user, **kwargs):
+    """Fold the guest cart into the user's cart on login (one transaction)."""
+    guest_cart = getattr(request, 'guest_cart', None)
+    if guest_cart is None or not guest_cart.quantities:
+        return
+
+    cart, short = CartService.merge_guest_cart(user, dict(guest_cart.quantities))
+    guest_cart.clear()  # GuestCartMiddleware drops the cookie (and cache entry)
+    if short:
+        messages.warning(
+            request, "Some items in your cart are no longer available in that quantity.", fail_silently=True
+        )
+
+
+@receiver(pre_delete, sender=Product)
+def remember_carts_of_deleted_product(sender, instance, **kwargs):
+    if settings.CART_DENORMALIZED_TOTALS:
+        instance._cart_ids = list(CartItem.objects.filter(product=instance).values_list('cart_id', flat=True))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_cart_totals_on_price_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """Denormalized cart totals carry the price, so re-price the carts holding this product."""
+    if not settings.CART_DENORMALIZED_TOTALS or created:
+        return
+    if update_fields and 'price' not in update_fields:
+        return  # Stock reservations and the like
+    cart_ids = getattr(instance, '_cart_ids', None)
+    if cart_ids is None:
+        cart_ids = CartItem.objects.filter(product=instance).values('cart_id')
+    Cart.objects.filter(id__in=cart_ids).refresh_totals()
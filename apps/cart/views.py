@@ -1,25 +1,29 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 
 from .services import CartService
 
-@login_required
+# Guests get a cookie/cache cart (request.guest_cart, see guest.py) instead of
+# Cart rows; it is merged into their account cart when they log in.
+
 def cart_detail(request):
     """
     Renders the cart page (HTML).
     Template: cart/cart_detail.html
     """
-    cart = CartService.get_cart(request.user)
+    if request.user.is_authenticated:
+        cart = CartService.get_cart(request.user)
+        CartService.touch(request.user)
+    else:
+        cart = request.guest_cart
     context = {
         'cart': cart,
-        'items': cart.items.select_related('product').all()
+        'items': cart.items.select_related('product').prefetch_related('product__images').all()
     }
     return render(request, 'cart/cart_detail.html', context)
 
-@login_required
 @require_POST
 def add_to_cart(request, product_id):
     """
@@ -28,7 +32,10 @@ def add_to_cart(request, product_id):
     quantity = int(request.POST.get('quantity', 1))
     
     try:
-        CartService.add_to_cart(request.user, product_id, quantity)
+        if request.user.is_authenticated:
+            CartService.add_to_cart(request.user, product_id, quantity)
+        else:
+            request.guest_cart.add(product_id, quantity)
         messages.success(request, "Item added to cart.")
     except ValidationError as e:
         messages.error(request, str(e))
@@ -38,7 +45,6 @@ def add_to_cart(request, product_id):
     # Redirect back to where the user came from, or the cart
     return redirect(request.META.get('HTTP_REFERER', 'cart:detail'))
 
-@login_required
 @require_POST
 def update_cart_item(request, product_id):
     """
@@ -47,19 +53,24 @@ def update_cart_item(request, product_id):
     quantity = int(request.POST.get('quantity', 1))
     
     try:
-        CartService.update_quantity(request.user, product_id, quantity)
+        if request.user.is_authenticated:
+            CartService.update_quantity(request.user, product_id, quantity)
+        else:
+            request.guest_cart.set(product_id, quantity)
         messages.success(request, "Cart updated.")
     except ValidationError as e:
         messages.error(request, str(e))
         
     return redirect('cart:detail')
 
-@login_required
 @require_POST
 def remove_cart_item(request, product_id):
     """
     Handle 'Remove' button click.
     """
-    CartService.remove_from_cart(request.user, product_id)
+    if request.user.is_authenticated:
+        CartService.remove_from_cart(request.user, product_id)
+    else:
+        request.guest_cart.remove(product_id)
     messages.success(request, "Item removed.")
     return redirect('cart:detail')
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'aggregate_id', 'created_at', 'published_at', 'attempts']
+    list_filter = ['topic', ('published_at', admin.EmptyFieldListFilter)]
+    search_fields = ['event_id', 'aggregate_id']
+    readonly_fields = ['event_id', 'topic', 'aggregate_id', 'payload', 'created_at', 'published_at', 'last_error']
+    actions = ['retry_events']
+
+    @admin.action(description='Retry selected events')
+    def retry_events(self, request, queryset):
+        updated = queryset.filter(published_at__isnull=True).update(attempts=0, last_error='')
+        self.message_user(request, f"{updated} events queued for another attempt.")
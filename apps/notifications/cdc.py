@@ -0,0 +1,164 @@
+"""
+Change-data-capture over Redis Streams.
+
+capture() appends a compact record to the entity's stream once the
+transaction commits (nothing is published for rolled-back changes):
+
+    cdc:product   {op: upsert|delete, id: 42, fields: "stock,reserved_stock", version: <ns>}
+
+`fields` is empty when the whole row may have changed. Consumers read the
+streams through a consumer group (CDCConsumer): each group gets every record,
+processes it in batches at its own pace and acknowledges it; records that
+were read but not acknowledged are replayed after a crash, and a group can be
+rewound with `consume_cdc --replay-from`.
+"""
+import logging
+import time
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+except ImportError:  # CDC is off without the client
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+_client = None
+_suspended_until = 0.0
+
+
+def stream_name(entity):
+    return f'{settings.CDC_STREAM_PREFIX}{entity}'
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.CDC_REDIS_URL, socket_connect_timeout=1, socket_timeout=5, decode_responses=True
+        )
+    return _client
+
+
+def capture(entity, pk, fields=None, op=UPSERT):
+    """Queue a change record for after commit (immediately outside a transaction)."""
+    if not settings.CDC_ENABLED or redis is None:
+        return
+    record = {
+        'op': op,
+        'id': str(pk),
+        'fields': ','.join(sorted(fields)) if fields else '',
+    }
+    transaction.on_commit(lambda: _append(entity, record))
+
+
+def _append(entity, record):
+    global _suspended_until
+    if time.monotonic() < _suspended_until:
+        return  # Redis was down a moment ago; don't stall every commit on it
+    try:
+        get_client().xadd(
+            stream_name(entity),
+            {**record, 'version': time.time_ns()},
+            maxlen=settings.CDC_STREAM_MAXLEN,
+            approximate=True,
+        )
+    except redis.RedisError as e:
+        _suspended_until = time.monotonic() + settings.CDC_RETRY_AFTER
+        logger.warning(f"CDC: dropped {entity} {record['id']} change, Redis unavailable: {e}")
+
+
+class CDCConsumer:
+    """
+    Base class for stream consumers. Subclasses set `group` and `entities`
+    and implement handle_batch(records), where each record is
+    (entity, stream_id, fields_dict). Records are acknowledged after
+    handle_batch returns; if it raises, the batch stays pending and is
+    read again on the next start.
+    """
+    group = None
+    entities = ()
+
+    def __init__(self, consumer_name, batch_size=None, block_ms=5000):
+        self.consumer_name = consumer_name
+        self.batch_size = batch_size or settings.CDC_BATCH_SIZE
+        self.block_ms = block_ms
+        self.client = get_client()
+        self.streams = {stream_name(entity): entity for entity in self.entities}
+
+    def ensure_groups(self, start_id='$'):
+        for stream in self.streams:
+            try:
+                self.client.xgroup_create(stream, self.group, id=start_id, mkstream=True)
+            except redis.ResponseError as e:
+                if 'BUSYGROUP' not in str(e):
+                    raise
+
+    def replay_from(self, stream_id):
+        """Rewind the group: everything after stream_id is delivered again."""
+        for stream in self.streams:
+            self.client.xgroup_setid(stream, self.group, stream_id)
+
+    def read(self, stream_id):
+        """'0' = our pending (unacknowledged) records, '>' = new ones."""
+        response = self.client.xreadgroup(
+            self.group, self.consumer_name,
+            {stream: stream_id for stream in self.streams},
+            count=self.batch_size,
+            block=None if stream_id == '0' else self.block_ms,
+        )
+        return [
+            (self.streams[stream], record_id, fields)
+            for stream, records in response or []
+            for record_id, fields in records
+            if fields  # Pending entries trimmed by MAXLEN come back empty
+        ], [
+            (stream, record_id)
+            for stream, records in response or []
+            for record_id, fields in records
+        ]
+
+    def ack(self, ids):
+        by_stream = {}
+        for stream, record_id in ids:
+            by_stream.setdefault(stream, []).append(record_id)
+        pipe = self.client.pipeline(transaction=False)
+        for stream, record_ids in by_stream.items():
+            pipe.xack(stream, self.group, *record_ids)
+        pipe.execute()
+
+    def poll(self, stream_id='>'):
+        records, ids = self.read(stream_id)
+        if records:
+            self.handle_batch(records)
+        if ids:
+            self.ack(ids)
+        return len(ids)
+
+    def run(self):
+        self.ensure_groups()
+        while self.poll('0'):  # Finish what a previous run left unacknowledged
+            pass
+        while True:
+            self.poll('>')
+
+    def handle_batch(self, records):
+        raise NotImplementedError
+
+    def lag(self):
+        """Per stream: records not yet delivered to the group, and delivered but unacknowledged."""
+        lag = {}
+        for stream in self.streams:
+            for info in self.client.xinfo_groups(stream):
+                if info['name'] == self.group:
+                    lag[stream] = {'lag': info.get('lag'), 'pending': info['pending']}
+        return lag
+
+
+def get_consumer_class(name):
+    return import_string(settings.CDC_CONSUMERS[name])
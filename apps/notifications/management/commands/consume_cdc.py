@@ -0,0 +1,52 @@
+import logging
+import socket
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.notifications.cdc import get_consumer_class
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Runs a change-data-capture consumer (see CDC_CONSUMERS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumer', help=f"One of: {', '.join(settings.CDC_CONSUMERS)}")
+        parser.add_argument(
+            '--name', default=socket.gethostname(),
+            help='Consumer name within the group; run several with different names to share the load'
+        )
+        parser.add_argument('--batch-size', type=int, default=settings.CDC_BATCH_SIZE)
+        parser.add_argument(
+            '--replay-from', metavar='STREAM_ID',
+            help="Rewind the group first ('0' = everything still in the stream)"
+        )
+        parser.add_argument('--lag', action='store_true', help='Print the group lag and exit')
+
+    def handle(self, *args, **options):
+        try:
+            consumer_class = get_consumer_class(options['consumer'])
+        except KeyError:
+            raise CommandError(f"Unknown consumer '{options['consumer']}'")
+
+        consumer = consumer_class(options['name'], batch_size=options['batch_size'])
+        consumer.ensure_groups()
+        if options['lag']:
+            self.stdout.write(str(consumer.lag()))
+            return
+        if options['replay_from']:
+            consumer.replay_from(options['replay_from'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🔁 {consumer_class.__name__} consuming {', '.join(consumer.streams)} as {consumer.group}/{consumer.consumer_name}"
+        ))
+        while True:
+            try:
+                consumer.run()
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                # Unacknowledged records are read again on restart
+                logger.error(f"CDC consumer {consumer.group} failed: {e}")
+                time.sleep(5)
@@ -0,0 +1,60 @@
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.notifications import outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Delivers outbox events to Celery / Channels (at-least-once, in id order)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            '--interval', type=float, default=settings.OUTBOX_RELAY_INTERVAL,
+            help='Seconds to sleep when the outbox is empty'
+        )
+        parser.add_argument('--once', action='store_true', help='Drain what is pending and exit')
+        parser.add_argument(
+            '--lag-report-interval', type=float, default=60.0,
+            help='Seconds between lag reports'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            published = outbox.drain(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"📤 Published {published} events; lag: {outbox.lag()}"))
+            return
+
+        self.stdout.write(self.style.SUCCESS('📤 Outbox relay running'))
+        last_report = 0.0
+        while True:
+            try:
+                published, failed = outbox.relay(options['batch_size'])
+                now = time.monotonic()
+                if now - last_report >= options['lag_report_interval']:
+                    last_report = now
+                    self.report_lag()
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                logger.error(f"Outbox relay error: {e}")
+                close_old_connections()
+                published = 0
+
+            if not published:
+                try:
+                    time.sleep(options['interval'])
+                except KeyboardInterrupt:
+                    break
+
+    def report_lag(self):
+        lag = outbox.lag()
+        message = f"Outbox lag: {lag['pending']} pending, oldest {lag['oldest_pending_seconds']}s, {lag['dead']} dead"
+        if lag['oldest_pending_seconds'] > settings.OUTBOX_LAG_WARNING_SECONDS or lag['dead']:
+            logger.warning(message)
+        else:
+            logger.info(message)
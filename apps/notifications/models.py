@@ -0,0 +1,31 @@
+import uuid
+from django.db import models
+from django.db.models import Q
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event written in the same transaction as the change it describes.
+    The relay (manage.py relay_outbox) hands it to Celery / Channels after
+    commit; event_id travels with it so consumers can drop redeliveries.
+    """
+    event_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    topic = models.CharField(max_length=50)
+    aggregate_id = models.CharField(max_length=50, blank=True)
+    payload = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # The relay only ever scans the unpublished tail
+            models.Index(fields=['id'], condition=Q(published_at__isnull=True), name='outbox_pending_idx'),
+            models.Index(fields=['published_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.aggregate_id} ({self.event_id})"
@@ -0,0 +1,139 @@
+"""
+Transactional outbox.
+
+record() inserts an OutboxEvent in the caller's transaction, so an event
+exists exactly when the change it describes was committed. relay() drains
+pending events in id order, in batches locked with SKIP LOCKED (several
+relays can run side by side), and dispatches each one to its topic handler.
+An event is marked published in the same transaction that dispatched it:
+a crash in between redelivers it, so delivery is at-least-once and
+consumers deduplicate on event_id.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = 'order.created'
+ORDER_SHIPPED = 'order.shipped'
+STOCK_CHANGED = 'stock.changed'
+
+PROCESSED_TTL = 7 * 24 * 3600  # Longer than any retry window
+
+_handlers = {}
+
+
+def record(topic, payload, aggregate_id=''):
+    """Queue an event; call inside the transaction that makes the change."""
+    return OutboxEvent.objects.create(topic=topic, payload=payload, aggregate_id=str(aggregate_id))
+
+
+def handler(topic):
+    def register(func):
+        _handlers[topic] = func
+        return func
+    return register
+
+
+@handler(ORDER_CREATED)
+def _order_created(event):
+    from .tasks import send_order_confirmation_email
+    send_order_confirmation_email.apply_async(
+        args=[event.payload['order_id']], kwargs={'event_id': str(event.event_id)}, task_id=str(event.event_id)
+    )
+
+
+@handler(ORDER_SHIPPED)
+def _order_shipped(event):
+    from .tasks import send_shipping_notification
+    send_shipping_notification.apply_async(
+        args=[event.payload['order_id']], kwargs={'event_id': str(event.event_id)}, task_id=str(event.event_id)
+    )
+
+
+@handler(STOCK_CHANGED)
+def _stock_changed(event):
+    # Latest value wins, so redeliveries are harmless here
+    from apps.products.broadcast import stock_broadcaster
+    stock_broadcaster.publish(event.payload['product_id'], event.payload['available_stock'])
+
+
+# --- Consumer-side deduplication ---
+
+def _processed_key(event_id):
+    return f'outbox_processed_{event_id}'
+
+
+def already_processed(event_id):
+    return event_id is not None and cache.get(_processed_key(event_id)) is not None
+
+
+def mark_processed(event_id):
+    if event_id is not None:
+        cache.set(_processed_key(event_id), 1, PROCESSED_TTL)
+
+
+# --- Relay ---
+
+def relay(batch_size=None):
+    """Dispatch one batch. Returns (published, failed)."""
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    published, failed = [], []
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+            .order_by('id')[:batch_size]
+        )
+        for event in events:
+            try:
+                _handlers[event.topic](event)
+                published.append(event.id)
+            except Exception as e:
+                logger.error(f"Outbox: {event} failed: {e}")
+                event.attempts += 1
+                event.last_error = str(e)
+                failed.append(event)
+
+        if published:
+            OutboxEvent.objects.filter(id__in=published).update(published_at=timezone.now())
+        if failed:
+            OutboxEvent.objects.bulk_update(failed, ['attempts', 'last_error'])
+    return len(published), len(failed)
+
+
+def drain(batch_size=None):
+    """Relay until nothing is pending (or only failing events are left)."""
+    total = 0
+    while True:
+        published, failed = relay(batch_size)
+        total += published
+        if not published:
+            return total
+
+
+def lag():
+    """How far the relay is behind."""
+    unpublished = OutboxEvent.objects.filter(published_at__isnull=True)
+    pending = unpublished.filter(attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+    return {
+        'pending': pending.count(),
+        'oldest_pending_seconds': round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0,
+        'dead': unpublished.filter(attempts__gte=settings.OUTBOX_MAX_ATTEMPTS).count(),
+    }
+
+
+def purge(days=None):
+    """Delete published events older than OUTBOX_RETENTION_DAYS."""
+    days = settings.OUTBOX_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEvent.objects.filter(published_at__lt=cutoff).delete()
+    return deleted
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from apps.orders.models import Order
-from .tasks import send_shipping_notification, send_order_confirmation_email
+from apps.products.models import Category, Product
+from . import cdc, outbox
+
+# Entity name in the CDC stream (cdc:<entity>) per model
+CDC_ENTITIES = {Product: 'product', Category: 'category', Order: 'order'}
 
 @receiver(post_save, sender=Order)
 def trigger_order_notifications(sender, instance, created, **kwargs):
@@ -9,22 +13,36 @@ def trigger_order_notifications(sender, instance, created, **kwargs):
     Listen for Order saves.
     1. If created -> Send Confirmation Email.
     2. If status changes to SHIPPED -> Send Shipping Email.
+    Both go through the outbox, in the transaction that saved the order, so
+    no email is queued for an order that was rolled back.
     """
     if created:
-        # Trigger async task
-        send_order_confirmation_email.delay(instance.id)
+        outbox.record(outbox.ORDER_CREATED, {'order_id': instance.id}, aggregate_id=instance.id)
+    elif getattr(instance, '_shipped_now', False):
+        instance._shipped_now = False
+        outbox.record(outbox.ORDER_SHIPPED, {'order_id': instance.id}, aggregate_id=instance.id)
 
 @receiver(pre_save, sender=Order)
 def check_status_change(sender, instance, **kwargs):
     """
     Check if status is changing to SHIPPED.
-    Pre_save is used to compare old vs new status.
+    Pre_save is used to compare old vs new status; the event itself is
+    recorded in post_save, once the row is written.
     """
-    if instance.pk:
-        try:
-            old_order = Order.objects.get(pk=instance.pk)
-            if old_order.status != Order.Status.SHIPPED and instance.status == Order.Status.SHIPPED:
-                # Trigger async task
-                send_shipping_notification.delay(instance.id)
-        except Order.DoesNotExist:
-            pass
\ No newline at end of file
+    if instance.pk and instance.status == Order.Status.SHIPPED:
+        old_status = Order.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        if old_status is not None and old_status != Order.Status.SHIPPED:
+            instance._shipped_now = True
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Order)
+def capture_change(sender, instance, update_fields=None, **kwargs):
+    """Change record for the CDC stream, appended after commit."""
+    cdc.capture(CDC_ENTITIES[sender], instance.pk, update_fields)
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Order)
+def capture_delete(sender, instance, **kwargs):
+    cdc.capture(CDC_ENTITIES[sender], instance.pk, op=cdc.DELETE)
@@ -8,15 +8,19 @@ import logging
 
 # Use lazy imports inside tasks to avoid circular dependencies
 from apps.orders.models import Order, OrderItem
+from .outbox import already_processed, mark_processed
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 @shared_task(bind=True, max_retries=3)
-def send_order_confirmation_email(self, order_id):
+def send_order_confirmation_email(self, order_id, event_id=None):
     """
     Send order confirmation email asynchronously.
+    event_id comes from the outbox; a redelivered event is sent only once.
     """
+    if already_processed(event_id):
+        return True
     try:
         order = Order.objects.select_related('user').get(id=order_id)
         order_items = OrderItem.objects.filter(order=order).select_related('product')
@@ -42,6 +46,7 @@ def send_order_confirmation_email(self, order_id):
             fail_silently=False
         )
         
+        mark_processed(event_id)
         logger.info(f"EMAIL SENT: Order confirmation for {order.order_number}")
         return True
         
@@ -53,10 +58,12 @@ def send_order_confirmation_email(self, order_id):
         raise self.retry(exc=e, countdown=60)
 
 @shared_task(bind=True, max_retries=3)
-def send_shipping_notification(self, order_id):
+def send_shipping_notification(self, order_id, event_id=None):
     """
     Send email when order status changes to SHIPPED.
     """
+    if already_processed(event_id):
+        return True
     try:
         order = Order.objects.get(id=order_id)
         
@@ -76,6 +83,7 @@ def send_shipping_notification(self, order_id):
             recipient_list=[order.customer_email],
             html_message=html_message
         )
+        mark_processed(event_id)
         return True
     except Exception as e:
         logger.error(f"Shipping email failed: {e}")
@@ -114,33 +122,104 @@ def update_trending_products():
         return 0
 
 @shared_task
-def cleanup_abandoned_carts():
+def release_expired_reservations(cart_id=None):
+    """
+    Release stock held by cart lines whose reservation expired, and drop
+    those lines (apps.cart.reservations). Beat runs it for all carts every
+    minute; with CART_RESERVATION_EXACT_EXPIRY it is also queued per cart
+    for the moment that cart's hold lapses.
+    """
+    from apps.cart.reservations import release_expired
+
+    released = release_expired(cart_id=cart_id)
+    if released:
+        logger.info(f"CLEANUP: Released {released} expired cart reservations.")
+    return released
+
+
+@shared_task
+def reconcile_inventory():
     """
-    Release stock from carts inactive for > 30 mins.
+    Correct Product.reserved_stock wherever it drifted from the live stock
+    reservations (apps.cart.reconciliation). Safe alongside checkout: fixes
+    are made under the same product locks.
     """
-    # Import inside function to prevent circular import with apps.cart
+    from apps.cart.reconciliation import reconcile
+
+    return reconcile()
+
+
+@shared_task
+def compact_inventory_ledger():
+    """Keep the ledger's coming partitions ready and fold settled movements into the snapshots."""
+    from apps.products.ledger import compact_ledger, ensure_partitions
+
+    ensure_partitions()
+    return compact_ledger()
+
+
+@shared_task
+def archive_inventory_ledger():
+    """Detach ledger partitions past INVENTORY_LEDGER_RETENTION_DAYS (PostgreSQL) for dumping."""
+    from apps.products.ledger import archive_partitions
+
+    return archive_partitions()
+
+
+@shared_task
+def flush_cart_write_behind():
+    """
+    Write Redis carts changed since the last run back to Cart/CartItem.
+    No-op with the database cart backend.
+    """
+    from apps.cart.backends import get_cart_backend
+
+    backend = get_cart_backend()
+    if not hasattr(backend, 'flush_dirty_carts'):
+        return 0
+    written = 0
+    while True:
+        batch = backend.flush_dirty_carts()
+        written += batch
+        if batch < settings.CART_WRITE_BEHIND_BATCH:
+            return written
+
+
+@shared_task
+def regenerate_catalog_feeds():
+    """
+    Rewrite sitemap/product-feed chunks whose products changed since the last run.
+    """
+    from apps.products.feeds import CatalogFeedGenerator
+
     try:
-        from apps.cart.models import Cart, CartItem
-    except ImportError:
-        logger.warning("Cart app not found, skipping cleanup.")
-        return
+        result = CatalogFeedGenerator().generate()
+        return result['written']
+    except Exception as e:
+        logger.error(f"Feed generation failed: {e}")
+        return 0
 
-    cutoff = timezone.now() - timezone.timedelta(minutes=30)
-    
-    # Find active carts that are old
-    old_carts = Cart.objects.filter(updated_at__lt=cutoff, is_active=True)
-    count = 0
-    
-    for cart in old_carts:
-        items = CartItem.objects.filter(cart=cart)
-        for item in items:
-            # Logic to return stock if you reserved it strictly on 'add to cart'
-            # (Note: In your SRS, you reserve on Checkout, but if you reserve on Add To Cart, this is needed)
-            if hasattr(item.product, 'release_reserved_stock'):
-                item.product.release_reserved_stock(item.quantity)
-        
-        cart.is_active = False
-        cart.save()
-        count += 1
-        
-    logger.info(f"CLEANUP: Deactivated {count} abandoned carts.")
\ No newline at end of file
+
+@shared_task
+def relay_outbox_events():
+    """
+    Fallback relay for deployments without the relay_outbox process.
+    Safe alongside it: batches are claimed with SKIP LOCKED.
+    """
+    from . import outbox
+
+    published = outbox.drain()
+    lag = outbox.lag()
+    if lag['oldest_pending_seconds'] > settings.OUTBOX_LAG_WARNING_SECONDS or lag['dead']:
+        logger.warning(f"OUTBOX LAG: {lag}")
+    return {'published': published, **lag}
+
+
+@shared_task
+def purge_outbox_events():
+    """Drop published outbox rows past the retention window."""
+    from . import outbox
+
+    deleted = outbox.purge()
+    logger.info(f"OUTBOX: purged {deleted} published events.")
+    return deleted
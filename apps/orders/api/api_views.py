@@ -3,11 +3,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 
-from .models import Order
+from apps.orders.models import Order
+from apps.orders.services import OrderService
+from django_ecommerce.fieldsets import SparseFieldsetViewMixin
 from .serializers import OrderSerializer
-from .services import OrderService
 
-class OrderListAPIView(generics.ListAPIView):
+class OrderListAPIView(SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/orders/
     List all orders belonging to the authenticated user.
@@ -19,7 +20,7 @@ class OrderListAPIView(generics.ListAPIView):
         # Filter strictly by the logged-in user
         return Order.objects.filter(user=self.request.user)
 
-class OrderDetailAPIView(generics.RetrieveAPIView):
+class OrderDetailAPIView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """
     GET /api/orders/<id>/
     Get details of a specific order.
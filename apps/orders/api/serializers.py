@@ -1,7 +1,8 @@
 from rest_framework import serializers
-from .models import Order, OrderItem, OrderStatusHistory
+from apps.orders.models import Order, OrderItem, OrderStatusHistory
+from django_ecommerce.fieldsets import SparseFieldsetMixin
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # We include the current product name, but also the name at time of purchase
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_image = serializers.ImageField(source='product.image', read_only=True)
@@ -13,12 +14,12 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'quantity', 'unit_price', 'subtotal'
         ]
 
-class OrderStatusHistorySerializer(serializers.ModelSerializer):
+class OrderStatusHistorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = OrderStatusHistory
         fields = ['old_status', 'new_status', 'reason', 'created_at']
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     status_history = OrderStatusHistorySerializer(many=True, read_only=True)
     
@@ -3,7 +3,8 @@ from decimal import Decimal
 from django.db import transaction
 from django.utils import timezone
 from .models import Order, OrderItem
-from apps.products.models import Product
+from apps.products.ledger import record_movements
+from apps.products.models import InventoryMovement, Product
 from django.shortcuts import get_object_or_404
 
 
@@ -21,9 +22,9 @@ class OrderService:
         try:
             from apps.products.models import Product
 
-            # 1. Lock Products
+            # 1. Lock Products (in id order, like the cart and reconciliation paths)
             product_ids = sorted([item["product_id"] for item in items])
-            products = Product.objects.select_for_update().filter(id__in=product_ids)
+            products = Product.objects.select_for_update().filter(id__in=product_ids).order_by("id")
             product_dict = {p.id: p for p in products}
 
             # 2. Calculate Totals
@@ -66,6 +67,15 @@ class OrderService:
                 product.stock -= item["quantity"]
                 product.save(update_fields=["stock"])
 
+            # 5. Inventory ledger: one INSERT for all lines
+            record_movements([
+                InventoryMovement(
+                    product_id=item["product_id"], kind=InventoryMovement.SALE,
+                    stock_delta=-item["quantity"], reference=order.order_number,
+                )
+                for item in items
+            ])
+
             return {"status": "success", "order_number": order.order_number}
 
         except Exception as e:
@@ -91,11 +101,17 @@ class OrderService:
                     }
 
                 # 3. Restore Stock for each item
+                movements = []
                 for item in order.items.all():
                     # Lock product to prevent race conditions
                     product = Product.objects.select_for_update().get(id=item.product.id)
                     product.stock += item.quantity
                     product.save()
+                    movements.append(InventoryMovement(
+                        product_id=product.id, kind=InventoryMovement.CANCEL,
+                        stock_delta=item.quantity, reference=order.order_number,
+                    ))
+                record_movements(movements)
 
                 # 4. Update Order Status
                 order.status = Order.Status.CANCELLED
@@ -53,6 +53,7 @@ class CheckoutView(LoginRequiredMixin, View):
 
     def get(self, request):
         cart = CartService.get_cart(request.user)
+        CartService.touch(request.user)
         
         if cart.item_count == 0:
             messages.warning(request, "Your cart is empty.")
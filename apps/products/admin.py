@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Product, Category, ProductImage,ProductReview
+from .ledger import record_movements
+from .models import Product, Category, ProductImage,ProductReview, InventoryMovement
 
 class ProductImageInline(admin.TabularInline):
     """
@@ -43,6 +44,38 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        """Stock edits (form or list) go into the inventory ledger: restock up, adjust down."""
+        if not change or 'stock' not in form.changed_data:
+            return super().save_model(request, obj, form, change)
+        # Delta against the row as it is now, not as the form saw it: checkout may have sold since
+        previous = Product.objects.select_for_update().values_list('stock', flat=True).get(pk=obj.pk)
+        super().save_model(request, obj, form, change)
+        delta = obj.stock - previous
+        record_movements([InventoryMovement(
+            product_id=obj.pk, kind=InventoryMovement.RESTOCK if delta > 0 else InventoryMovement.ADJUST,
+            stock_delta=delta, reference=f'admin:{request.user.pk}',
+        )])
+
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(admin.ModelAdmin):
+    """The ledger is append-only: browse it, never edit it."""
+    list_display = ['created_at', 'product', 'kind', 'stock_delta', 'reserved_delta', 'reference']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['reference', 'product__name', 'product__sku']
+    list_select_related = ['product']
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 # Add this at the bottom
 @admin.register(ProductReview)
 class ProductReviewAdmin(admin.ModelAdmin):
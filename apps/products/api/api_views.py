@@ -1,13 +1,17 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 
-from .models import Product, Category
+from apps.products.models import Product, Category
+from apps.products.services import ProductCacheService
+from django_ecommerce.fieldsets import SparseFieldsetViewMixin
+from .conditional import ConditionalGetMixin
+from . import fast_path
 from .serializers import ProductSerializer, CategorySerializer
-from .services import ProductCacheService
 
-class ProductListAPIView(generics.ListAPIView):
+class ProductListAPIView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/products/products/
     Returns a paginated list of active products.
@@ -25,7 +29,22 @@ class ProductListAPIView(generics.ListAPIView):
             
         return qs
 
-class ProductDetailAPIView(generics.RetrieveAPIView):
+    def list(self, request, *args, **kwargs):
+        if not fast_path.use_fast_path(request):
+            return super().list(request, *args, **kwargs)
+
+        # Same filtering and pagination, but plain rows instead of instances
+        rows = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*fast_path.PRODUCT_FIELDS)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return fast_path.json_response(fast_path.build_products(rows, request))
+        data = fast_path.build_products(page, request)
+        return fast_path.json_response(self.get_paginated_response(data).data)
+
+    def get_versions(self, request, *args, **kwargs):
+        return [ProductCacheService.get_product_list_version()]
+
+class ProductDetailAPIView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """
     GET /api/products/products/<id>/
     Returns a single product detail.
@@ -34,7 +53,24 @@ class ProductDetailAPIView(generics.RetrieveAPIView):
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
-class CategoryListAPIView(generics.ListAPIView):
+    def retrieve(self, request, *args, **kwargs):
+        if not fast_path.use_fast_path(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        row = get_object_or_404(self.get_queryset().values(*fast_path.PRODUCT_FIELDS), pk=kwargs['pk'])
+        return fast_path.json_response(fast_path.build_products([row], request)[0])
+
+    def get_versions(self, request, *args, **kwargs):
+        # Versions start lazily for any id: none for missing or inactive products, so they always 404
+        if ProductCacheService.get_cached_product_detail(kwargs['pk']) is None:
+            return [None]
+        # The payload embeds the category
+        return [
+            ProductCacheService.get_product_version(kwargs['pk']),
+            ProductCacheService.get_category_list_version(),
+        ]
+
+class CategoryListAPIView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     GET /api/products/categories/
     """
@@ -42,6 +78,9 @@ class CategoryListAPIView(generics.ListAPIView):
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
+    def get_versions(self, request, *args, **kwargs):
+        return [ProductCacheService.get_category_list_version()]
+
 class TrendingProductsAPIView(APIView):
     """
     GET /api/products/trending/
@@ -54,4 +93,4 @@ class TrendingProductsAPIView(APIView):
         data = ProductCacheService.get_cached_trending_products()
         
         # 2. Return as JSON
-        return Response(data)
\ No newline at end of file
+        return Response(data)
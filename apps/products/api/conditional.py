@@ -0,0 +1,88 @@
+import hashlib
+from functools import wraps
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def version_to_datetime(version):
+    """Versions are bump timestamps in ns."""
+    return datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+
+
+def apply_cache_control(response, view_name):
+    """
+    Cache-Control per view from settings.API_CACHE_CONTROL (kwargs for
+    patch_cache_control). Errors keep neither it nor the validators
+    @condition adds, so a 404's ETag can't later earn a 304.
+    """
+    if response.status_code not in (200, 304):
+        del response['ETag']
+        del response['Last-Modified']
+        return response
+    directives = settings.API_CACHE_CONTROL.get(view_name)
+    if directives:
+        patch_cache_control(response, **directives)
+    return response
+
+
+def api_cache_control(view_name):
+    """Decorator form of apply_cache_control; also covers 304s from @condition."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            return apply_cache_control(view_func(request, *args, **kwargs), view_name)
+        return _wrapped
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified for read-only DRF views, computed from cache version
+    counters. A matching If-None-Match (or If-Modified-Since) gets a 304 before
+    the queryset or serializer is touched.
+
+    Subclasses implement get_versions() (None in the list: no validators);
+    Cache-Control comes from settings.API_CACHE_CONTROL keyed by the view
+    class name.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Checked when the URLconf loads, not on the first request
+        if not callable(getattr(cls, 'get_versions', None)):
+            raise ImproperlyConfigured(
+                f"{cls.__name__} uses ConditionalGetMixin and must define "
+                "get_versions(request, *args, **kwargs) returning the cache version counters."
+            )
+        # Read-only: skip the ATOMIC_REQUESTS transaction so a 304 costs no DB round trip
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    def _versions(self, request, *args, **kwargs):
+        # One view instance per request; ETag and Last-Modified share the lookup
+        if not hasattr(self, '_cached_versions'):
+            self._cached_versions = self.get_versions(request, *args, **kwargs)
+        return self._cached_versions
+
+    def _etag(self, request, *args, **kwargs):
+        versions = self._versions(request, *args, **kwargs)
+        if None in versions:
+            return None  # Cache unavailable or nothing to validate: serve normally, no validator
+        # Same versions can render differently per format/page/filter
+        key = f"{':'.join(map(str, versions))}|{request.accepted_renderer.format}|{request.get_full_path()}"
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def _last_modified(self, request, *args, **kwargs):
+        versions = self._versions(request, *args, **kwargs)
+        if None in versions:
+            return None
+        return version_to_datetime(max(versions))
+
+    def get(self, request, *args, **kwargs):
+        view = condition(etag_func=self._etag, last_modified_func=self._last_modified)(super().get)
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ['Accept'])
+        return apply_cache_control(response, type(self).__name__)
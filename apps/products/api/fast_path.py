@@ -0,0 +1,98 @@
+"""
+Serializer-free reads for the catalog API.
+
+Builds the exact ProductSerializer payload from values() rows plus one images
+query grouped in Python, skipping model instances and DRF field machinery.
+Keep PRODUCT_FIELDS and build_product() in step with ProductSerializer;
+tests/test_product_api_fast_path.py compares both byte for byte.
+"""
+from decimal import Decimal
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django_ecommerce.encoders import dumps
+from apps.products.models import ProductImage
+
+PRODUCT_FIELDS = (
+    'id', 'name', 'slug', 'description', 'price', 'sku', 'is_featured',
+    'stock', 'reserved_stock', 'created_at',
+    'category_id', 'category__name', 'category__slug', 'category__description',
+)
+
+_CENTS = Decimal('0.01')
+_image_storage = ProductImage._meta.get_field('image').storage
+
+
+def use_fast_path(request):
+    """
+    Only full plain-JSON payloads; the browsable API, indented output and
+    sparse fieldsets (?fields=/?expand=) keep the serializers.
+    """
+    return (
+        settings.API_FAST_PATH
+        and request.accepted_renderer.format == 'json'
+        and 'indent' not in (request.accepted_media_type or '')
+        and 'fields' not in request.query_params
+        and 'expand' not in request.query_params
+    )
+
+
+def format_datetime(value):
+    # Same as DRF DateTimeField: current timezone, ISO 8601, 'Z' for UTC
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def images_by_product(product_ids, request):
+    """{product_id: [image dicts]} in ProductImage's default ordering."""
+    images = {}
+    rows = (
+        ProductImage.objects.filter(product_id__in=product_ids)
+        .values_list('product_id', 'image', 'alt_text', 'is_primary')
+    )
+    for product_id, name, alt_text, is_primary in rows:
+        url = _image_storage.url(name) if name else None
+        if url and request is not None:
+            url = request.build_absolute_uri(url)
+        images.setdefault(product_id, []).append({
+            'image': url,
+            'alt_text': alt_text,
+            'is_primary': is_primary,
+        })
+    return images
+
+
+def build_product(row, images):
+    available_stock = max(0, row['stock'] - row['reserved_stock'])
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'slug': row['slug'],
+        'description': row['description'],
+        'price': '{:f}'.format(row['price'].quantize(_CENTS)),
+        'category': {
+            'id': row['category_id'],
+            'name': row['category__name'],
+            'slug': row['category__slug'],
+            'description': row['category__description'],
+        },
+        'images': images.get(row['id'], []),
+        'sku': row['sku'],
+        'is_featured': row['is_featured'],
+        'stock': row['stock'],
+        'available_stock': available_stock,
+        'is_in_stock': available_stock > 0,
+        'created_at': format_datetime(row['created_at']),
+    }
+
+
+def build_products(rows, request):
+    rows = list(rows)
+    images = images_by_product([row['id'] for row in rows], request)
+    return [build_product(row, images) for row in rows]
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
@@ -1,22 +1,25 @@
 from rest_framework import serializers
-from .models import Product, Category, ProductImage
+from apps.products.models import Product, Category, ProductImage
+from django_ecommerce.fieldsets import SparseFieldsetMixin
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description']
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ProductImage
         fields = ['image', 'alt_text', 'is_primary']
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     # Add calculated fields
     available_stock = serializers.IntegerField(read_only=True)
     is_in_stock = serializers.BooleanField(read_only=True)
+    # Only sent when asked for: ?fields=id,name,price,thumbnail
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -24,5 +27,19 @@ class ProductSerializer(serializers.ModelSerializer):
             'id', 'name', 'slug', 'description', 'price', 
             'category', 'images', 'sku', 'is_featured',
             'stock', 'available_stock', 'is_in_stock',
-            'created_at'
-        ]
\ No newline at end of file
+            'created_at', 'thumbnail'
+        ]
+        optional_fields = ['thumbnail']
+        field_sources = {
+            'available_stock': ['stock', 'reserved_stock'],
+            'is_in_stock': ['stock', 'reserved_stock'],
+            'thumbnail': ['image', 'images__image'],
+        }
+
+    def get_thumbnail(self, obj):
+        """Main image, else the first gallery image (primary first)."""
+        image = obj.image or next((img.image for img in obj.images.all()), None)
+        if not image:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(image.url) if request else image.url
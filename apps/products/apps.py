@@ -6,7 +6,12 @@ class ProductsConfig(AppConfig):
     name = 'apps.products'
 
     def ready(self):
-        # Prevent training during migrations or management commands
-        if 'runserver' in sys.argv:
+        # Import signals to register them
+        import apps.products.signals
+
+        # Prevent training during migrations or management commands.
+        # When a shared recommender server is configured, it owns the model instead.
+        from django.conf import settings
+        if 'runserver' in sys.argv and not settings.RECOMMENDER_SERVER_ADDRESS:
             from .recommender import recommender_engine
             recommender_engine.train()
\ No newline at end of file
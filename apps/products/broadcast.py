@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import threading
+import time
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def stock_shard(product_id):
+    return int(product_id) % settings.STOCK_BROADCAST_SHARDS
+
+
+def stock_group_name(product_id):
+    """Channels group that carries stock batches for this product."""
+    return f'stock_shard_{stock_shard(product_id)}'
+
+
+# Subscriber counts, kept by the consumers. They expire STOCK_SUBSCRIBER_TTL after
+# the last refresh, so increments left behind by a crashed worker (no disconnect)
+# go away once nobody live refreshes the product. Refreshes also put back counts
+# lost to an eviction (at least 1 while someone is connected), and after a cache
+# flush the broadcaster sends everything until the consumers have refreshed.
+SUBSCRIBERS_SINCE_KEY = 'stock_subscribers_since'
+
+
+def _subscriber_key(product_id):
+    return f'stock_subscribers_{product_id}'
+
+
+def subscriber_refresh_interval():
+    return settings.STOCK_SUBSCRIBER_TTL / 3
+
+
+def add_subscribers(product_ids):
+    ttl = settings.STOCK_SUBSCRIBER_TTL
+    for product_id in product_ids:
+        key = _subscriber_key(product_id)
+        try:
+            cache.incr(key)
+        except ValueError:  # First subscriber
+            cache.add(key, 0, ttl)
+            cache.incr(key)
+        cache.touch(key, ttl)
+
+
+def remove_subscribers(product_ids):
+    for product_id in product_ids:
+        try:
+            cache.decr(_subscriber_key(product_id))
+        except ValueError:  # Expired or evicted: nothing to take back
+            pass
+
+
+def refresh_subscribers(product_ids):
+    """Called by connected consumers every subscriber_refresh_interval() for their products."""
+    ttl = settings.STOCK_SUBSCRIBER_TTL
+    keys = [_subscriber_key(product_id) for product_id in product_ids]
+    counts = cache.get_many(keys)
+    lost = {key: 1 for key in keys if counts.get(key, 0) <= 0}
+    if lost:
+        cache.set_many(lost, ttl)
+    for key in keys:
+        if key not in lost:
+            cache.touch(key, ttl)
+
+
+class StockBroadcaster:
+    """
+    Coalesces stock changes before they reach the channel layer.
+
+    publish() only records the latest value per product. The first change in
+    an empty buffer schedules a flush `window` seconds later, which:
+      - drops products nobody is watching (subscriber counts in the cache,
+        kept by the consumers),
+      - sends one stock_batch message per shard group instead of one
+        group_send per product per change.
+    A product that changes hundreds of times a second costs at most one
+    entry per window.
+    """
+    METRIC_KEYS = ('published', 'coalesced', 'skipped_no_subscribers', 'sent', 'channel_layer_calls')
+
+    def __init__(self, window):
+        self.window = window
+        self._pending = {}  # product_id -> update dict
+        self._timer = None
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.METRIC_KEYS, 0)
+        self._flushed = dict.fromkeys(self.METRIC_KEYS, 0)
+
+    def publish(self, product_id, new_stock):
+        update = {
+            'product_id': int(product_id),
+            'new_stock': new_stock,
+            'timestamp': timezone.now().isoformat(),
+        }
+        with self._lock:
+            self._counters['published'] += 1
+            if update['product_id'] in self._pending:
+                self._counters['coalesced'] += 1
+            self._pending[update['product_id']] = update
+            if self._timer is None:
+                # Non-daemon: a short-lived process (command, task) still flushes before exiting
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        if not pending:
+            return
+
+        try:
+            counts = cache.get_many([_subscriber_key(pid) for pid in pending] + [SUBSCRIBERS_SINCE_KEY])
+            since = counts.get(SUBSCRIBERS_SINCE_KEY)
+            if since is None:  # New or flushed cache
+                cache.add(SUBSCRIBERS_SINCE_KEY, time.time(), None)
+                since = time.time()
+            if time.time() - since < subscriber_refresh_interval():
+                counts = None  # Counts are still being rebuilt by the consumers' refreshes
+        except Exception as e:
+            logger.warning(f"StockBroadcaster: subscriber lookup failed, sending everything: {e}")
+            counts = None
+
+        batches = {}
+        for product_id, update in pending.items():
+            if counts is not None and counts.get(_subscriber_key(product_id), 0) <= 0:
+                continue
+            batches.setdefault(stock_group_name(product_id), []).append(update)
+        sent = sum(len(updates) for updates in batches.values())
+        skipped = len(pending) - sent
+
+        if batches:
+            try:
+                async_to_sync(self._send)(batches)
+            except Exception as e:
+                logger.error(f"StockBroadcaster: channel layer send failed: {e}")
+                batches, sent = {}, 0
+
+        with self._lock:
+            self._counters['skipped_no_subscribers'] += skipped
+            self._counters['sent'] += sent
+            self._counters['channel_layer_calls'] += len(batches)
+        self._flush_metrics()
+
+    async def _send(self, batches):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        await asyncio.gather(*(
+            channel_layer.group_send(group, {'type': 'stock_batch', 'updates': updates})
+            for group, updates in batches.items()
+        ))
+
+    # --- Metrics ---
+
+    @staticmethod
+    def _ratios(counters):
+        published = counters['published'] or 1
+        saved = max(0, counters['published'] - counters['channel_layer_calls'])
+        return {
+            **counters,
+            'messages_saved': saved,
+            'saved_ratio': round(saved / published, 4),
+        }
+
+    def metrics(self):
+        """This process only, since start."""
+        with self._lock:
+            return self._ratios(dict(self._counters))
+
+    def _cache_key(self, metric):
+        return f'stock_broadcast_{metric}'
+
+    def _flush_metrics(self):
+        # At most once per window, so a few INCRs are cheap here
+        with self._lock:
+            deltas = {k: self._counters[k] - self._flushed[k] for k in self.METRIC_KEYS}
+            self._flushed = dict(self._counters)
+        try:
+            for metric, delta in deltas.items():
+                if delta:
+                    key = self._cache_key(metric)
+                    cache.add(key, 0, None)
+                    cache.incr(key, delta)
+        except Exception as e:
+            logger.warning(f"StockBroadcaster: metrics flush failed: {e}")
+
+    def shared_metrics(self):
+        """All processes, as of their last flush."""
+        keys = {self._cache_key(m): m for m in self.METRIC_KEYS}
+        values = cache.get_many(list(keys))
+        return self._ratios({metric: values.get(key, 0) for key, metric in keys.items()})
+
+
+stock_broadcaster = StockBroadcaster(window=settings.STOCK_BROADCAST_WINDOW)
@@ -0,0 +1,30 @@
+from apps.notifications.cdc import CDCConsumer
+from .models import Product
+from .services import ProductCacheService
+
+# product_detail_<id> doesn't carry stock, so stock-only changes leave it alone
+STOCK_ONLY = {'stock', 'reserved_stock'}
+
+
+class ProductCacheWarmer(CDCConsumer):
+    """
+    Reference CDC consumer: rebuilds ProductCacheService detail entries for
+    changed products (and every product of a changed category), one query per
+    batch, so the next page view is a hit instead of a miss.
+    """
+    group = 'product-cache'
+    entities = ('product', 'category')
+
+    def handle_batch(self, records):
+        product_ids, category_ids = set(), set()
+        for entity, _, change in records:
+            fields = set(filter(None, change['fields'].split(',')))
+            if entity == 'product' and (not fields or not fields <= STOCK_ONLY):
+                product_ids.add(int(change['id']))
+            elif entity == 'category':
+                category_ids.add(int(change['id']))
+
+        if category_ids:
+            product_ids.update(Product.objects.filter(category_id__in=category_ids).values_list('id', flat=True))
+        if product_ids:
+            ProductCacheService.warm_product_details(product_ids)
@@ -1,25 +1,53 @@
+import asyncio
 import json
 import logging
+from django.conf import settings
 from channels.generic.websocket import AsyncWebsocketConsumer
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
-from channels.layers import get_channel_layer
+from .broadcast import (
+    add_subscribers, refresh_subscribers, remove_subscribers, stock_broadcaster, stock_group_name,
+    subscriber_refresh_interval,
+)
 from .models import Product
 
 logger = logging.getLogger(__name__)
 
+
+async def keep_subscribed(get_ids):
+    """Refresh the socket's subscriber counts until cancelled (on disconnect)."""
+    while True:
+        await asyncio.sleep(subscriber_refresh_interval())
+        ids = get_ids()
+        if ids:
+            await sync_to_async(refresh_subscribers)(ids)
+
+
 class ProductConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.product_id = self.scope['url_route']['kwargs']['product_id']
         self.group_name = f'product_{self.product_id}'
+        if not self.product_id.isdigit():
+            await self.close()
+            return
+        self.stock_group = stock_group_name(self.product_id)
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.channel_layer.group_add(self.stock_group, self.channel_name)
+        await sync_to_async(add_subscribers)([self.product_id])
+        self.refresh_task = asyncio.ensure_future(keep_subscribed(lambda: [self.product_id]))
         await self.accept()
         
         # Send immediate stock status on connect
         await self.send_initial_stock()
 
     async def disconnect(self, close_code):
+        if not hasattr(self, 'stock_group'):
+            return
+        self.refresh_task.cancel()
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        await self.channel_layer.group_discard(self.stock_group, self.channel_name)
+        await sync_to_async(remove_subscribers)([self.product_id])
 
     async def send_initial_stock(self):
         stock_data = await self.get_stock_data()
@@ -37,6 +65,12 @@ class ProductConsumer(AsyncWebsocketConsumer):
             'timestamp': event.get('timestamp')
         }))
 
+    async def stock_batch(self, event):
+        """Coalesced updates from StockBroadcaster for this product's shard."""
+        for update in event['updates']:
+            if str(update['product_id']) == self.product_id:
+                await self.stock_update(update)
+
     @database_sync_to_async
     def get_stock_data(self):
         try:
@@ -49,14 +83,129 @@ class ProductConsumer(AsyncWebsocketConsumer):
         except Product.DoesNotExist:
             return {'stock': 0, 'available': 0}
 
+class ProductStreamConsumer(AsyncWebsocketConsumer):
+    """
+    One socket for many products (ws/stock/).
+
+    Client -> server:
+        {"action": "subscribe", "product_ids": [1, 2, 3]}
+        {"action": "unsubscribe", "product_ids": [2]}
+    Server -> client:
+        {"type": "initial_stock", "products": [{product_id, stock, available_stock, is_in_stock}, ...]}
+        {"type": "stock_updates", "updates": [{product_id, new_stock, timestamp}, ...]}
+        {"type": "error", "message": "..."}
+
+    The socket joins the stock_shard_<n> groups its products fall in (at most
+    STOCK_BROADCAST_SHARDS) and keeps only its own products from each
+    stock_batch. Updates arriving within one tick (STOCK_STREAM_TICK) are sent
+    as a single frame, latest value per product.
+    """
+
+    async def connect(self):
+        self.product_ids = set()
+        self.pending = {}
+        self.flush_task = None
+        self.refresh_task = asyncio.ensure_future(keep_subscribed(lambda: list(self.product_ids)))
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        self.refresh_task.cancel()
+        if self.flush_task:
+            self.flush_task.cancel()
+        ids, self.product_ids = self.product_ids, set()
+        await self._discard(ids)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            message = json.loads(text_data or '')
+            action = message['action']
+            ids = {int(pid) for pid in message['product_ids']}
+        except (ValueError, KeyError, TypeError):
+            return await self._error('Expected {"action": "subscribe"|"unsubscribe", "product_ids": [...]}')
+
+        if action == 'subscribe':
+            await self.subscribe(ids)
+        elif action == 'unsubscribe':
+            await self.unsubscribe(ids)
+        else:
+            await self._error(f'Unknown action: {action}')
+
+    async def subscribe(self, ids):
+        new_ids = ids - self.product_ids
+        room = settings.STOCK_STREAM_MAX_SUBSCRIPTIONS - len(self.product_ids)
+        if len(new_ids) > room:
+            return await self._error(f'At most {settings.STOCK_STREAM_MAX_SUBSCRIPTIONS} products per connection')
+        if not new_ids:
+            return
+
+        # Join first so no update slips between the snapshot and membership
+        new_groups = self._groups(new_ids) - self._groups(self.product_ids)
+        await asyncio.gather(*(
+            self.channel_layer.group_add(group, self.channel_name) for group in new_groups
+        ))
+        self.product_ids |= new_ids
+        await sync_to_async(add_subscribers)(new_ids)
+
+        products = await self.get_stock_batch(new_ids)
+        await self.send(text_data=json.dumps({'type': 'initial_stock', 'products': products}))
+
+    async def unsubscribe(self, ids):
+        removed = ids & self.product_ids
+        self.product_ids -= removed
+        for pid in removed:
+            self.pending.pop(pid, None)
+        await self._discard(removed)
+
+    @staticmethod
+    def _groups(ids):
+        return {stock_group_name(pid) for pid in ids}
+
+    async def _discard(self, ids):
+        """Leave the shards no remaining product needs; drop the subscriber counts."""
+        if not ids:
+            return
+        groups = self._groups(ids) - self._groups(self.product_ids)
+        await asyncio.gather(*(
+            self.channel_layer.group_discard(group, self.channel_name) for group in groups
+        ))
+        await sync_to_async(remove_subscribers)(ids)
+
+    async def _error(self, message):
+        await self.send(text_data=json.dumps({'type': 'error', 'message': message}))
+
+    async def stock_batch(self, event):
+        """Buffer this socket's products from a shard batch; one frame per tick."""
+        for update in event['updates']:
+            if update['product_id'] in self.product_ids:
+                self.pending[update['product_id']] = update
+        if self.pending and self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self._flush_after_tick())
+
+    async def _flush_after_tick(self):
+        try:
+            await asyncio.sleep(settings.STOCK_STREAM_TICK)
+        finally:
+            self.flush_task = None
+        updates, self.pending = list(self.pending.values()), {}
+        if updates:
+            await self.send(text_data=json.dumps({'type': 'stock_updates', 'updates': updates}))
+
+    @database_sync_to_async
+    def get_stock_batch(self, ids):
+        """Initial stock for the whole batch in one query."""
+        rows = Product.objects.filter(id__in=ids).values_list('id', 'stock', 'reserved_stock')
+        products = []
+        for product_id, stock, reserved in rows:
+            available = max(0, stock - reserved)
+            products.append({
+                'product_id': product_id,
+                'stock': stock,
+                'available_stock': available,
+                'is_in_stock': available > 0,
+            })
+        return products
+
 # Utility function for external services (e.g. OrderService)
 async def broadcast_stock_update(product_id, new_stock):
-    channel_layer = get_channel_layer()
-    await channel_layer.group_send(
-        f'product_{product_id}',
-        {
-            'type': 'stock_update',
-            'product_id': product_id,
-            'new_stock': new_stock
-        }
-    )
\ No newline at end of file
+    """Queue a stock change; StockBroadcaster coalesces and sends it."""
+    stock_broadcaster.publish(product_id, new_stock)
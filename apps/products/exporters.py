@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Q
+from .models import InventoryMovement, Product
+
+# values() lookups -> column names in the feed
+EXPORT_FIELDS = {
+    'id': 'id',
+    'sku': 'sku',
+    'name': 'name',
+    'slug': 'slug',
+    'description': 'description',
+    'price': 'price',
+    'stock': 'stock',
+    'reserved_stock': 'reserved_stock',
+    'is_active': 'is_active',
+    'is_featured': 'is_featured',
+    'category__name': 'category',
+    'category__slug': 'category_slug',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+FLUSH_BYTES = 64 * 1024  # Emit ~64KB pieces instead of one tiny chunk per row
+
+
+def iter_catalog_rows(updated_since=None, chunk_size=2000):
+    """
+    Plain dicts straight from a server-side cursor: no model instances,
+    no OFFSET pagination, memory independent of catalog size.
+    Full exports carry active products; incremental ones (updated_since)
+    also carry deactivated products so partners can drop them. Stock writes
+    leave updated_at alone, so incremental exports also pick up products
+    with inventory ledger movements since then.
+    """
+    qs = Product.objects.all()
+    if updated_since:
+        stock_moved = InventoryMovement.objects.filter(product=OuterRef('pk'), created_at__gte=updated_since)
+        qs = qs.filter(Q(updated_at__gte=updated_since) | Exists(stock_moved))
+    else:
+        qs = qs.filter(is_active=True)
+
+    rows = qs.order_by('id').values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield {column: row[lookup] for lookup, column in EXPORT_FIELDS.items()}
+
+
+def _buffered(pieces):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= FLUSH_BYTES:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def encode_csv(rows):
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def _encode(values):
+        writer.writerow(values)
+        data = line.getvalue().encode('utf-8')
+        line.seek(0)
+        line.truncate()
+        return data
+
+    # Same timestamp format as the JSONL feed
+    encoder = DjangoJSONEncoder()
+
+    def _pieces():
+        yield _encode(EXPORT_FIELDS.values())
+        for row in rows:
+            yield _encode([
+                encoder.default(value) if hasattr(value, 'isoformat') else value
+                for value in row.values()
+            ])
+
+    return _buffered(_pieces())
+
+
+def encode_jsonl(rows):
+    return _buffered(
+        json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8') + b'\n'
+        for row in rows
+    )
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)  # | 16 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_catalog(fmt='csv', updated_since=None, compress=False, chunk_size=2000):
+    """Iterator of bytes for the whole catalog in the requested format."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    rows = iter_catalog_rows(updated_since=updated_since, chunk_size=chunk_size)
+    chunks = encode_csv(rows) if fmt == 'csv' else encode_jsonl(rows)
+    return gzip_stream(chunks) if compress else chunks
@@ -0,0 +1,236 @@
+import gzip
+import json
+import logging
+import os
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Q
+from django.urls import reverse
+from django.utils import timezone
+from .models import Product, ProductImage
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+SITEMAP_INDEX_NAME = 'sitemap.xml'
+
+
+class CatalogFeedGenerator:
+    """
+    Writes the sitemap index, chunked product sitemaps and chunked Google
+    Merchant product feeds into FEEDS_ROOT as gzipped static files.
+
+    Chunks are fixed id ranges (ids 1..N, N+1..2N, ...) so a new product never
+    shifts the others into a different file. A manifest keeps each chunk's
+    (product count, newest updated_at, in-stock count, image count, newest
+    image id) watermark; only chunks whose watermark moved are rewritten.
+    Stock writes don't touch updated_at (update_fields saves, queryset
+    updates), hence the in-stock count for g:availability; gallery images
+    don't either, hence the image signature for the g:image_link fallback.
+    Rows are read with keyset pagination on id.
+    """
+    PAGE_SIZE = 2000
+
+    def __init__(self, root=None, chunk_size=None, site_url=None):
+        self.root = str(root or settings.FEEDS_ROOT)
+        self.chunk_size = chunk_size or settings.SITEMAP_CHUNK_SIZE
+        self.site_url = (site_url or settings.SITE_URL).rstrip('/')
+        self.feeds_url = self.site_url + settings.FEEDS_URL
+
+    def generate(self, force=False):
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self._load_manifest()
+        if manifest.get('chunk_size') != self.chunk_size:
+            force = True  # Boundaries moved, every file is invalid
+            manifest = {'chunk_size': self.chunk_size, 'chunks': {}}
+
+        watermarks = self._current_watermarks()
+        written, removed = 0, 0
+
+        for chunk, mark in watermarks.items():
+            previous = manifest['chunks'].get(chunk)
+            if not force and previous and all(previous.get(key) == value for key, value in mark.items()):
+                continue
+            self._write_chunk(int(chunk))
+            manifest['chunks'][chunk] = {**mark, 'generated_at': timezone.now().isoformat()}
+            written += 1
+
+        # Chunks whose products were all deleted or deactivated
+        for chunk in set(manifest['chunks']) - set(watermarks):
+            for name in (self._sitemap_name(int(chunk)), self._feed_name(int(chunk))):
+                path = os.path.join(self.root, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            del manifest['chunks'][chunk]
+            removed += 1
+
+        if written or removed or force or not os.path.exists(os.path.join(self.root, SITEMAP_INDEX_NAME)):
+            self._write_sitemap_index(manifest)
+        self._save_manifest(manifest)
+
+        logger.info(f"FEEDS: {written} chunks rewritten, {removed} removed, {len(watermarks)} total.")
+        return {'written': written, 'removed': removed, 'chunks': len(watermarks)}
+
+    # --- Watermarks ---
+
+    def _chunk_expr(self, id_field):
+        return ExpressionWrapper((F(id_field) - 1) / self.chunk_size, output_field=IntegerField())
+
+    def _current_watermarks(self):
+        """
+        One GROUP BY over the active catalog and one over its gallery images:
+        {chunk: {'count', 'latest', 'in_stock', 'images', 'latest_image'}}.
+        """
+        rows = (
+            Product.objects.filter(is_active=True)
+            .annotate(chunk=self._chunk_expr('id'))
+            .values('chunk')
+            .annotate(
+                count=Count('id'), latest=Max('updated_at'),
+                in_stock=Count('id', filter=Q(stock__gt=F('reserved_stock'))),
+            )
+            .order_by('chunk')
+        )
+        images = {
+            row['chunk']: row
+            for row in ProductImage.objects.filter(product__is_active=True)
+            .annotate(chunk=self._chunk_expr('product_id'))
+            .values('chunk')
+            .annotate(images=Count('id'), latest_image=Max('id'))
+            .order_by('chunk')
+        }
+        return {
+            str(row['chunk']): {
+                'count': row['count'], 'latest': row['latest'].isoformat(), 'in_stock': row['in_stock'],
+                # Count catches deletions, newest id catches additions
+                'images': images.get(row['chunk'], {}).get('images', 0),
+                'latest_image': images.get(row['chunk'], {}).get('latest_image', 0),
+            }
+            for row in rows
+        }
+
+    # --- Rows ---
+
+    def _iter_chunk(self, chunk):
+        """Keyset pagination inside the chunk's id range; never OFFSET."""
+        last_id = chunk * self.chunk_size
+        upper = (chunk + 1) * self.chunk_size
+        while True:
+            page = list(
+                Product.objects.filter(is_active=True, id__gt=last_id, id__lte=upper)
+                .order_by('id')
+                .values('id', 'name', 'slug', 'sku', 'description', 'price', 'stock',
+                        'reserved_stock', 'image', 'updated_at', 'category__name')[:self.PAGE_SIZE]
+            )
+            if not page:
+                return
+            # Products without a main image fall back to their primary gallery image
+            missing = [p['id'] for p in page if not p['image']]
+            gallery = {}
+            if missing:
+                for image in (ProductImage.objects.filter(product_id__in=missing)
+                              .order_by('product_id', '-is_primary', 'created_at')
+                              .values('product_id', 'image')):
+                    gallery.setdefault(image['product_id'], image['image'])
+            for p in page:
+                p['image'] = p['image'] or gallery.get(p['id'])
+                yield p
+            last_id = page[-1]['id']
+
+    def _product_url(self, slug):
+        return self.site_url + reverse('products:detail', args=[slug])
+
+    def _media_url(self, name):
+        return f"{self.site_url}{settings.MEDIA_URL}{name}" if name else ''
+
+    # --- Writers ---
+
+    @staticmethod
+    def _sitemap_name(chunk):
+        return f'sitemap-products-{chunk}.xml.gz'
+
+    @staticmethod
+    def _feed_name(chunk):
+        return f'feed-products-{chunk}.xml.gz'
+
+    def _atomic_gzip(self, name):
+        """Write to a temp file and rename, so crawlers never fetch half a file."""
+        return _AtomicGzipFile(os.path.join(self.root, name))
+
+    def _write_chunk(self, chunk):
+        currency = settings.FEED_CURRENCY
+        with self._atomic_gzip(self._sitemap_name(chunk)) as sitemap, \
+                self._atomic_gzip(self._feed_name(chunk)) as feed:
+            sitemap.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                          '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            feed.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                       '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+                       f'<title>Product feed {chunk}</title>\n<link>{escape(self.site_url)}</link>\n')
+
+            for p in self._iter_chunk(chunk):
+                url = escape(self._product_url(p['slug']))
+                sitemap.write(f"<url><loc>{url}</loc><lastmod>{p['updated_at'].date().isoformat()}</lastmod></url>\n")
+
+                available = p['stock'] - p['reserved_stock'] > 0
+                feed.write(
+                    "<item>"
+                    f"<g:id>{escape(p['sku'])}</g:id>"
+                    f"<title>{escape(p['name'])}</title>"
+                    f"<description>{escape(p['description'][:5000])}</description>"
+                    f"<link>{url}</link>"
+                    f"<g:image_link>{escape(self._media_url(p['image']))}</g:image_link>"
+                    f"<g:price>{p['price']} {currency}</g:price>"
+                    f"<g:availability>{'in stock' if available else 'out of stock'}</g:availability>"
+                    f"<g:product_type>{escape(p['category__name'] or '')}</g:product_type>"
+                    "<g:condition>new</g:condition>"
+                    "</item>\n"
+                )
+
+            sitemap.write('</urlset>\n')
+            feed.write('</channel>\n</rss>\n')
+
+    def _write_sitemap_index(self, manifest):
+        path = os.path.join(self.root, SITEMAP_INDEX_NAME)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for chunk in sorted(manifest['chunks'], key=int):
+                lastmod = manifest['chunks'][chunk]['latest'][:10]
+                loc = escape(self.feeds_url + self._sitemap_name(int(chunk)))
+                f.write(f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>\n")
+            f.write('</sitemapindex>\n')
+        os.replace(tmp, path)
+
+    # --- Manifest ---
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'chunk_size': self.chunk_size, 'chunks': {}}
+
+    def _save_manifest(self, manifest):
+        path = os.path.join(self.root, MANIFEST_NAME)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(manifest, f)
+        os.replace(f"{path}.tmp", path)
+
+
+class _AtomicGzipFile:
+    def __init__(self, path):
+        self.path = path
+        self.tmp = f"{path}.tmp"
+
+    def __enter__(self):
+        self.file = gzip.open(self.tmp, 'wt', encoding='utf-8', compresslevel=6)
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.tmp, self.path)
+        else:
+            os.remove(self.tmp)
+        return False
@@ -0,0 +1,247 @@
+"""
+Inventory ledger.
+
+Every change to Product.stock / reserved_stock is also appended as an
+InventoryMovement (reserve, release, sale, restock, cancel, adjust) by the
+code that makes it: same transaction, one bulk INSERT per operation, under
+the product row locks the change already holds. Movements are never
+updated or deleted (on PostgreSQL a trigger refuses it). Bulk loaders that
+skip model signals (import_products, generate_dataset) record the opening
+restock of the products they create themselves.
+
+Balances: compact_ledger() (Celery beat, every 5 minutes) folds settled
+movements into InventorySnapshot, one row per product, so a product's
+balance is its snapshot plus the handful of movements since and reads don't
+grow with history. balances_as_of() rebuilds the balances at any moment of
+the retained history, walking forward or backward from the snapshots.
+
+Archiving: on PostgreSQL the table is range-partitioned by month.
+ensure_partitions() keeps the coming months' partitions ready and
+archive_partitions() detaches the months older than
+INVENTORY_LEDGER_RETENTION_DAYS, a catalog-only change after which the
+detached table can be dumped to cold storage and dropped. SQLite keeps a
+plain table and never archives.
+
+Movements are stamped when recorded, before their transaction commits;
+compaction leaves the last INVENTORY_LEDGER_SETTLE_SECONDS alone so it
+doesn't fold past rows that aren't visible yet. A transaction open longer
+than that can be missed by the snapshot, and reconciliation records the
+difference as an adjust movement.
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import InventoryMovement, InventorySnapshot, Product
+
+logger = logging.getLogger(__name__)
+
+TABLE = InventoryMovement._meta.db_table
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+PARTITION_MONTHS_AHEAD = 2
+COMPACTION_LOCK = 0x1ED6E2  # pg_advisory_xact_lock key: one compaction at a time
+
+
+def record_movements(movements):
+    """Append movements (unsaved InventoryMovement instances) in one INSERT; no-op ones are skipped."""
+    movements = [movement for movement in movements if movement.stock_delta or movement.reserved_delta]
+    if movements:
+        InventoryMovement.objects.bulk_create(movements)
+
+
+# --- Balances ---
+
+def _unfolded(field):
+    """Sum of `field` over the product's movements since its snapshot (annotation on Product)."""
+    movements = (
+        InventoryMovement.objects.filter(
+            product=OuterRef('pk'),
+            created_at__gt=Coalesce(OuterRef('inventory_snapshot__through'), Value(EPOCH)),
+        )
+        .order_by().values('product').annotate(total=Sum(field)).values('total')
+    )
+    return Coalesce(Subquery(movements), 0)
+
+
+def ledger_balance():
+    """Annotations on Product: stock and reserved_stock as the ledger has them now."""
+    return {
+        'ledger_stock': Coalesce(F('inventory_snapshot__stock'), 0) + _unfolded('stock_delta'),
+        'ledger_reserved_stock': Coalesce(F('inventory_snapshot__reserved_stock'), 0) + _unfolded('reserved_delta'),
+    }
+
+
+def balances(product_ids=None):
+    """Current ledger balances: {product_id: (stock, reserved_stock)}."""
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    return {
+        product_id: (stock, reserved)
+        for product_id, stock, reserved in products.annotate(**ledger_balance()).values_list(
+            'id', 'ledger_stock', 'ledger_reserved_stock'
+        )
+    }
+
+
+def history_starts():
+    """The oldest retained movement: balances can't be rebuilt before it."""
+    return InventoryMovement.objects.aggregate(first=Min('created_at'))['first']
+
+
+def balances_as_of(at, product_ids=None):
+    """
+    Ledger balances at the moment `at`: {product_id: (stock, reserved_stock)}.
+    From each product's snapshot, movements after it and up to `at` are added
+    and movements between `at` and it are taken back off, so only the
+    movements between the two are read. Raises ValueError for moments
+    before the retained history.
+    """
+    starts = history_starts()
+    if starts is None or at < starts:
+        raise ValueError(f"The inventory ledger starts at {starts}; nothing to rebuild before it.")
+
+    snapshots = InventorySnapshot.objects.all()
+    movements = InventoryMovement.objects.all()
+    if product_ids is not None:
+        snapshots = snapshots.filter(product_id__in=product_ids)
+        movements = movements.filter(product_id__in=product_ids)
+
+    result = {
+        product_id: (stock, reserved)
+        for product_id, stock, reserved in snapshots.values_list('product_id', 'stock', 'reserved_stock')
+    }
+    through = F('product__inventory_snapshot__through')
+    forward = Q(created_at__lte=at) & (Q(product__inventory_snapshot__isnull=True) | Q(created_at__gt=through))
+    backward = Q(created_at__gt=at, created_at__lte=through)
+    sign = Case(When(forward, then=Value(1)), default=Value(-1))
+    changes = (
+        movements.filter(forward | backward).order_by().values('product')
+        .annotate(stock=Sum(F('stock_delta') * sign), reserved=Sum(F('reserved_delta') * sign))
+        .values_list('product', 'stock', 'reserved')
+    )
+    for product_id, stock, reserved in changes:
+        base_stock, base_reserved = result.get(product_id, (0, 0))
+        result[product_id] = (base_stock + stock, base_reserved + reserved)
+    return result
+
+
+# --- Compaction ---
+
+@transaction.atomic
+def compact_ledger():
+    """Fold settled movements into the snapshots. Returns the number of snapshots written."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [COMPACTION_LOCK])
+
+    cutoff = timezone.now() - timedelta(seconds=settings.INVENTORY_LEDGER_SETTLE_SECONDS)
+    # Every run folds everything up to its cutoff, so the newest snapshot marks where this one starts
+    since = InventorySnapshot.objects.aggregate(through=Max('through'))['through']
+    pending = InventoryMovement.objects.filter(created_at__lte=cutoff)
+    if since is not None:
+        pending = pending.filter(created_at__gt=since)
+    folded = {
+        product_id: (stock, reserved)
+        for product_id, stock, reserved in pending.order_by().values('product').annotate(
+            stock=Sum('stock_delta'), reserved=Sum('reserved_delta')
+        ).values_list('product', 'stock', 'reserved')
+    }
+    if not folded:
+        return 0
+
+    current = InventorySnapshot.objects.in_bulk(list(folded))
+    existing = set(Product.objects.filter(id__in=folded).values_list('id', flat=True))  # Not deleted since
+    snapshots = []
+    for product_id in existing:
+        stock, reserved = folded[product_id]
+        snapshot = current.get(product_id)
+        if snapshot is not None:
+            stock, reserved = snapshot.stock + stock, snapshot.reserved_stock + reserved
+        snapshots.append(InventorySnapshot(product_id=product_id, stock=stock, reserved_stock=reserved, through=cutoff))
+    InventorySnapshot.objects.bulk_create(
+        snapshots, batch_size=1000, update_conflicts=True, unique_fields=['product'],
+        update_fields=['stock', 'reserved_stock', 'through', 'updated_at'],
+    )
+    logger.info(f"LEDGER: Compacted movements of {len(snapshots)} products up to {cutoff.isoformat()}")
+    return len(snapshots)
+
+
+# --- Partitions (PostgreSQL) ---
+
+def _month(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def _partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def partitions():
+    """Attached monthly partitions, oldest first: [(name, first day of the month)]."""
+    if connection.vendor != 'postgresql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f'{TABLE}_p'
+    return [
+        (name, datetime(int(name[-6:-2]), int(name[-2:]), 1, tzinfo=dt_timezone.utc))
+        for name in names
+        if name.startswith(prefix)
+    ]
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """Create the partitions for this month and the next months_ahead. Returns the names created."""
+    if connection.vendor != 'postgresql':
+        return []
+    attached = {name for name, _ in partitions()}
+    created = []
+    with connection.cursor() as cursor:
+        for count in range(months_ahead + 1):
+            start = _add_months(_month(timezone.now()), count)
+            name = _partition_name(start)
+            if name in attached:
+                continue
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+                [start, _add_months(start, 1)],
+            )
+            created.append(name)
+    return created
+
+
+def archive_partitions(dry_run=False):
+    """
+    Detach the monthly partitions that ended INVENTORY_LEDGER_RETENTION_DAYS
+    ago or earlier. Their movements are already in the snapshots; the
+    detached tables are left in place for pg_dump and DROP. Never goes past
+    what compaction has folded. Returns their names.
+    """
+    horizon = timezone.now() - timedelta(days=settings.INVENTORY_LEDGER_RETENTION_DAYS)
+    compacted = InventorySnapshot.objects.aggregate(through=Max('through'))['through']
+    if compacted is None:
+        return []
+    horizon = min(horizon, compacted)
+    expired = [name for name, start in partitions() if _add_months(start, 1) <= horizon]
+    if dry_run or not expired:
+        return expired
+    with connection.cursor() as cursor:
+        for name in expired:
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+    logger.info(f"LEDGER: Detached {len(expired)} partitions for archiving: {', '.join(expired)}")
+    return expired
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.products.ledger import archive_partitions
+
+
+class Command(BaseCommand):
+    help = 'Detaches inventory ledger partitions older than INVENTORY_LEDGER_RETENTION_DAYS (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List the partitions without detaching them')
+
+    def handle(self, *args, **options):
+        names = archive_partitions(dry_run=options['dry_run'])
+        for name in names:
+            self.stdout.write(f"  {name}")
+        verb = 'Would detach' if options['dry_run'] else 'Detached'
+        self.stdout.write(self.style.SUCCESS(
+            f"🗄️ {verb} {len(names)} partitions; pg_dump then DROP them to finish archiving"
+        ))
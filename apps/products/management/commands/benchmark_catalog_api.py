@@ -0,0 +1,138 @@
+import json
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from django_ecommerce.encoders import dumps
+from apps.products.api import fast_path
+from apps.products.api.serializers import ProductSerializer
+from apps.products.models import Product
+from .benchmark_recommender import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks catalog API serialization (ProductSerializer + JSONRenderer vs the values() fast path) '
+        'and full vs sparse-fieldset payloads on the products, cart and orders APIs'
+    )
+
+    # endpoint -> compact query string a mobile client would send
+    FIELDSET_ENDPOINTS = {
+        '/api/v1/products/products/': 'fields=id,name,price,thumbnail',
+        '/api/v1/cart/': 'fields=id,total_price,item_count,items.quantity,items.product.id,items.product.name,'
+                         'items.product.price,items.product.thumbnail',
+        '/api/v1/orders/': 'fields=order_number,status,total,created_at&expand=',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20, help='Products per simulated list page')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--user-email', help='User for the cart/orders endpoints (default: one with orders)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        request = RequestFactory().get('/api/v1/products/products/', HTTP_HOST='localhost')
+        queryset = Product.objects.filter(is_active=True).select_related('category').order_by('-created_at')
+        if not queryset.exists():
+            raise CommandError("No active products; run seed_data or generate_dataset first.")
+
+        # End to end: query + build + encode
+        def serializer_page():
+            products = queryset.prefetch_related('images')[:page_size]
+            return serialize(products)
+
+        def fast_page():
+            return dumps(fast_path.build_products(queryset.values(*fast_path.PRODUCT_FIELDS)[:page_size], request))
+
+        def serialize(products):
+            data = ProductSerializer(products, many=True, context={'request': request}).data
+            return JSONRenderer().render(data)
+
+        if serializer_page() != fast_page():
+            raise CommandError("Fast path output differs from ProductSerializer; fix it before benchmarking.")
+
+        # Serialization only: rows are fetched once up front
+        products = list(queryset.prefetch_related('images')[:page_size])
+        rows = list(queryset.values(*fast_path.PRODUCT_FIELDS)[:page_size])
+        images = fast_path.images_by_product([row['id'] for row in rows], request)
+
+        def fast_encode():
+            return dumps([fast_path.build_product(row, images) for row in rows])
+
+        report = {'page_size': page_size, 'iterations': options['iterations']}
+        for section, cases in (
+            ('end_to_end', (('serializer', serializer_page), ('fast_path', fast_page))),
+            ('serialization_only', (('serializer', lambda: serialize(products)), ('fast_path', fast_encode))),
+        ):
+            results = {}
+            for name, render in cases:
+                self.stderr.write(f"Benchmarking {section}/{name}...")
+                results[name] = self.measure(render, options['iterations'], page_size)
+            results['speedup'] = round(results['fast_path']['rows_per_second'] / results['serializer']['rows_per_second'], 2)
+            report[section] = results
+
+        report['fieldsets'] = self.measure_fieldsets(options['iterations'], options['user_email'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def measure(render, iterations, page_size):
+        latencies = []
+        payload = b''
+        for _ in range(iterations):
+            started = time.perf_counter()
+            payload = render()
+            latencies.append((time.perf_counter() - started) * 1000)
+        total_seconds = sum(latencies) / 1000
+        return {
+            'rows_per_second': round(iterations * page_size / total_seconds, 1),
+            'page_ms_p50': round(percentile(latencies, 50), 3),
+            'page_ms_p99': round(percentile(latencies, 99), 3),
+            'payload_bytes': len(payload),
+        }
+
+    def measure_fieldsets(self, iterations, user_email):
+        """Full vs compact responses through the whole stack (URL routing, auth, DB, rendering)."""
+        client = Client(HTTP_HOST='localhost')
+        User = get_user_model()
+        user = (
+            User.objects.filter(email=user_email).first() if user_email
+            else User.objects.filter(orders__isnull=False, cart__items__isnull=False).first()
+        )
+        if user:
+            client.force_login(user)
+        else:
+            self.stderr.write(self.style.WARNING("No user with orders and a cart; cart/orders endpoints skipped."))
+
+        results = {}
+        for path, compact in self.FIELDSET_ENDPOINTS.items():
+            if path != '/api/v1/products/products/' and not user:
+                continue
+            results[path] = {}
+            for mode, url in (('full', path), ('compact', f'{path}?{compact}')):
+                self.stderr.write(f"Benchmarking {mode} {url}...")
+                latencies = []
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(url)
+                results[path][mode] = {
+                    'status': response.status_code,
+                    'payload_bytes': len(response.content),
+                    'queries': len(queries.captured_queries),
+                    'latency_ms_p50': round(percentile(latencies, 50), 3),
+                    'latency_ms_p99': round(percentile(latencies, 99), 3),
+                }
+        return results
@@ -0,0 +1,171 @@
+import contextlib
+import json
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.orders.models import OrderItem
+from apps.products.models import Product
+from apps.products.recommender import DjangoContentRecommender, RecommenderClient
+
+
+class PopularityRecommender:
+    """Baseline: recommend the best sellers from the training orders."""
+
+    def __init__(self, train_orders):
+        self.train_orders = train_orders
+        self.ranking = []
+
+    def train(self):
+        counts = Counter(pid for items in self.train_orders.values() for pid in items)
+        self.ranking = [pid for pid, _ in counts.most_common()]
+
+    def get_recommendations(self, product_id, n=4):
+        return [pid for pid in self.ranking[:n + 1] if pid != product_id][:n]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks recommender engines (precision/recall@k, latency, memory, training time) against held-out co-purchases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-catalog', action='store_true', help='Run seed_data before benchmarking')
+        parser.add_argument('--csv', help='Run import_products with this file before benchmarking')
+        parser.add_argument('--k', type=int, default=4)
+        parser.add_argument('--holdout', type=float, default=0.2, help='Share of orders held out for evaluation')
+        parser.add_argument('--max-queries', type=int, default=1000)
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--engines', help='Comma separated subset of engines to run')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['seed_catalog']:
+            call_command('seed_data', stdout=self.stderr)
+        if options['csv']:
+            call_command('import_products', options['csv'], stdout=self.stderr)
+
+        rng = random.Random(options['random_seed'])
+        train_orders, test_orders = self.split_orders(options['holdout'], rng)
+        queries = self.build_queries(test_orders, rng, options['max_queries'])
+
+        engines = self.available_engines(train_orders)
+        if options['engines']:
+            wanted = set(options['engines'].split(','))
+            engines = {name: engine for name, engine in engines.items() if name in wanted}
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'git_commit': self.git_commit(),
+            'k': options['k'],
+            'catalog_size': Product.objects.filter(is_active=True).count(),
+            'train_orders': len(train_orders),
+            'test_orders': len(test_orders),
+            'queries': len(queries),
+            'engines': {},
+        }
+        if not queries:
+            self.stderr.write(self.style.WARNING(
+                "No multi-item orders to hold out; quality metrics will be empty, latency uses random products."
+            ))
+            product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:options['max_queries']])
+            queries = [(pid, set()) for pid in product_ids]
+
+        for name, engine in engines.items():
+            self.stderr.write(f"Benchmarking {name}...")
+            report['engines'][name] = self.run_engine(engine, queries, options['k'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def split_orders(self, holdout, rng):
+        """{order_id: [product ids]} for train and test, split per order so co-purchases stay together."""
+        orders = defaultdict(set)
+        for order_id, product_id in OrderItem.objects.values_list('order_id', 'product_id').iterator(chunk_size=5000):
+            orders[order_id].add(product_id)
+
+        train, test = {}, {}
+        for order_id in sorted(orders):
+            (test if rng.random() < holdout else train)[order_id] = orders[order_id]
+        return train, test
+
+    def build_queries(self, test_orders, rng, max_queries):
+        """Each product in a held-out order queries for the rest of that order."""
+        queries = []
+        for items in test_orders.values():
+            if len(items) < 2:
+                continue
+            for product_id in items:
+                queries.append((product_id, items - {product_id}))
+        rng.shuffle(queries)
+        return queries[:max_queries]
+
+    def available_engines(self, train_orders):
+        engines = {
+            'content_tfidf': DjangoContentRecommender(),
+            'popularity': PopularityRecommender(train_orders),
+        }
+        if settings.RECOMMENDER_SERVER_ADDRESS:
+            engines['server'] = RecommenderClient(
+                settings.RECOMMENDER_SERVER_ADDRESS, timeout=settings.RECOMMENDER_SERVER_TIMEOUT
+            )
+        return engines
+
+    def run_engine(self, engine, queries, k):
+        result = {'train_seconds': None, 'peak_memory_bytes': None}
+
+        if hasattr(engine, 'train'):
+            # tracemalloc adds overhead, so train_seconds is comparable between runs, not absolute
+            tracemalloc.start()
+            started = time.perf_counter()
+            # Keep training chatter off stdout so the JSON report stays parseable
+            with contextlib.redirect_stdout(sys.stderr):
+                engine.train()
+            result['train_seconds'] = round(time.perf_counter() - started, 4)
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        latencies, precisions, recalls = [], [], []
+        for product_id, relevant in queries:
+            started = time.perf_counter()
+            recommended = engine.get_recommendations(product_id, n=k)[:k]
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            if relevant:
+                hits = len(set(recommended) & relevant)
+                precisions.append(hits / k)
+                recalls.append(hits / len(relevant))
+
+        result.update({
+            'precision_at_k': round(sum(precisions) / len(precisions), 4) if precisions else None,
+            'recall_at_k': round(sum(recalls) / len(recalls), 4) if recalls else None,
+            'latency_ms_p50': round(percentile(latencies, 50), 3) if latencies else None,
+            'latency_ms_p99': round(percentile(latencies, 99), 3) if latencies else None,
+        })
+        return result
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+            ).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.products.ledger import compact_ledger, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Creates upcoming inventory ledger partitions and folds settled movements into the snapshots'
+
+    def handle(self, *args, **options):
+        for name in ensure_partitions():
+            self.stdout.write(f"  created partition {name}")
+        compacted = compact_ledger()
+        self.stdout.write(self.style.SUCCESS(f"📒 Compacted the ledger of {compacted} products"))
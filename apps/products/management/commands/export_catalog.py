@@ -0,0 +1,46 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.products.exporters import FORMATS, export_catalog
+
+
+class Command(BaseCommand):
+    help = 'Streams the catalog to a CSV/JSONL file (optionally gzipped) with flat memory use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="File path, or '-' for stdout")
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--updated-since', help='ISO timestamp for an incremental feed')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            updated_since = parse_datetime(options['updated_since'])
+            if updated_since is None:
+                raise CommandError("Invalid --updated-since timestamp")
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+
+        chunks = export_catalog(
+            options['format'],
+            updated_since=updated_since,
+            compress=options['gzip'],
+            chunk_size=options['chunk_size'],
+        )
+
+        written = 0
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+                written += len(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(options['output'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"✅ Exported catalog to {options['output']} ({written} bytes)"))
@@ -0,0 +1,441 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from multiprocessing import Pool
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Subquery, Sum, F
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.text import slugify
+from apps.products.models import Category, InventoryMovement, Product
+from apps.orders.models import Order, OrderItem
+from apps.cart.models import Cart, CartItem, StockReservation
+
+User = get_user_model()
+
+CATEGORY_NAMES = ['Electronics', 'Fashion', 'Home', 'Books', 'Toys', 'Sports', 'Beauty', 'Automotive',
+                  'Garden', 'Grocery', 'Health', 'Music', 'Office', 'Pets', 'Tools', 'Baby']
+ADJECTIVES = ['Red', 'Blue', 'Silver', 'Black', 'Smart', 'Classic', 'Compact', 'Wireless', 'Organic', 'Rugged',
+              'Deluxe', 'Eco', 'Portable', 'Premium', 'Vintage', 'Ultra']
+NOUNS = ['Speaker', 'Jacket', 'Lamp', 'Novel', 'Drone', 'Racket', 'Serum', 'Charger', 'Kettle', 'Backpack',
+         'Watch', 'Blender', 'Headset', 'Chair', 'Camera', 'Bottle']
+SUFFIXES = ['Pro', 'Max', 'Ultra', 'Lite', 'Plus', 'Mini', 'X', 'One']
+
+# Order statuses roughly as they appear in production
+STATUSES = [('delivered', 0.55), ('shipped', 0.15), ('confirmed', 0.1), ('pending', 0.12), ('cancelled', 0.08)]
+
+# Entities in load order; carts and orders carry their items with them
+ENTITIES = ['products', 'users', 'carts', 'orders']
+
+
+# --- Deterministic helpers (pure functions of seed + index, usable in any worker) ---
+
+def _hash_unit(idx, seed, salt):
+    """Cheap vectorised hash of integer indices to floats in [0, 1)."""
+    x = (np.asarray(idx, dtype=np.uint64) * np.uint64(2654435761) + np.uint64(seed * 97 + salt)) % np.uint64(2 ** 32)
+    x = (x ^ (x >> np.uint64(16))) * np.uint64(73244475) % np.uint64(2 ** 32)
+    return x.astype(np.float64) / 2 ** 32
+
+
+def price_cents(product_idx, seed):
+    # Log-uniform between Rs 5 and Rs 1000: lots of cheap items, a long tail of expensive ones
+    u = _hash_unit(product_idx, seed, 1)
+    return np.round(np.exp(np.log(500) + u * (np.log(100000) - np.log(500)))).astype(np.int64)
+
+
+def product_name(i, seed):
+    h = int(_hash_unit(i, seed, 2) * 2 ** 32)
+    return f"{ADJECTIVES[h % 16]} {NOUNS[(h >> 4) % 16]} {SUFFIXES[(h >> 8) % 8]} {i}"
+
+
+def product_sku(i, seed):
+    return f"GEN{seed}-P{i:09d}"
+
+
+def money(cents):
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+_SAMPLERS = {}
+
+
+def zipf_sampler(n, exponent, seed, salt):
+    """(cdf, permutation) so rank r maps to a fixed, shuffled index: popular items aren't just the low ids."""
+    key = (n, exponent, seed, salt)
+    if key not in _SAMPLERS:
+        weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** exponent
+        cdf = np.cumsum(weights)
+        cdf /= cdf[-1]
+        perm = np.random.default_rng([seed, salt]).permutation(n)
+        _SAMPLERS[key] = (cdf, perm)
+    return _SAMPLERS[key]
+
+
+def zipf_draw(rng, size, n, exponent, seed, salt):
+    cdf, perm = zipf_sampler(n, exponent, seed, salt)
+    return perm[np.minimum(np.searchsorted(cdf, rng.random(size)), n - 1)]
+
+
+# --- Batch generators: (params, batch_index) -> {model label: rows} ---
+
+def generate_products(p, batch):
+    start, stop = batch * p['batch_size'], min((batch + 1) * p['batch_size'], p['products'])
+    idx = np.arange(start, stop)
+    rng = np.random.default_rng([p['seed'], 1, batch])
+    prices = price_cents(idx, p['seed'])
+    stock = rng.integers(0, 500, size=len(idx))
+    featured = rng.random(len(idx)) < 0.05
+    weights = rng.integers(50, 1000, size=len(idx))
+    categories = p['category_ids']
+    anchor = datetime.fromisoformat(p['anchor'])
+
+    rows = []
+    for k, i in enumerate(idx.tolist()):
+        name = product_name(i, p['seed'])
+        sku = product_sku(i, p['seed'])
+        created = anchor - timedelta(days=int(i % p['days']))
+        rows.append({
+            'id': p['bases']['products'] + i,
+            'name': name,
+            'slug': slugify(f"{name}-{sku}"),
+            'description': f"{name}. Generated catalog item for benchmarks.",
+            'category_id': categories[i % len(categories)],
+            'price': money(int(prices[k])),
+            'stock': int(stock[k]),
+            'reserved_stock': 0,
+            'is_active': True,
+            'is_featured': bool(featured[k]),
+            'image': None,
+            'sku': sku,
+            'weight': money(int(weights[k])),
+            'created_at': created,
+            'updated_at': created,
+        })
+    return {'products': rows}
+
+
+def generate_users(p, batch):
+    start, stop = batch * p['batch_size'], min((batch + 1) * p['batch_size'], p['users'])
+    anchor = datetime.fromisoformat(p['anchor'])
+    rows = []
+    for i in range(start, stop):
+        rows.append({
+            'id': p['bases']['users'] + i,
+            'password': p['password_hash'],
+            'last_login': None,
+            'is_superuser': False,
+            'email': f"gen{p['seed']}-user{i}@example.com",
+            'username': None,
+            'phone_number': '',
+            'first_name': f"User{i}",
+            'last_name': 'Generated',
+            'avatar': None,
+            'bio': '',
+            'is_active': True,
+            'is_staff': False,
+            'date_joined': anchor - timedelta(days=int(i % p['days'])),
+        })
+    return {'users': rows}
+
+
+def generate_carts(p, batch):
+    """Active carts for a fixed share of users, each with a few popular products."""
+    start, stop = batch * p['batch_size'], min((batch + 1) * p['batch_size'], p['users'])
+    idx = np.arange(start, stop)
+    idx = idx[_hash_unit(idx, p['seed'], 3) < p['cart_ratio']]
+    rng = np.random.default_rng([p['seed'], 3, batch])
+    anchor = datetime.fromisoformat(p['anchor'])
+
+    carts, items = [], []
+    counts = rng.integers(1, 4, size=len(idx))
+    products = zipf_draw(rng, int(counts.sum()), p['products'], p['zipf'], p['seed'], 10)
+    offset = 0
+    for k, i in enumerate(idx.tolist()):
+        cart_id = p['bases']['carts'] + i
+        updated = anchor - timedelta(minutes=int(rng.integers(0, 60 * 24)))
+        # Denormalized totals stay NULL (the aggregate fallback) until `refresh_cart_totals`
+        carts.append({'id': cart_id, 'user_id': p['bases']['users'] + i,
+                      'created_at': updated, 'updated_at': updated, 'is_active': True,
+                      'cached_item_count': None, 'cached_total_price': None})
+        chosen = set(products[offset:offset + counts[k]].tolist())
+        offset += counts[k]
+        for product_idx in sorted(chosen):
+            items.append({'cart_id': cart_id, 'product_id': p['bases']['products'] + product_idx,
+                          'quantity': int(rng.integers(1, 3)), 'added_at': updated})
+    return {'carts': carts, 'cart_items': items}
+
+
+def generate_orders(p, batch):
+    start, stop = batch * p['batch_size'], min((batch + 1) * p['batch_size'], p['orders'])
+    n = stop - start
+    rng = np.random.default_rng([p['seed'], 4, batch])
+    anchor = datetime.fromisoformat(p['anchor'])
+
+    users = zipf_draw(rng, n, p['users'], p['user_zipf'], p['seed'], 20)
+    counts = np.clip(1 + rng.poisson(p['avg_items'] - 1, size=n), 1, p['max_items'])
+    products = zipf_draw(rng, int(counts.sum()), p['products'], p['zipf'], p['seed'], 10)
+    ages = rng.integers(0, p['days'] * 86400, size=n)
+    status_names = [s for s, _ in STATUSES]
+    statuses = rng.choice(len(STATUSES), size=n, p=[w for _, w in STATUSES])
+
+    orders, items = [], []
+    offset = 0
+    for k in range(n):
+        i = start + k
+        order_id = p['bases']['orders'] + i
+        user_idx = int(users[k])
+        created = anchor - timedelta(seconds=int(ages[k]))
+        status = status_names[statuses[k]]
+
+        chosen = sorted(set(products[offset:offset + counts[k]].tolist()))
+        offset += counts[k]
+        prices = price_cents(np.array(chosen), p['seed'])
+        quantities = rng.integers(1, 4, size=len(chosen))
+        subtotal = int((prices * quantities).sum())
+
+        for product_idx, cents, qty in zip(chosen, prices.tolist(), quantities.tolist()):
+            items.append({
+                'order_id': order_id,
+                'product_id': p['bases']['products'] + product_idx,
+                'quantity': qty,
+                'unit_price': money(cents),
+                'subtotal': money(cents * qty),
+                'product_name_at_purchase': product_name(product_idx, p['seed']),
+                'product_sku_at_purchase': product_sku(product_idx, p['seed']),
+                'created_at': created,
+            })
+
+        orders.append({
+            'id': order_id,
+            'order_number': f"GEN{p['seed']}O{i:010d}",
+            'user_id': p['bases']['users'] + user_idx,
+            'status': status,
+            'payment_status': 'completed' if status in ('shipped', 'delivered') else 'pending',
+            'subtotal': money(subtotal),
+            'tax': '0.00',
+            'shipping': '0.00',
+            'total': money(subtotal),
+            'shipping_address': f"{i} Generated Street",
+            'billing_address': f"{i} Generated Street",
+            'customer_email': f"gen{p['seed']}-user{user_idx}@example.com",
+            'customer_phone': '9800000000',
+            'payment_method': 'cod',
+            'transaction_id': None,
+            'created_at': created,
+            'updated_at': created,
+            'shipped_at': created + timedelta(days=1) if status in ('shipped', 'delivered') else None,
+            'delivered_at': created + timedelta(days=3) if status == 'delivered' else None,
+            'notes': '',
+            'tracking_number': None,
+            'coupon_code': None,
+            'discount_amount': '0.00',
+        })
+    return {'orders': orders, 'order_items': items}
+
+
+GENERATORS = {
+    'products': generate_products,
+    'users': generate_users,
+    'carts': generate_carts,
+    'orders': generate_orders,
+}
+
+MODELS = {
+    'products': Product,
+    'users': User,
+    'carts': Cart,
+    'cart_items': CartItem,
+    'orders': Order,
+    'order_items': OrderItem,
+}
+
+
+def _columns(model):
+    # Item tables get their ids from the sequence; nothing references them
+    skip_id = model in (CartItem, OrderItem)
+    return [f for f in model._meta.concrete_fields if not (skip_id and f.primary_key)]
+
+
+def _to_csv(model, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    attnames = [f.attname for f in _columns(model)]
+    for row in rows:
+        writer.writerow(['\\N' if row[a] is None else row[a] for a in attnames])
+    return buffer.getvalue()
+
+
+def run_batch(args):
+    """Pool worker: generate one batch and, for Postgres, pre-encode it as COPY CSV."""
+    entity, batch, params, use_copy = args
+    tables = GENERATORS[entity](params, batch)
+    if use_copy:
+        tables = {label: _to_csv(MODELS[label], rows) for label, rows in tables.items()}
+    return entity, batch, tables
+
+
+class Command(BaseCommand):
+    help = 'Generates a deterministic, seedable large dataset (products, users, carts, orders) for load tests and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=50000)
+        parser.add_argument('--orders', type=int, default=200000)
+        parser.add_argument('--avg-items', type=float, default=2.5, help='Mean line items per order')
+        parser.add_argument('--max-items', type=int, default=10)
+        parser.add_argument('--cart-ratio', type=float, default=0.1, help='Share of users with an active cart')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Product popularity skew')
+        parser.add_argument('--user-zipf', type=float, default=0.6, help='Orders-per-user skew')
+        parser.add_argument('--days', type=int, default=365, help='Spread of order dates')
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--state-file', default=str(settings.BASE_DIR / 'generate_dataset.state.json'),
+                            help='Progress checkpoint used to resume an interrupted run')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+
+    def handle(self, *args, **options):
+        self.use_copy = connection.vendor == 'postgresql'
+        params = self.load_or_create_state(options)
+
+        jobs = []
+        for entity in ENTITIES:
+            total = params['users'] if entity in ('users', 'carts') else params[entity]
+            batches = (total + params['batch_size'] - 1) // params['batch_size']
+            done = set(self.state['done'][entity])
+            jobs.append((entity, [(entity, b, params, self.use_copy) for b in range(batches) if b not in done]))
+
+        with Pool(processes=max(1, options['workers'])) as pool:
+            # Entities load in order (FKs); batches within an entity are generated in parallel
+            for entity, entity_jobs in jobs:
+                if not entity_jobs:
+                    continue
+                self.stdout.write(f"Generating {entity}: {len(entity_jobs)} batches...")
+                for entity, batch, tables in pool.imap_unordered(run_batch, entity_jobs):
+                    self.load_batch(tables)
+                    self.state['done'][entity].append(batch)
+                    self.save_state()
+                    self.stdout.write(f"  {entity} batch {batch} loaded")
+
+        self.finalize(params)
+        self.stdout.write(self.style.SUCCESS("✅ Dataset generation complete."))
+
+    def load_or_create_state(self, options):
+        self.state_file = options['state_file']
+        keys = ['seed', 'products', 'users', 'orders', 'avg_items', 'max_items', 'cart_ratio',
+                'zipf', 'user_zipf', 'days', 'batch_size']
+        wanted = {k: options[k] for k in keys}
+
+        if os.path.exists(self.state_file) and not options['restart']:
+            with open(self.state_file) as f:
+                self.state = json.load(f)
+            saved = {k: self.state['params'][k] for k in keys}
+            if saved != wanted:
+                raise CommandError(
+                    f"{self.state_file} was created with different options {saved}; "
+                    f"pass the same options to resume or --restart."
+                )
+            self.stdout.write(f"Resuming from {self.state_file}")
+            return self.state['params']
+
+        # Fixed id ranges and a fixed clock make every batch reproducible on resume
+        params = dict(wanted)
+        params['anchor'] = datetime.now(dt_timezone.utc).replace(microsecond=0).isoformat()
+        params['bases'] = {
+            'products': self.next_id(Product),
+            'users': self.next_id(User),
+            'carts': self.next_id(Cart),
+            'orders': self.next_id(Order),
+        }
+        params['category_ids'] = self.ensure_categories()
+        params['password_hash'] = make_password('benchmark123')
+        self.state = {'params': params, 'done': {entity: [] for entity in ENTITIES}}
+        self.save_state()
+        return params
+
+    @staticmethod
+    def next_id(model):
+        last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+        return (last or 0) + 1
+
+    @staticmethod
+    def ensure_categories():
+        ids = []
+        for name in CATEGORY_NAMES:
+            category, _ = Category.objects.get_or_create(name=name, defaults={'slug': slugify(name)})
+            ids.append(category.id)
+        return ids
+
+    def save_state(self):
+        tmp = f"{self.state_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_file)  # Atomic, so a crash never leaves a torn checkpoint
+
+    def load_batch(self, tables):
+        """One transaction per batch: the checkpoint only records fully loaded batches."""
+        with transaction.atomic():
+            for label, data in tables.items():
+                model = MODELS[label]
+                if self.use_copy:
+                    columns = ', '.join(connection.ops.quote_name(f.column) for f in _columns(model))
+                    with connection.cursor() as cursor:
+                        cursor.copy_expert(
+                            f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+                            f"FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                            io.StringIO(data)
+                        )
+                else:
+                    model.objects.bulk_create([model(**row) for row in data], batch_size=5000)
+
+    def finalize(self, params):
+        # Explicit ids were inserted, so move the sequences past them
+        sql = connection.ops.sequence_reset_sql(no_style(), [Product, User, Cart, Order, CartItem, OrderItem])
+        with connection.cursor() as cursor:
+            for statement in sql:
+                cursor.execute(statement)
+
+        # Generated cart lines hold stock: give each a reservation (the sweeper expires them
+        # like any other) and reflect them in reserved_stock
+        self.stdout.write("Reserving stock for generated carts...")
+        expires_at = timezone.now() + timedelta(seconds=settings.CART_RESERVATION_TTL)
+        lines = CartItem.objects.filter(cart_id__gte=params['bases']['carts'], cart__is_active=True)
+        StockReservation.objects.bulk_create(
+            (
+                StockReservation(cart_id=cart_id, product_id=product_id, quantity=quantity, expires_at=expires_at)
+                for cart_id, product_id, quantity in lines.values_list('cart_id', 'product_id', 'quantity').iterator()
+            ),
+            batch_size=5000, ignore_conflicts=True,  # Already there when finalize runs again on resume
+        )
+        reserved = (
+            StockReservation.objects.filter(product=OuterRef('pk'))
+            .order_by().values('product').annotate(total=Sum('quantity')).values('total')
+        )
+        generated = Product.objects.filter(sku__startswith=f"GEN{params['seed']}-P")
+        with transaction.atomic():
+            generated.update(reserved_stock=Coalesce(Subquery(reserved), 0))
+            generated.update(stock=Greatest(F('stock'), F('reserved_stock')))
+
+            # Products were COPYed in without signals: open their ledger with the same numbers
+            self.stdout.write("Opening the inventory ledger for generated products...")
+            unrecorded = generated.exclude(Exists(InventoryMovement.objects.filter(product=OuterRef('pk'))))
+            InventoryMovement.objects.bulk_create(
+                (
+                    InventoryMovement(product_id=product_id, kind=kind, reference='generate_dataset', **delta)
+                    for product_id, stock, reserved in unrecorded.values_list('id', 'stock', 'reserved_stock').iterator()
+                    for kind, delta in (
+                        (InventoryMovement.RESTOCK, {'stock_delta': stock}),
+                        (InventoryMovement.RESERVE, {'reserved_delta': reserved}),
+                    )
+                    if any(delta.values())
+                ),
+                batch_size=5000,
+            )
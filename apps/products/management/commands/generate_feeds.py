@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.products.feeds import CatalogFeedGenerator
+
+
+class Command(BaseCommand):
+    help = 'Regenerates sitemap and product feed chunks whose products changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rewrite every chunk')
+
+    def handle(self, *args, **options):
+        result = CatalogFeedGenerator().generate(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Feeds: {result['written']} chunks rewritten, {result['removed']} removed, {result['chunks']} total."
+        ))
@@ -1,72 +1,291 @@
 import csv
-from django.core.management.base import BaseCommand
+import itertools
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
 from django.utils.text import slugify
-from apps.products.models import Product, Category, ProductReview
+from apps.notifications import cdc
+from apps.products.ledger import record_movements
+from apps.products.models import Product, Category, InventoryMovement, ProductReview
+from apps.products.recommender import recommender_indexer, schedule_recommender_update
+from apps.products.services import ProductCacheService, stock_microcache
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+
 class Command(BaseCommand):
-    help = 'Import products from the recommendation dataset'
+    help = 'Import products from the recommendation dataset (streaming, bulk upsert on SKU)'
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str)
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk upsert')
+        parser.add_argument('--workers', type=int, default=1, help='Chunks processed in parallel')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything')
 
     def handle(self, *args, **options):
         path = options['csv_file']
-        
+        chunk_size = options['chunk_size']
+        workers = max(1, options['workers'])
+
+        if options['dry_run']:
+            return self.validate(path)
+
         # FIX: Use email instead of username
-        admin_user, _ = User.objects.get_or_create(
-            email='admin@example.com', 
+        self.admin_user, _ = User.objects.get_or_create(
+            email='admin@example.com',
             defaults={'first_name': 'Admin', 'is_staff': True}
         )
+        # slug -> id, filled lazily and shared by all workers
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.category_lock = threading.Lock()
+
+        self.started = time.perf_counter()
+        self.rows_done = 0
+        self.duplicates = 0
+        self.skipped = 0
 
         with open(path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 1. Create/Get Category
-                # Note: Match the column name exactly as it appears in your CSV
-                cat_name = row.get('Category', 'General') 
-                category, _ = Category.objects.get_or_create(
-                    name=cat_name, 
-                    defaults={'slug': slugify(cat_name)}
+            chunks = self.iter_chunks(csv.DictReader(f), chunk_size)
+            if workers == 1:
+                for chunk in chunks:
+                    self.report(*self.import_chunk(chunk))
+            else:
+                self.run_parallel(chunks, workers)
+
+        # bulk_create skips model signals, so tell the recommender and the
+        # recommendation fragment cache ourselves
+        recommender_indexer.flush()
+        ProductCacheService.bump_recommender_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'--- Data Import Complete: {self.rows_done} rows, {self.duplicates} repeated SKUs merged, '
+            f'{self.skipped} skipped ---'
+        ))
+
+    @staticmethod
+    def iter_chunks(reader, chunk_size):
+        """Yield lists of rows without ever holding the whole file in memory."""
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def run_parallel(self, chunks, workers):
+        """Keep at most 2 chunks per worker in flight so memory stays flat."""
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk in chunks:
+                pending.add(pool.submit(self.import_chunk_in_thread, chunk))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.report(*future.result())
+            for future in pending:
+                self.report(*future.result())
+
+    def report(self, rows, duplicates, skipped):
+        self.rows_done += rows
+        self.duplicates += duplicates
+        self.skipped += skipped
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(f"{self.rows_done} rows imported ({self.rows_done / elapsed:.0f} rows/sec)")
+
+    # --- Row parsing ---
+
+    @staticmethod
+    def parse_row(row):
+        """Returns a clean dict for one CSV row or raises ValueError (a bad rating just drops the review)."""
+        # Note: Match the column name exactly as it appears in your CSV
+        p_name = (row.get('Product Name') or 'Unknown Product').strip()
+        price_raw = row.get('Price') or '0'
+        try:
+            price = Decimal(price_raw)
+        except InvalidOperation:
+            raise ValueError(f"invalid price {price_raw!r}")
+        if price < 0:
+            raise ValueError(f"negative price {price_raw!r}")
+
+        # Use SKU from CSV if available, otherwise generate one
+        sku = row.get('SKU') or slugify(p_name)[:10] + price_raw
+        if len(sku) > 100:
+            raise ValueError(f"SKU too long: {sku[:20]}...")
+
+        # A bad rating only costs the review, never the product
+        rating = None
+        rating_val = row.get('Rating')
+        if rating_val:
+            try:
+                rating = int(float(rating_val))
+            except (ValueError, OverflowError):  # Also 'nan' and 'inf'
+                logger.warning(f"Skipping review of {sku}: invalid rating {rating_val!r}")
+            else:
+                if not 1 <= rating <= 5:
+                    logger.warning(f"Skipping review of {sku}: rating out of range {rating_val!r}")
+                    rating = None
+
+        return {
+            'sku': sku,
+            'name': p_name[:200],
+            'category': row.get('Category', 'General') or 'General',
+            'price': price,
+            'description': f"Brand: {row.get('Brand')}. Description: {row.get('Description', 'No description available.')}",
+            'rating': rating,
+            'sentiment': row.get('Sentiment Score', 'N/A'),
+        }
+
+    def validate(self, path):
+        errors, total = 0, 0
+        with open(path, 'r', encoding='utf-8') as f:
+            # Line 1 is the header
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                total += 1
+                try:
+                    self.parse_row(row)
+                except ValueError as e:
+                    errors += 1
+                    if errors <= 50:
+                        self.stdout.write(self.style.WARNING(f"Line {line_no}: {e}"))
+        style = self.style.SUCCESS if not errors else self.style.ERROR
+        self.stdout.write(style(f"--- Dry run: {total} rows, {errors} invalid ---"))
+        if errors:
+            raise CommandError(f"{errors} invalid rows")
+
+    # --- Writing ---
+
+    def import_chunk_in_thread(self, chunk):
+        try:
+            return self.import_chunk(chunk)
+        finally:
+            connection.close()  # Each worker thread owns its own connection
+
+    def resolve_categories(self, names):
+        """
+        {name: category id} for the chunk, creating what's missing. Names are
+        matched on their slug (the unique column), so "Home & Garden" and
+        "Home Garden" share one category; a name still unresolved (its name
+        taken by a category with another slug) is left out.
+        """
+        slugs = {name: slugify(name) for name in names}
+        missing = set(slugs.values()) - self.categories.keys()
+        if missing:
+            with self.category_lock:
+                missing = set(slugs.values()) - self.categories.keys()
+                new = {}
+                for name, slug in sorted(slugs.items()):
+                    if slug in missing:
+                        new.setdefault(slug, name)
+                Category.objects.bulk_create(
+                    [Category(name=name, slug=slug) for slug, name in new.items()],
+                    ignore_conflicts=True
+                )
+                self.categories.update(Category.objects.filter(slug__in=missing).values_list('slug', 'id'))
+                ProductCacheService.bump_category_version()
+        return {name: self.categories[slug] for name, slug in slugs.items() if slug in self.categories}
+
+    @staticmethod
+    def invalidate(product_ids):
+        ProductCacheService.bump_product_versions(product_ids)
+        ProductCacheService.bump_product_card_versions(product_ids)
+        for product_id in product_ids:
+            stock_microcache.invalidate(product_id)
+
+    def import_chunk(self, chunk):
+        """Returns (rows imported, of which repeated SKUs merged into one product, rows skipped)."""
+        rows, repeats, skipped = {}, Counter(), 0
+        for row in chunk:
+            try:
+                parsed = self.parse_row(row)
+            except ValueError as e:
+                skipped += 1
+                self.stderr.write(f"Skipping row: {e}")
+                continue
+            rows[parsed['sku']] = parsed  # Last row wins for duplicate SKUs
+            repeats[parsed['sku']] += 1
+
+        if not rows:
+            return 0, 0, skipped
+
+        categories = self.resolve_categories({r['category'] for r in rows.values()})
+        for sku, r in list(rows.items()):
+            if r['category'] not in categories:
+                del rows[sku]
+                skipped += repeats.pop(sku)
+                self.stderr.write(f"Skipping row: category {r['category']!r} conflicts with an existing one")
+        if not rows:
+            return 0, 0, skipped
+
+        # Sorted by SKU so parallel workers take row locks in the same order
+        products = [
+            Product(
+                sku=r['sku'],
+                name=r['name'],
+                slug=slugify(r['name'] + "-" + r['sku'])[:200],
+                description=r['description'],
+                category_id=categories[r['category']],
+                price=r['price'],
+                stock=100,
+                is_active=True,
+            )
+            for r in sorted(rows.values(), key=lambda r: r['sku'])
+        ]
+
+        with transaction.atomic():
+            # Existing SKUs keep their stock and slug; catalog fields are refreshed
+            Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=['name', 'description', 'category', 'price', 'updated_at'],
+            )
+            ids_by_sku = dict(Product.objects.filter(sku__in=rows.keys()).values_list('sku', 'id'))
+
+            # Upserts skip signals: open the ledger of the products just created. Updates
+            # never touch stock, and a concurrent worker's upsert of the same SKU waits on
+            # the row lock, so it sees the movement committed here.
+            record_movements([
+                InventoryMovement(
+                    product_id=product_id, kind=InventoryMovement.RESTOCK, reference='import_products',
+                    stock_delta=stock, reserved_delta=reserved,
                 )
+                for product_id, stock, reserved in Product.objects.filter(id__in=ids_by_sku.values())
+                .exclude(Exists(InventoryMovement.objects.filter(product=OuterRef('pk'))))
+                .values_list('id', 'stock', 'reserved_stock')
+            ])
+
+            # What the skipped post_save receivers would have done, once the chunk commits
+            product_ids = list(ids_by_sku.values())
+            for product_id in product_ids:
+                cdc.capture('product', product_id)
+            transaction.on_commit(lambda: self.invalidate(product_ids))
 
-                # 2. Create/Get Product
-                p_name = row.get('Product Name', 'Unknown Product')
-                # Use SKU from CSV if available, otherwise generate one
-                sku_val = row.get('SKU', slugify(p_name)[:10] + row.get('Price', '0'))
-
-                product, created = Product.objects.get_or_create(
-                    sku=sku_val,
-                    defaults={
-                        'name': p_name,
-                        'slug': slugify(p_name + "-" + sku_val),
-                        'description': f"Brand: {row.get('Brand')}. Description: {row.get('Description', 'No description available.')}",
-                        'category': category,
-                        'price': row.get('Price', 0.0),
-                        'stock': 100,
-                        'is_active': True
-                    }
+            # Handle Ratings (ML Feature 6)
+            reviews = [
+                ProductReview(
+                    product_id=ids_by_sku[sku],
+                    user=self.admin_user,
+                    rating=r['rating'],
+                    comment=f"Sentiment: {r['sentiment']}",
+                    is_approved=True,
                 )
+                for sku, r in sorted(rows.items()) if r['rating'] is not None
+            ]
+            ProductReview.objects.bulk_create(
+                reviews,
+                update_conflicts=True,
+                unique_fields=['product', 'user'],
+                update_fields=['rating', 'comment', 'is_approved'],
+            )
 
-                # 3. Handle Ratings (ML Feature 6)
-                rating_val = row.get('Rating')
-                if rating_val:
-                    try:
-                        ProductReview.objects.get_or_create(
-                            product=product,
-                            user=admin_user,
-                            defaults={
-                                'rating': int(float(rating_val)),
-                                'comment': f"Sentiment: {row.get('Sentiment Score', 'N/A')}",
-                                'is_approved': True
-                            }
-                        )
-                    except Exception as e:
-                        self.stdout.write(self.style.WARNING(f"Could not add review for {p_name}: {e}"))
-
-                if created:
-                    self.stdout.write(self.style.SUCCESS(f"Successfully imported: {p_name}"))
-
-        self.stdout.write(self.style.SUCCESS('--- Data Import Complete ---'))
\ No newline at end of file
+        schedule_recommender_update(ids_by_sku.values())
+        imported = sum(repeats.values())
+        return imported, imported - len(rows), skipped
@@ -0,0 +1,72 @@
+import json
+import logging
+import select
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.products.broadcast import stock_broadcaster
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'stock_changes'  # Must match migration 0002_stock_notify_trigger
+
+
+class Command(BaseCommand):
+    help = 'Relays Postgres stock NOTIFYs to WebSocket clients (coalesced by StockBroadcaster)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reconnect-delay', type=float, default=5.0,
+            help='Seconds to wait before reconnecting after a lost connection'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('LISTEN/NOTIFY needs PostgreSQL')
+        if not settings.STOCK_NOTIFY_ENABLED:
+            self.stdout.write(self.style.WARNING(
+                'STOCK_NOTIFY_ENABLED is off: web processes broadcast from signals too, so clients get duplicates'
+            ))
+
+        while True:
+            try:
+                self.listen()
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                # Changes committed while we are away are not replayed; clients resync on reconnect
+                logger.error(f"Stock listener lost its connection: {e}")
+                connection.close()
+                time.sleep(options['reconnect_delay'])
+        stock_broadcaster.flush()
+
+    def listen(self):
+        connection.ensure_connection()
+        conn = connection.connection
+        conn.autocommit = True  # NOTIFYs are only read outside a transaction
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL};')
+        self.stdout.write(self.style.SUCCESS(f"📡 Listening for stock changes on '{CHANNEL}'"))
+
+        while True:
+            # Wake up now and then so a dead connection is noticed
+            if select.select([conn], [], [], 60) == ([], [], []):
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')  # May also pick up notifies
+            else:
+                conn.poll()
+            notifies, conn.notifies[:] = list(conn.notifies), []
+            for notify in notifies:
+                self.relay(notify.payload)
+
+    def relay(self, payload):
+        try:
+            change = json.loads(payload)
+            product_id = int(change['id'])
+            available = max(0, change['stock'] - change['reserved_stock'])
+        except (ValueError, KeyError, TypeError):
+            # Raising here would drop the connection and every NOTIFY queued behind this one
+            logger.warning(f"Ignoring malformed stock notification: {payload!r}")
+            return
+        stock_broadcaster.publish(product_id, available)
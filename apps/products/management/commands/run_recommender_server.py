@@ -0,0 +1,43 @@
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.products.recommender import recommender_engine
+from apps.products.recommender_server import create_server
+
+
+class Command(BaseCommand):
+    help = 'Runs the shared recommendation server so all Django processes use one model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            default=getattr(settings, 'RECOMMENDER_SERVER_ADDRESS', '') or '127.0.0.1:8765',
+            help="'unix:/path/to.sock' or 'host:port'"
+        )
+        parser.add_argument(
+            '--reload-interval', type=int, default=0,
+            help='Retrain every N seconds (0 = only on reload requests)'
+        )
+
+    def handle(self, *args, **options):
+        address = options['address']
+        recommender_engine.train()
+
+        server = create_server(address, recommender_engine)
+
+        interval = options['reload_interval']
+        if interval > 0:
+            def _periodic_reload():
+                while True:
+                    time.sleep(interval)
+                    server.reload_in_background()
+            threading.Thread(target=_periodic_reload, daemon=True).start()
+
+        self.stdout.write(self.style.SUCCESS(f"🧠 Recommender server listening on {address}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -1,4 +1,5 @@
 import random
+import uuid
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
@@ -37,7 +38,8 @@ class Command(BaseCommand):
         
         for i in range(1000):
             name = f"{fake.color_name()} {fake.word().capitalize()} {random.choice(['Pro', 'Max', 'Ultra', 'Lite', 'Plus'])}"
-            sku = f"SKU-{random.randint(10000, 99999)}-{i}"
+            # uuid keeps SKUs unique across repeated runs (randint + index could collide)
+            sku = f"SKU-{uuid.uuid4().hex[:12].upper()}"
             
             products_to_create.append(Product(
                 name=name,
@@ -63,14 +65,14 @@ class Command(BaseCommand):
         
         self.stdout.write("Generating random reviews...")
         for p_id in product_ids:
-            for _ in range(random.randint(1, 3)):
-                reviews_to_create.append(ProductReview(
-                    product_id=p_id,
-                    user=admin_user,
-                    rating=random.randint(3, 5),
-                    comment=fake.sentence(),
-                    is_approved=True
-                ))
+            # One review per product: (product, user) is unique
+            reviews_to_create.append(ProductReview(
+                product_id=p_id,
+                user=admin_user,
+                rating=random.randint(3, 5),
+                comment=fake.sentence(),
+                is_approved=True
+            ))
         
         ProductReview.objects.bulk_create(reviews_to_create)
         self.stdout.write(self.style.SUCCESS("✅ Reviews inserted! Seeding complete."))
\ No newline at end of file
@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One in-progress DB read that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MicroCache:
+    """
+    Per-process cache with a sub-second TTL and request coalescing.
+
+    While an entry is fresh, callers get it without a DB read. When it is stale
+    or missing, the first caller (the leader) runs the loader and everyone else
+    asking for the same key meanwhile waits for that one result.
+
+    Counters are kept in memory and flushed to the shared cache every
+    `flush_interval` seconds (a handful of INCRs, never per request), so
+    `shared_metrics()` adds up every worker.
+    """
+    MAX_ENTRIES = 10000
+    METRIC_KEYS = ('requests', 'hits', 'coalesced', 'db_reads', 'staleness_ms_total', 'served_cached')
+
+    def __init__(self, name, loader, ttl, wait_timeout=2.0, flush_interval=10.0):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.flush_interval = flush_interval
+        self._entries = {}  # key -> (loaded_at, value)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.METRIC_KEYS, 0)
+        self._max_staleness_ms = 0.0
+        self._flushed = dict.fromkeys(self.METRIC_KEYS, 0)
+        self._last_flush = time.monotonic()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._counters['requests'] += 1
+            entry = self._entries.get(key)
+            fresh = entry is not None and now - entry[0] < self.ttl
+            if fresh:
+                self._record_hit('hits', now - entry[0])
+            else:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                else:
+                    self._counters['coalesced'] += 1
+
+        if fresh:
+            self._maybe_flush()
+            return entry[1]
+
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and flight.error is None:
+                with self._lock:
+                    self._record_hit(None, time.monotonic() - now)
+                return flight.value
+            return self._load(key)  # Leader failed or is stuck: read for ourselves
+
+        try:
+            flight.value = self._load(key)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    if len(self._entries) >= self.MAX_ENTRIES:
+                        self._prune(time.monotonic())
+                    self._entries[key] = (now, flight.value)
+                self._flights.pop(key, None)
+            flight.done.set()
+            self._maybe_flush()
+
+    def _load(self, key):
+        with self._lock:
+            self._counters['db_reads'] += 1
+        return self.loader(key)
+
+    def _record_hit(self, counter, age):
+        """Call with the lock held; age is how old the served value is."""
+        if counter:
+            self._counters[counter] += 1
+        age_ms = age * 1000
+        self._counters['served_cached'] += 1
+        self._counters['staleness_ms_total'] += age_ms
+        self._max_staleness_ms = max(self._max_staleness_ms, age_ms)
+
+    def _prune(self, now):
+        self._entries = {k: v for k, v in self._entries.items() if now - v[0] < self.ttl}
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    # --- Metrics ---
+
+    @staticmethod
+    def _ratios(counters, max_staleness_ms):
+        requests = counters['requests'] or 1
+        served_cached = counters['served_cached'] or 1
+        return {
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in counters.items()},
+            'hit_ratio': round(counters['hits'] / requests, 4),
+            'coalescing_ratio': round(counters['coalesced'] / requests, 4),
+            'db_reads_per_request': round(counters['db_reads'] / requests, 4),
+            'avg_staleness_ms': round(counters['staleness_ms_total'] / served_cached, 3),
+            'max_staleness_ms': round(max_staleness_ms, 3),
+        }
+
+    def metrics(self):
+        """This process only, since start."""
+        with self._lock:
+            return self._ratios(dict(self._counters), self._max_staleness_ms)
+
+    def _cache_key(self, metric):
+        return f'microcache_{self.name}_{metric}'
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if now - self._last_flush < self.flush_interval:
+            return
+        with self._lock:
+            if now - self._last_flush < self.flush_interval:
+                return
+            self._last_flush = now
+            deltas = {k: int(self._counters[k]) - int(self._flushed[k]) for k in self.METRIC_KEYS}
+            self._flushed = dict(self._counters)
+            max_staleness_ms = self._max_staleness_ms
+
+        try:
+            for metric, delta in deltas.items():
+                if delta:
+                    key = self._cache_key(metric)
+                    cache.add(key, 0, None)
+                    cache.incr(key, delta)
+            max_key = self._cache_key('max_staleness_ms')
+            if max_staleness_ms > (cache.get(max_key) or 0):
+                cache.set(max_key, max_staleness_ms, None)
+        except Exception as e:
+            logger.warning(f"MicroCache {self.name}: metrics flush failed: {e}")
+
+    def shared_metrics(self):
+        """All processes, as of their last flush."""
+        keys = {self._cache_key(m): m for m in self.METRIC_KEYS}
+        values = cache.get_many(list(keys) + [self._cache_key('max_staleness_ms')])
+        counters = {metric: values.get(key, 0) for key, metric in keys.items()}
+        return self._ratios(counters, values.get(self._cache_key('max_staleness_ms'), 0))
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# NOTIFY is delivered only when the transaction commits, so rolled-back
+# changes never reach the listener (listen_stock_changes).
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION products_notify_stock_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('stock_changes', json_build_object(
+        'id', NEW.id,
+        'stock', NEW.stock,
+        'reserved_stock', NEW.reserved_stock
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS products_stock_notify ON products_product;
+CREATE TRIGGER products_stock_notify
+    AFTER UPDATE OF stock, reserved_stock ON products_product
+    FOR EACH ROW
+    WHEN (OLD.stock IS DISTINCT FROM NEW.stock OR OLD.reserved_stock IS DISTINCT FROM NEW.reserved_stock)
+    EXECUTE FUNCTION products_notify_stock_change();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS products_stock_notify ON products_product;
+DROP FUNCTION IF EXISTS products_notify_stock_change();
+"""
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,183 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:41
+
+from datetime import timezone as dt_timezone
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+import django.utils.timezone
+
+# PostgreSQL: the ledger is range-partitioned by month on created_at, so old
+# months can be detached (apps.products.ledger.archive_partitions). The
+# primary key has to include the partition key. The DEFAULT partition only
+# catches rows if ensure_partitions() stopped running.
+PARTITION_TABLE = """
+DROP TABLE products_inventorymovement;
+CREATE TABLE products_inventorymovement (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    kind varchar(10) NOT NULL,
+    stock_delta integer NOT NULL,
+    reserved_delta integer NOT NULL,
+    reference varchar(64) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    product_id bigint NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE INDEX inventory_movement_product_idx ON products_inventorymovement (product_id, created_at);
+CREATE INDEX inventory_movement_time_idx ON products_inventorymovement (created_at);
+CREATE TABLE products_inventorymovement_default PARTITION OF products_inventorymovement DEFAULT;
+
+CREATE OR REPLACE FUNCTION products_inventory_movement_append_only() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'products_inventorymovement is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER products_inventory_movement_append_only
+    BEFORE UPDATE OR DELETE ON products_inventorymovement
+    FOR EACH ROW EXECUTE FUNCTION products_inventory_movement_append_only();
+"""
+
+DROP_APPEND_ONLY = "DROP FUNCTION IF EXISTS products_inventory_movement_append_only() CASCADE;"
+
+
+def partition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(PARTITION_TABLE)
+    month = timezone.now().astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(3):  # This month and the next two; ensure_partitions() keeps ahead from here
+        following = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        schema_editor.execute(
+            f"CREATE TABLE products_inventorymovement_p{month:%Y%m} PARTITION OF products_inventorymovement "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [month, following],
+        )
+        month = following
+
+
+def unpartition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(DROP_APPEND_ONLY)
+
+
+def open_ledger(apps, schema_editor):
+    """Current stock becomes each product's opening movement and first snapshot."""
+    Product = apps.get_model("products", "Product")
+    InventoryMovement = apps.get_model("products", "InventoryMovement")
+    InventorySnapshot = apps.get_model("products", "InventorySnapshot")
+    now = timezone.now()
+    products = Product.objects.values_list("id", "stock", "reserved_stock")
+    InventoryMovement.objects.bulk_create(
+        (
+            InventoryMovement(
+                product_id=product_id, kind="adjust", stock_delta=stock, reserved_delta=reserved,
+                reference="opening balance", created_at=now,
+            )
+            for product_id, stock, reserved in products.iterator()
+        ),
+        batch_size=5000,
+    )
+    InventorySnapshot.objects.bulk_create(
+        (
+            InventorySnapshot(product_id=product_id, stock=stock, reserved_stock=reserved, through=now)
+            for product_id, stock, reserved in products.iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0002_stock_notify_trigger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InventorySnapshot",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="inventory_snapshot",
+                        serialize=False,
+                        to="products.product",
+                    ),
+                ),
+                ("stock", models.IntegerField(default=0)),
+                ("reserved_stock", models.IntegerField(default=0)),
+                (
+                    "through",
+                    models.DateTimeField(
+                        db_index=True,
+                        help_text="Movements created up to this moment are included",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="InventoryMovement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("reserve", "Reserve"),
+                            ("release", "Release"),
+                            ("sale", "Sale"),
+                            ("restock", "Restock"),
+                            ("cancel", "Cancel"),
+                            ("adjust", "Adjust"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("stock_delta", models.IntegerField(default=0)),
+                ("reserved_delta", models.IntegerField(default=0)),
+                (
+                    "reference",
+                    models.CharField(
+                        blank=True,
+                        help_text="Order number or the job that made the change",
+                        max_length=64,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="inventory_movements",
+                        to="products.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["product", "created_at"],
+                        name="inventory_movement_product_idx",
+                    ),
+                    models.Index(
+                        fields=["created_at"], name="inventory_movement_time_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(partition_table, unpartition_table),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
@@ -61,16 +62,77 @@ class Product(models.Model):
 
     def reserve_stock(self, quantity):
         """Attempt to reserve stock. Returns True if successful."""
+        from .ledger import record_movements
+        from .services import stock_changed
+
         if self.available_stock >= quantity:
             self.reserved_stock += quantity
-            self.save(update_fields=['reserved_stock'])
+            Product.objects.filter(pk=self.pk).update(reserved_stock=self.reserved_stock)
+            record_movements([InventoryMovement(product_id=self.id, kind=InventoryMovement.RESERVE, reserved_delta=quantity)])
+            stock_changed([self])
             return True
         return False
 
     def release_reserved_stock(self, quantity):
         """Release reserved stock (e.g., cart timeout)."""
-        self.reserved_stock = max(0, self.reserved_stock - quantity)
-        self.save(update_fields=['reserved_stock'])
+        from .ledger import record_movements
+        from .services import stock_changed
+
+        released = min(quantity, self.reserved_stock)
+        self.reserved_stock -= released
+        Product.objects.filter(pk=self.pk).update(reserved_stock=self.reserved_stock)
+        record_movements([InventoryMovement(product_id=self.id, kind=InventoryMovement.RELEASE, reserved_delta=-released)])
+        stock_changed([self])
+
+
+class InventoryMovement(models.Model):
+    """
+    Append-only ledger of stock changes (apps.products.ledger). Rows are
+    only ever inserted, in the transaction that changes the product; on
+    PostgreSQL the table is range-partitioned by month on created_at.
+    """
+    RESERVE = 'reserve'
+    RELEASE = 'release'
+    SALE = 'sale'
+    RESTOCK = 'restock'
+    CANCEL = 'cancel'
+    ADJUST = 'adjust'
+    KIND_CHOICES = [
+        (RESERVE, 'Reserve'),
+        (RELEASE, 'Release'),
+        (SALE, 'Sale'),
+        (RESTOCK, 'Restock'),
+        (CANCEL, 'Cancel'),
+        (ADJUST, 'Adjust'),
+    ]
+
+    # No database FK: the history outlives the product (and partitions can't reference it cheaply)
+    product = models.ForeignKey(
+        Product, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='inventory_movements'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    stock_delta = models.IntegerField(default=0)
+    reserved_delta = models.IntegerField(default=0)
+    reference = models.CharField(max_length=64, blank=True, help_text="Order number or the job that made the change")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='inventory_movement_product_idx'),
+            models.Index(fields=['created_at'], name='inventory_movement_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.product_id}: stock {self.stock_delta:+d}, reserved {self.reserved_delta:+d}"
+
+
+class InventorySnapshot(models.Model):
+    """A product's ledger balance folded up to `through` (compact_ledger())."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='inventory_snapshot')
+    stock = models.IntegerField(default=0)
+    reserved_stock = models.IntegerField(default=0)
+    through = models.DateTimeField(db_index=True, help_text="Movements created up to this moment are included")
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class ProductImage(models.Model):
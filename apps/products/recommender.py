@@ -1,11 +1,22 @@
+import json
+import logging
+import socket
+import threading
+import queue
 import pandas as pd
+from scipy import sparse
 from sqlalchemy import create_engine, text
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import linear_kernel
 from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
 
 class DjangoContentRecommender:
     _instance = None
+    DRIFT_MIN_TOKENS = 500  # Don't judge drift on a handful of words
 
     def __new__(cls):
         if cls._instance is None:
@@ -17,42 +28,282 @@ class DjangoContentRecommender:
         if self.initialized:
             return
         self.vectorizer = TfidfVectorizer(stop_words='english')
-        self.df = None
-        self.tfidf_matrix = None
+        # (df, tfidf_matrix) live in one tuple so a reader can never pair
+        # the DataFrame of one model with the matrix of another.
+        self._state = (None, None)
+        self.model_version = 0
+        self._lock = threading.Lock()
+        self._seen_tokens = 0
+        self._unknown_tokens = 0
         self.initialized = True
 
+    @property
+    def df(self):
+        return self._state[0]
+
+    @property
+    def tfidf_matrix(self):
+        return self._state[1]
+
+    @staticmethod
+    def _load_frame(queryset):
+        df = pd.DataFrame(list(queryset.values('id', 'name', 'category__name', 'description')))
+        if not df.empty:
+            # Create metadata soup
+            df['metadata'] = (
+                df['name'].fillna('') + " " +
+                df['category__name'].fillna('') + " " +
+                df['description'].fillna('')
+            )
+        return df
+
     def train(self):
         """Fetches products from Django ORM and trains the model."""
         from .models import Product  # Lazy import to avoid circular dependency
-        
-        # Querying via ORM is cleaner in Django
-        products = Product.objects.filter(is_active=True).values('id', 'name', 'category__name', 'description')
-        self.df = pd.DataFrame(list(products))
 
-        if self.df.empty:
-            print("⚠️ No products found to train recommender.")
-            return
+        # Holding the lock keeps incremental updates from interleaving with a refit.
+        # Readers never take it, so requests are not blocked.
+        with self._lock:
+            df = self._load_frame(Product.objects.filter(is_active=True))
 
-        # Create metadata soup
-        self.df['metadata'] = (
-            self.df['name'].fillna('') + " " + 
-            self.df['category__name'].fillna('') + " " + 
-            self.df['description'].fillna('')
-        )
-        
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.df['metadata'])
-        print(f"✅ Django Recommender trained with {len(self.df)} products.")
+            if df.empty:
+                print("⚠️ No products found to train recommender.")
+                return
+
+            # Fit on a fresh vectorizer, then swap everything in at once
+            vectorizer = TfidfVectorizer(stop_words='english')
+            tfidf_matrix = vectorizer.fit_transform(df['metadata'])
+            self.vectorizer = vectorizer
+            self._state = (df, tfidf_matrix)
+            self._seen_tokens = self._unknown_tokens = 0
+            self.model_version += 1
+        self._publish_version()
+        print(f"✅ Django Recommender trained with {len(df)} products.")
+
+    def update_products(self, product_ids):
+        """
+        Re-index only the given products using the already fitted vocabulary.
+        Changed rows are replaced, new ones appended, inactive/deleted ones dropped.
+        Returns True when vocabulary drift says a full refit is due.
+        """
+        from .models import Product
+
+        with self._lock:
+            df, tfidf_matrix = self._state
+            if df is None:
+                return False  # Nothing trained in this process yet
+
+            product_ids = set(int(pid) for pid in product_ids)
+            changed = self._load_frame(Product.objects.filter(id__in=product_ids, is_active=True))
+
+            keep = ~df['id'].isin(product_ids).to_numpy()
+            frames, matrices = [df[keep]], [tfidf_matrix[keep]]
+            if not changed.empty:
+                frames.append(changed)
+                matrices.append(self.vectorizer.transform(changed['metadata']))
+                self._track_drift(changed['metadata'])
+
+            self._state = (
+                pd.concat(frames, ignore_index=True),
+                sparse.vstack(matrices, format='csr'),
+            )
+            self.model_version += 1
+
+            drift = self.vocabulary_drift
+        if not changed.empty or not keep.all():
+            # Neighbour lists may have moved: cached fragments built on the old model are stale
+            self._publish_version()
+        threshold = getattr(settings, 'RECOMMENDER_DRIFT_THRESHOLD', 0.15)
+        return self._seen_tokens >= self.DRIFT_MIN_TOKENS and drift > threshold
+
+    @staticmethod
+    def _publish_version():
+        """Let every process know cached recommendation fragments are stale after a refit or an update."""
+        from .services import ProductCacheService
+        ProductCacheService.bump_recommender_version()
+
+    def _track_drift(self, documents):
+        analyzer = self.vectorizer.build_analyzer()
+        vocabulary = self.vectorizer.vocabulary_
+        for doc in documents:
+            tokens = analyzer(doc)
+            self._seen_tokens += len(tokens)
+            self._unknown_tokens += sum(1 for t in tokens if t not in vocabulary)
+
+    @property
+    def vocabulary_drift(self):
+        """Share of tokens seen since the last fit that the vocabulary doesn't know."""
+        if not self._seen_tokens:
+            return 0.0
+        return self._unknown_tokens / self._seen_tokens
 
     def get_recommendations(self, product_id, n=4):
-        if self.df is None or self.tfidf_matrix is None:
+        # Take one consistent snapshot of the model
+        df, tfidf_matrix = self._state
+        if df is None or tfidf_matrix is None:
             return []
         try:
-            idx = self.df.index[self.df['id'] == product_id][0]
-            cosine_sim = linear_kernel(self.tfidf_matrix[idx], self.tfidf_matrix).flatten()
+            idx = df.index[df['id'] == product_id][0]
+            cosine_sim = linear_kernel(tfidf_matrix[idx], tfidf_matrix).flatten()
             related_indices = cosine_sim.argsort()[:-(n+2):-1]
-            return [int(self.df.iloc[i]['id']) for i in related_indices if self.df.iloc[i]['id'] != product_id]
+            return [int(df.iloc[i]['id']) for i in related_indices if df.iloc[i]['id'] != product_id]
         except (IndexError, Exception):
             return []
 
+    def get_recommendations_batch(self, product_ids, n=4):
+        """Returns {product_id: [recommended ids]} for several products."""
+        return {pid: self.get_recommendations(pid, n=n) for pid in product_ids}
+
+
+def parse_server_address(address):
+    """
+    'unix:/run/recommender.sock' -> (AF_UNIX, '/run/recommender.sock')
+    '127.0.0.1:8765'             -> (AF_INET, ('127.0.0.1', 8765))
+    """
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+class RecommenderClient:
+    """
+    Talks to the shared recommendation server (see run_recommender_server).
+    Same interface as DjangoContentRecommender, so views don't care which one they get.
+    If the server is slow or down we serve the last good answer from the cache.
+    """
+    FALLBACK_TTL = 86400  # 1 day
+
+    def __init__(self, address, timeout=0.25):
+        self.address = address
+        self.timeout = timeout
+
+    def _request(self, payload):
+        family, target = parse_server_address(self.address)
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(target)
+            sock.sendall(json.dumps(payload).encode() + b'\n')
+            with sock.makefile('rb') as stream:
+                line = stream.readline()
+        if not line:
+            raise ConnectionError("Recommender server closed the connection")
+        return json.loads(line)
+
+    @staticmethod
+    def _fallback_key(product_id, n):
+        return f'recommendations_{product_id}_{n}'
+
+    def get_recommendations_batch(self, product_ids, n=4):
+        product_ids = [int(pid) for pid in product_ids]
+        try:
+            response = self._request({'op': 'recommend', 'product_ids': product_ids, 'n': n})
+            results = {int(pid): ids for pid, ids in response['recommendations'].items()}
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Recommender server unavailable ({e}), using cached fallback.")
+            cached = cache.get_many([self._fallback_key(pid, n) for pid in product_ids])
+            return {pid: cached.get(self._fallback_key(pid, n), []) for pid in product_ids}
+
+        cache.set_many(
+            {self._fallback_key(pid, n): ids for pid, ids in results.items()},
+            self.FALLBACK_TTL
+        )
+        return results
+
+    def get_recommendations(self, product_id, n=4):
+        return self.get_recommendations_batch([product_id], n=n).get(int(product_id), [])
+
+    def update(self, product_ids):
+        """Hand changed products to the server's incremental indexer."""
+        try:
+            self._request({'op': 'update', 'product_ids': [int(pid) for pid in product_ids]})
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not send recommender update: {e}")
+            return False
+
+    def reload(self):
+        """Ask the server to retrain. The old model keeps serving until the new one is ready."""
+        try:
+            return self._request({'op': 'reload'}).get('status') == 'success'
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not reach recommender server for reload: {e}")
+            return False
+
+
+def get_recommender():
+    """Returns the shared server client when configured, otherwise the in-process engine."""
+    address = getattr(settings, 'RECOMMENDER_SERVER_ADDRESS', '')
+    if address:
+        return RecommenderClient(address, timeout=getattr(settings, 'RECOMMENDER_SERVER_TIMEOUT', 0.25))
+    return recommender_engine
+
+
+class RecommenderIndexer:
+    """
+    Applies product changes to the recommender off the request thread.
+    Ids are queued, drained in batches by a daemon thread, and either applied to
+    the local engine or forwarded to the shared recommender server.
+    """
+
+    def __init__(self, engine, local_only=False):
+        self.engine = engine
+        self.local_only = local_only  # True inside the recommender server itself
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def schedule(self, product_ids):
+        for pid in product_ids:
+            self._queue.put(int(pid))
+        self._ensure_started()
+
+    def flush(self):
+        """Block until everything queued so far has been applied (used by commands)."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='recommender-indexer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        from django.db import connection
+        while True:
+            batch = {self._queue.get()}
+            while True:
+                try:
+                    batch.add(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            except Exception as e:
+                logger.error(f"Incremental recommender update failed: {e}")
+            finally:
+                connection.close()
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _apply(self, product_ids):
+        recommender = None if self.local_only else get_recommender()
+        if isinstance(recommender, RecommenderClient):
+            recommender.update(product_ids)
+            return
+        if self.engine.update_products(product_ids):
+            logger.info(
+                f"Vocabulary drift {self.engine.vocabulary_drift:.0%} over threshold, running full refit."
+            )
+            self.engine.train()
+
+
 # Create a global instance
-recommender_engine = DjangoContentRecommender()
\ No newline at end of file
+recommender_engine = DjangoContentRecommender()
+recommender_indexer = RecommenderIndexer(recommender_engine)
+
+
+def schedule_recommender_update(product_ids):
+    """Non-blocking entry point for signals and import jobs."""
+    recommender_indexer.schedule(product_ids)
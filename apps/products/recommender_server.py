@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+
+from .recommender import recommender_engine, parse_server_address, RecommenderIndexer
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationRequestHandler(socketserver.StreamRequestHandler):
+    """
+    One JSON object per line in, one JSON object per line out.
+      {"op": "recommend", "product_ids": [1, 2], "n": 4}
+      {"op": "update", "product_ids": [3]}
+      {"op": "reload"}
+      {"op": "status"}
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except (ValueError, TypeError, KeyError) as e:
+                response = {'status': 'error', 'message': str(e)}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class RecommenderServerMixin:
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def setup_engine(self, engine):
+        self.engine = engine
+        self.indexer = RecommenderIndexer(engine, local_only=True)
+        self._reload_lock = threading.Lock()
+
+    def dispatch(self, payload):
+        op = payload.get('op', 'recommend')
+
+        if op == 'recommend':
+            n = int(payload.get('n', 4))
+            results = self.engine.get_recommendations_batch(
+                [int(pid) for pid in payload['product_ids']], n=n
+            )
+            return {
+                'status': 'success',
+                'model_version': self.engine.model_version,
+                'recommendations': {str(pid): ids for pid, ids in results.items()},
+            }
+
+        if op == 'update':
+            self.indexer.schedule(payload['product_ids'])
+            return {'status': 'success', 'model_version': self.engine.model_version}
+
+        if op == 'reload':
+            self.reload_in_background()
+            return {'status': 'success', 'model_version': self.engine.model_version}
+
+        if op == 'status':
+            df = self.engine.df
+            return {
+                'status': 'success',
+                'model_version': self.engine.model_version,
+                'products': 0 if df is None else len(df),
+                'vocabulary_drift': round(self.engine.vocabulary_drift, 4),
+            }
+
+        return {'status': 'error', 'message': f'Unknown op: {op}'}
+
+    def reload_in_background(self):
+        """Retrain without blocking requests; train() swaps the new model in atomically."""
+        if not self._reload_lock.acquire(blocking=False):
+            return  # A reload is already running
+        def _run():
+            from django.db import connection
+            try:
+                self.engine.train()
+            except Exception as e:
+                logger.error(f"Recommender reload failed: {e}")
+            finally:
+                connection.close()
+                self._reload_lock.release()
+        threading.Thread(target=_run, daemon=True).start()
+
+
+class UnixRecommenderServer(RecommenderServerMixin, socketserver.ThreadingUnixStreamServer):
+    pass
+
+
+class TCPRecommenderServer(RecommenderServerMixin, socketserver.ThreadingTCPServer):
+    pass
+
+
+def create_server(address, engine=None):
+    family, target = parse_server_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.unlink(target)  # Stale socket from a previous run
+        server = UnixRecommenderServer(target, RecommendationRequestHandler)
+    else:
+        server = TCPRecommenderServer(target, RecommendationRequestHandler)
+    server.setup_engine(engine or recommender_engine)
+    return server
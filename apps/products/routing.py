@@ -3,4 +3,6 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/products/(?P<product_id>\w+)/$', consumers.ProductConsumer.as_asgi()),
+    # Many products over one socket (subscribe/unsubscribe messages)
+    re_path(r'ws/stock/$', consumers.ProductStreamConsumer.as_asgi()),
 ]
\ No newline at end of file
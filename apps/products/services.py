@@ -1,12 +1,32 @@
 import logging
+import time
 from datetime import timedelta
+from django.conf import settings
 from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from apps.notifications import cdc, outbox
 from .models import Product, Category
+from .microcache import MicroCache
 
 logger = logging.getLogger(__name__)
 
+
+def _load_available_stock(product_id):
+    row = Product.objects.filter(id=product_id).values_list('stock', 'reserved_stock').first()
+    return None if row is None else max(0, row[0] - row[1])
+
+
+# Polling reads (check_stock) share one PK read per product per TTL per process
+stock_microcache = MicroCache(
+    'stock',
+    _load_available_stock,
+    ttl=max(settings.STOCK_MICROCACHE_TTL, 0.25),
+    wait_timeout=settings.STOCK_MICROCACHE_WAIT_TIMEOUT,
+)
+
 class ProductCacheService:
     """
     Handles caching for Product reads.
@@ -14,6 +34,11 @@ class ProductCacheService:
     """
     TTL_DETAIL = 3600  # 1 hour
     TTL_LIST = 1800    # 30 mins
+    TTL_RECOMMENDATIONS = 86400  # 1 day, versions take care of freshness
+
+    RECOMMENDER_VERSION_KEY = 'recommender_model_version'
+    PRODUCT_LIST_VERSION_KEY = 'product_list_version'
+    CATEGORY_LIST_VERSION_KEY = 'category_list_version'
     
     @staticmethod
     def get_cached_product_detail(product_id):
@@ -25,22 +50,40 @@ class ProductCacheService:
             
         try:
             product = Product.objects.select_related('category').get(id=product_id, is_active=True)
-            data = {
-                'id': product.id,
-                'name': product.name,
-                'slug': product.slug,
-                'description': product.description,
-                'price': str(product.price),
-                'category': {'name': product.category.name, 'slug': product.category.slug},
-                'image': product.image.url if product.image else None,
-                # NOTE: We do not cache 'stock' here to avoid showing stale data.
-                # Stock is fetched real-time via API or WebSocket.
-            }
+            data = ProductCacheService._product_detail_data(product)
             cache.set(key, data, ProductCacheService.TTL_DETAIL)
             return data
         except Product.DoesNotExist:
             return None
 
+    @staticmethod
+    def _product_detail_data(product):
+        return {
+            'id': product.id,
+            'name': product.name,
+            'slug': product.slug,
+            'description': product.description,
+            'price': str(product.price),
+            'category': {'name': product.category.name, 'slug': product.category.slug},
+            'image': product.image.url if product.image else None,
+            # NOTE: We do not cache 'stock' here to avoid showing stale data.
+            # Stock is fetched real-time via API or WebSocket.
+        }
+
+    @staticmethod
+    def warm_product_details(product_ids):
+        """Rebuild product_detail_<id> for many products with one query and one SET."""
+        product_ids = set(product_ids)
+        products = Product.objects.select_related('category').filter(id__in=product_ids, is_active=True)
+        data = {f'product_detail_{p.id}': ProductCacheService._product_detail_data(p) for p in products}
+        if data:
+            cache.set_many(data, ProductCacheService.TTL_DETAIL)
+        # Deleted or deactivated: make sure nothing stale is left behind
+        gone = [f'product_detail_{pid}' for pid in product_ids if f'product_detail_{pid}' not in data]
+        if gone:
+            cache.delete_many(gone)
+        return len(data)
+
     @staticmethod
     def invalidate_product_cache(product_id):
         """Call this on Product save/delete."""
@@ -61,6 +104,17 @@ class ProductCacheService:
         except Product.DoesNotExist:
             return False, 0
 
+    @staticmethod
+    def check_polled_stock(product_id, quantity):
+        """
+        For polling UIs only: up to STOCK_MICROCACHE_TTL stale, concurrent
+        requests coalesced. Checkout must use check_real_time_stock / row locks.
+        """
+        available = stock_microcache.get(product_id)
+        if available is None:
+            return False, 0
+        return available >= quantity, available
+
     @staticmethod
     def get_cached_trending_products():
         key = 'trending_products'
@@ -82,4 +136,148 @@ class ProductCacheService:
         
         data = list(trending)
         cache.set(key, data, 3600)
-        return data
\ No newline at end of file
+        return data
+
+    # --- Recommendations fragment ---
+    # The rendered "You Might Also Like" block is cached per product together with
+    # the versions it was built from: the recommender model version and one card
+    # version per recommended product. A hit costs two cache round trips and no DB.
+
+    @staticmethod
+    def _card_version_key(product_id):
+        return f'product_card_version_{product_id}'
+
+    @staticmethod
+    def bump_product_card_version(product_id):
+        """Call when anything shown on a product card (price, image, active flag...) changes."""
+        ProductCacheService.bump_product_card_versions([product_id])
+
+    @staticmethod
+    def bump_product_card_versions(product_ids):
+        now = time.time_ns()
+        cache.set_many({ProductCacheService._card_version_key(pid): now for pid in product_ids}, None)
+
+    @staticmethod
+    def bump_recommender_version():
+        """Call after the recommender is retrained or incrementally updated."""
+        cache.set(ProductCacheService.RECOMMENDER_VERSION_KEY, time.time_ns(), None)
+
+    @staticmethod
+    def get_recommendations_fragment(product_id):
+        key = f'recommendations_fragment_{product_id}'
+        cached = cache.get_many([key, ProductCacheService.RECOMMENDER_VERSION_KEY])
+        model_version = cached.get(ProductCacheService.RECOMMENDER_VERSION_KEY, 0)
+        entry = cached.get(key)
+
+        if entry and entry['model_version'] == model_version:
+            dep_keys = {ProductCacheService._card_version_key(pid): v for pid, v in entry['deps'].items()}
+            current = cache.get_many(list(dep_keys))
+            if all(current.get(k, 0) == v for k, v in dep_keys.items()):
+                return mark_safe(entry['html'])
+
+        # Miss or stale: ask the recommender and render the cards
+        from .recommender import get_recommender
+        rec_ids = get_recommender().get_recommendations(product_id)
+
+        # Read versions before the DB so a concurrent change can only make us
+        # store an already-stale entry, never hide a newer one.
+        # Every recommended id is tracked (not only active ones) so a product
+        # coming back online also invalidates this fragment.
+        versions = cache.get_many([ProductCacheService._card_version_key(pid) for pid in rec_ids])
+        deps = {pid: versions.get(ProductCacheService._card_version_key(pid), 0) for pid in rec_ids}
+
+        recommendations = list(
+            Product.objects.filter(id__in=rec_ids, is_active=True).prefetch_related('images')[:4]
+        )
+        html = render_to_string('products/partials/recommendations.html', {'recommendations': recommendations})
+        if not rec_ids:
+            # Untrained model or server fallback miss; don't pin an empty block for a day
+            return html
+        cache.set(
+            key,
+            {'model_version': model_version, 'deps': deps, 'html': str(html)},
+            ProductCacheService.TTL_RECOMMENDATIONS
+        )
+        return html
+
+    # --- API versions (conditional GET) ---
+    # Versions are bump timestamps in ns, so they double as Last-Modified.
+    # The API builds ETags from them and answers 304s without touching the DB.
+
+    @staticmethod
+    def _product_version_key(product_id):
+        return f'product_version_{product_id}'
+
+    @staticmethod
+    def bump_product_version(product_id):
+        """Call on any product change, stock included (the API exposes stock)."""
+        ProductCacheService.bump_product_versions([product_id])
+
+    @staticmethod
+    def bump_product_versions(product_ids):
+        """bump_product_version for many products in two cache round trips (bulk writes)."""
+        now = time.time_ns()
+        cache.set_many({
+            **{ProductCacheService._product_version_key(pid): now for pid in product_ids},
+            ProductCacheService.PRODUCT_LIST_VERSION_KEY: now,
+        }, None)
+        cache.delete_many([f'product_detail_{pid}' for pid in product_ids])
+
+    @staticmethod
+    def bump_category_version():
+        """Product payloads embed their category, so lists move too."""
+        now = time.time_ns()
+        cache.set_many({
+            ProductCacheService.CATEGORY_LIST_VERSION_KEY: now,
+            ProductCacheService.PRODUCT_LIST_VERSION_KEY: now,
+        }, None)
+
+    @staticmethod
+    def _get_version(key):
+        version = cache.get(key)
+        if version is None:
+            # Cold or evicted: start a fresh version rather than reading the DB. It expires
+            # (bumps don't): any id can be requested, including ids that don't exist, and a
+            # restarted version only costs clients a full response.
+            cache.add(key, time.time_ns(), ProductCacheService.TTL_DETAIL)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def get_product_version(product_id):
+        return ProductCacheService._get_version(ProductCacheService._product_version_key(product_id))
+
+    @staticmethod
+    def get_product_list_version():
+        return ProductCacheService._get_version(ProductCacheService.PRODUCT_LIST_VERSION_KEY)
+
+    @staticmethod
+    def get_category_list_version():
+        return ProductCacheService._get_version(ProductCacheService.CATEGORY_LIST_VERSION_KEY)
+
+
+def stock_changed(products, fields=('reserved_stock',)):
+    """
+    What a stock-only Product.save() triggers, for writes that go around
+    save() (queryset updates): the outbox stock event and the CDC record in
+    the caller's transaction, then after commit the API version bump and
+    this process's micro-cache entry. products carry their new counters.
+    """
+    product_ids = []
+    for product in products:
+        if not settings.STOCK_NOTIFY_ENABLED:  # Otherwise the database trigger announces it
+            outbox.record(
+                outbox.STOCK_CHANGED,
+                {'product_id': product.pk, 'available_stock': product.available_stock},
+                aggregate_id=product.pk,
+            )
+        cdc.capture('product', product.pk, fields)
+        product_ids.append(product.pk)
+
+    def _after_commit():
+        for product_id in product_ids:
+            ProductCacheService.bump_product_version(product_id)
+            stock_microcache.invalidate(product_id)
+
+    if product_ids:
+        transaction.on_commit(_after_commit)
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.notifications import outbox
+from .ledger import record_movements
+from .models import Category, InventoryMovement, Product, ProductImage
+from .recommender import schedule_recommender_update
+from .services import ProductCacheService, stock_microcache
+
+# Only these fields feed the recommender's text features
+RECOMMENDER_FIELDS = {'name', 'description', 'category', 'is_active'}
+# Fields rendered on a recommendation card
+CARD_FIELDS = {'name', 'slug', 'price', 'image', 'is_active'}
+STOCK_FIELDS = {'stock', 'reserved_stock'}
+
+
+@receiver(post_save, sender=Product)
+def queue_recommender_update(sender, instance, update_fields=None, **kwargs):
+    """
+    Re-index the product after the transaction commits.
+    Stock-only saves (reserve/release) are skipped.
+    """
+    if update_fields and not RECOMMENDER_FIELDS.intersection(update_fields):
+        return
+    product_id = instance.pk
+    transaction.on_commit(lambda: schedule_recommender_update([product_id]))
+
+
+@receiver(post_delete, sender=Product)
+def queue_recommender_removal(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: schedule_recommender_update([product_id]))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_card_version(sender, instance, update_fields=None, **kwargs):
+    """Invalidate cached recommendation fragments that show this product."""
+    if update_fields and not CARD_FIELDS.intersection(update_fields):
+        return
+    product_id = instance.pk
+    transaction.on_commit(lambda: ProductCacheService.bump_product_card_version(product_id))
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def bump_card_version_on_image_change(sender, instance, **kwargs):
+    product_id = instance.product_id
+    transaction.on_commit(lambda: ProductCacheService.bump_product_card_version(product_id))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_api_version(sender, instance, **kwargs):
+    """Every change counts here, stock included: the API serves stock."""
+    product_id = instance.pk
+
+    def _after_commit():
+        ProductCacheService.bump_product_version(product_id)
+        stock_microcache.invalidate(product_id)  # Only this process; others age out within the TTL
+
+    transaction.on_commit(_after_commit)
+
+
+@receiver(post_save, sender=Product)
+def broadcast_stock_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Live stock for open pages: an outbox event in the saving transaction,
+    relayed to StockBroadcaster. Queryset updates of the counters go through
+    services.stock_changed(); with STOCK_NOTIFY_ENABLED the database trigger
+    and listen_stock_changes cover every write instead.
+    """
+    if settings.STOCK_NOTIFY_ENABLED:
+        return
+    if created or (update_fields and not STOCK_FIELDS.intersection(update_fields)):
+        return
+    outbox.record(
+        outbox.STOCK_CHANGED,
+        {'product_id': instance.pk, 'available_stock': instance.available_stock},
+        aggregate_id=instance.pk,
+    )
+
+
+@receiver(post_save, sender=Product)
+def record_initial_stock(sender, instance, created=False, raw=False, **kwargs):
+    """A new product's starting stock is its first ledger movement."""
+    if created and not raw:
+        record_movements([InventoryMovement(
+            product_id=instance.pk, kind=InventoryMovement.RESTOCK,
+            stock_delta=instance.stock, reserved_delta=instance.reserved_stock,
+        )])
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def bump_product_api_version_on_image_change(sender, instance, **kwargs):
+    product_id = instance.product_id
+    transaction.on_commit(lambda: ProductCacheService.bump_product_version(product_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_api_version(sender, instance, **kwargs):
+    transaction.on_commit(ProductCacheService.bump_category_version)
@@ -12,4 +12,15 @@ urlpatterns = [
     # New: Submit Review
     path('product/<slug:slug>/review/', views.submit_review, name='submit_review'),
     path('top-rated/', views.top_rated_product, name='top_rated'),
+
+    # JSON for frontend polling (ETag/Last-Modified aware)
+    path('api/product/<int:product_id>/', views.get_product_detail_api, name='product_detail_api'),
+    path('api/stock/<int:product_id>/', views.check_stock, name='check_stock'),
+    path('api/stock/metrics/', views.stock_microcache_metrics, name='stock_metrics'),
+    path('api/stock/broadcast-metrics/', views.stock_broadcast_metrics, name='stock_broadcast_metrics'),
+    path('api/stock/reconciliation/', views.stock_reconciliation_report, name='stock_reconciliation_report'),
+    path('api/stock/ledger/', views.stock_ledger_balances, name='stock_ledger_balances'),
+
+    # Partner feed: full or incremental catalog export (streamed)
+    path('catalog/export/', views.export_catalog_view, name='catalog_export'),
 ]
\ No newline at end of file
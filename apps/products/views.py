@@ -1,19 +1,26 @@
 import json
 import logging
-from django.http import JsonResponse
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.views.generic import ListView, DetailView
-from django.views.decorators.http import require_http_methods, require_POST
+from django.views.decorators.http import condition, require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
 from django.shortcuts import redirect, render
 from django.contrib import messages
+from django_ecommerce.encoders import JsonResponse
 from .forms import ProductReviewForm
 from django.db.models import Avg,Count
 from .models import Product, Category
 from .services import ProductCacheService
-from .recommender import recommender_engine
+from .exporters import FORMATS, export_catalog
+from .api.conditional import api_cache_control, version_to_datetime
 
 
 
@@ -62,24 +69,21 @@ class ProductDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         product = self.object
 
-        # Fetch IDs directly from the local engine
-        rec_ids = recommender_engine.get_recommendations(product.id)
-        
-        # Get full objects for the template
-        context['recommendations'] = Product.objects.filter(
-            id__in=rec_ids, 
-            is_active=True
-        ).prefetch_related('images')[:4]
+        # Pre-rendered cards from cache; only a miss touches the recommender and DB
+        context['recommendations_html'] = ProductCacheService.get_recommendations_fragment(product.id)
 
         return context
+# Polled every few seconds by product pages: no request transaction, micro-cached read
+@transaction.non_atomic_requests
 @require_http_methods(["GET"])
 def check_stock(request, product_id):
     """
     Simple API to check stock count.
+    Display only, may be up to STOCK_MICROCACHE_TTL stale; checkout re-checks under lock.
     """
     try:
         qty = int(request.GET.get('quantity', 1))
-        is_avail, stock = ProductCacheService.check_real_time_stock(product_id, qty)
+        is_avail, stock = ProductCacheService.check_polled_stock(product_id, qty)
         
         return JsonResponse({
             'product_id': product_id,
@@ -91,8 +95,99 @@ def check_stock(request, product_id):
         return JsonResponse({'error': 'Invalid quantity'}, status=400)
 
 
+@staff_member_required
+@require_http_methods(["GET"])
+def stock_microcache_metrics(request):
+    """Coalescing ratio, hit ratio and staleness of the check_stock micro-cache."""
+    from .services import stock_microcache
+    return JsonResponse({
+        'ttl_seconds': stock_microcache.ttl,
+        'process': stock_microcache.metrics(),
+        'all_workers': stock_microcache.shared_metrics(),
+    })
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def stock_broadcast_metrics(request):
+    """Messages saved by coalescing stock broadcasts."""
+    from .broadcast import stock_broadcaster
+    return JsonResponse({
+        'window_seconds': stock_broadcaster.window,
+        'process': stock_broadcaster.metrics(),
+        'all_workers': stock_broadcaster.shared_metrics(),
+    })
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def stock_reconciliation_report(request):
+    """Drift found (and fixed) by the last inventory reconciliation run."""
+    from apps.cart.reconciliation import last_report
+    return JsonResponse({'last_run': last_report()})
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def stock_ledger_balances(request):
+    """
+    Stock balances rebuilt from the inventory ledger.
+    ?at=<ISO 8601> for any past moment (default: now), ?products=1,2,3 to narrow.
+    """
+    from .ledger import balances, balances_as_of
+    at = None
+    if request.GET.get('at'):
+        at = parse_datetime(request.GET['at'])
+        if at is None:
+            return JsonResponse({'error': 'Invalid timestamp'}, status=400)
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+    product_ids = None
+    if request.GET.get('products'):
+        try:
+            product_ids = [int(product_id) for product_id in request.GET['products'].split(',')]
+        except ValueError:
+            return JsonResponse({'error': 'Invalid product ids'}, status=400)
+
+    try:
+        rebuilt = balances(product_ids) if at is None else balances_as_of(at, product_ids)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({
+        'at': (at or timezone.now()).isoformat(),
+        'balances': {
+            str(product_id): {'stock': stock, 'reserved_stock': reserved}
+            for product_id, (stock, reserved) in sorted(rebuilt.items())
+        },
+    })
+
+
+def _product_detail_version(request, product_id):
+    """
+    Versions start lazily for any id, so only products that exist get one:
+    a missing or deactivated product has no validators and always gets its 404.
+    """
+    if not hasattr(request, '_product_detail_version'):
+        exists = ProductCacheService.get_cached_product_detail(product_id) is not None
+        request._product_detail_version = ProductCacheService.get_product_version(product_id) if exists else None
+    return request._product_detail_version
+
+
+def _product_detail_etag(request, product_id):
+    version = _product_detail_version(request, product_id)
+    return str(version) if version is not None else None
+
+
+def _product_detail_last_modified(request, product_id):
+    version = _product_detail_version(request, product_id)
+    return version_to_datetime(version) if version is not None else None
+
+
 # FIX: Added the Missing Function Here
+@transaction.non_atomic_requests
 @require_http_methods(["GET"])
+@api_cache_control('get_product_detail_api')
+@condition(etag_func=_product_detail_etag, last_modified_func=_product_detail_last_modified)
 def get_product_detail_api(request, product_id):
     """
     Internal API used by Frontend JS to fetch product details + REAL-TIME stock
@@ -208,4 +303,46 @@ def top_rated_product(request):
     context = {
         'product': top_product
     }
-    return render(request, 'products/top_rated.html', context)
\ No newline at end of file
+    return render(request, 'products/top_rated.html', context)
+
+
+def _can_export_catalog(request):
+    """Staff users, or partners presenting CATALOG_EXPORT_TOKEN as 'Authorization: Token <token>'."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.CATALOG_EXPORT_TOKEN
+    header = request.headers.get('Authorization', '')
+    return bool(token) and constant_time_compare(header, f'Token {token}')
+
+
+# Streaming runs after the view returns, so don't hold a request transaction open
+@transaction.non_atomic_requests
+@require_http_methods(["GET"])
+def export_catalog_view(request):
+    """
+    Full or incremental catalog feed, streamed row by row.
+    ?format=csv|jsonl  &gzip=1  &updated_since=2025-01-01T00:00:00Z
+    """
+    if not _can_export_catalog(request):
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return JsonResponse({'status': 'error', 'message': 'Unsupported format'}, status=400)
+
+    updated_since = None
+    if request.GET.get('updated_since'):
+        updated_since = parse_datetime(request.GET['updated_since'])
+        if updated_since is None:
+            return JsonResponse({'status': 'error', 'message': 'Invalid updated_since'}, status=400)
+        if timezone.is_naive(updated_since):
+            updated_since = timezone.make_aware(updated_since)
+
+    compress = request.GET.get('gzip') in ('1', 'true')
+    response = StreamingHttpResponse(
+        export_catalog(fmt, updated_since=updated_since, compress=compress),
+        content_type='application/gzip' if compress else FORMATS[fmt],
+    )
+    filename = f"catalog.{fmt}" + (".gz" if compress else "")
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
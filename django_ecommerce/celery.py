@@ -26,8 +26,43 @@ app.conf.beat_schedule = {
         'task': 'apps.notifications.tasks.update_trending_products',
         'schedule': crontab(minute=0), # Every hour
     },
-    'cleanup-abandoned-carts': {
-        'task': 'apps.notifications.tasks.cleanup_abandoned_carts',
-        'schedule': crontab(minute='*/30'), # Every 30 minutes
+    'release-expired-reservations': {
+        'task': 'apps.notifications.tasks.release_expired_reservations',
+        'schedule': 60.0, # Every minute
     },
-}
\ No newline at end of file
+    'reconcile-inventory': {
+        'task': 'apps.notifications.tasks.reconcile_inventory',
+        'schedule': crontab(minute='*/15'), # Every 15 minutes
+    },
+    'compact-inventory-ledger': {
+        'task': 'apps.notifications.tasks.compact_inventory_ledger',
+        'schedule': crontab(minute='*/5'), # Every 5 minutes
+    },
+    'archive-inventory-ledger-nightly': {
+        'task': 'apps.notifications.tasks.archive_inventory_ledger',
+        'schedule': crontab(minute=45, hour=3), # 03:45 every night
+    },
+    'regenerate-catalog-feeds-nightly': {
+        'task': 'apps.notifications.tasks.regenerate_catalog_feeds',
+        'schedule': crontab(minute=30, hour=2), # 02:30 every night
+    },
+    'relay-outbox-events': {
+        'task': 'apps.notifications.tasks.relay_outbox_events',
+        'schedule': 30.0, # Every 30 seconds; backs up the relay_outbox process
+    },
+    'purge-outbox-events-daily': {
+        'task': 'apps.notifications.tasks.purge_outbox_events',
+        'schedule': crontab(minute=15, hour=3), # 03:15 every night
+    },
+}
+
+
+@app.on_after_configure.connect
+def schedule_cart_write_behind(sender, **kwargs):
+    # Settings aren't loaded yet when this module is imported
+    if settings.CART_BACKEND.endswith('RedisCartBackend'):
+        sender.add_periodic_task(
+            settings.CART_WRITE_BEHIND_INTERVAL,
+            sender.signature('apps.notifications.tasks.flush_cart_write_behind'),
+            name='flush-cart-write-behind',
+        )
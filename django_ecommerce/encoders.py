@@ -0,0 +1,72 @@
+"""
+Fast JSON encoding for API responses.
+
+Uses orjson when it is installed and the stdlib otherwise. Both produce the
+same bytes as DRF's JSONRenderer with the project settings (compact
+separators, UTF-8, U+2028/U+2029 escaped for JavaScript), so callers can swap
+between them freely. Types JSON has no notation for (Decimal, datetime,
+UUID, lazy strings...) are converted by the given encoder class: DRF's by
+default, DjangoJSONEncoder for plain Django views.
+"""
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through the encoder class so they keep its format (ms, 'Z')
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_default_encoders = {}
+
+
+def _escape_line_separators(content):
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def _stdlib_dumps(data, encoder):
+    return json.dumps(
+        data, cls=encoder, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def dumps(data, encoder=JSONEncoder):
+    """Encode data to UTF-8 JSON bytes."""
+    if orjson is None:
+        return _escape_line_separators(_stdlib_dumps(data, encoder))
+
+    if encoder not in _default_encoders:
+        _default_encoders[encoder] = encoder().default
+    try:
+        content = orjson.dumps(data, default=_default_encoders[encoder], option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        # Integers beyond 64 bits and other corners orjson refuses
+        content = _stdlib_dumps(data, encoder)
+    return _escape_line_separators(content)
+
+
+def loads(content):
+    """Decode UTF-8 JSON bytes (or str)."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class JsonResponse(HttpResponse):
+    """
+    Drop-in for django.http.JsonResponse on the fast encoder. Keeps
+    DjangoJSONEncoder semantics (Decimal as string) so payloads don't change.
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the safe parameter to False."
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data, encoder=encoder), **kwargs)
@@ -0,0 +1,211 @@
+"""
+Sparse fieldsets for the REST API: ?fields= and ?expand=.
+
+    ?fields=id,name,price,thumbnail        only these fields
+    ?fields=id,items.quantity,items.product.name
+                                          dotted names select inside nested objects
+    ?expand=items,items.product           nested relations listed here are rendered
+                                          in full, the others collapse to their ids
+                                          (without ?expand everything stays nested)
+
+Serializers opt in with SparseFieldsetMixin; views with SparseFieldsetViewMixin,
+which also trims the queryset to the columns and prefetches the response needs.
+Properties and other computed fields declare what they read in
+Meta.field_sources, e.g. {'available_stock': ['stock', 'reserved_stock']}.
+Fields listed in Meta.optional_fields are only sent when asked for by name.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+
+def parse_paths(value):
+    """'id,items.product.name' -> {'id': {}, 'items': {'product': {'name': {}}}}"""
+    tree = {}
+    for path in filter(None, (part.strip() for part in value.split(','))):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _merge(tree, path, subtree=None):
+    for name in path:
+        tree = tree.setdefault(name, {})
+    for name, child in (subtree or {}).items():
+        _merge(tree, [name], child)
+    return tree
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin: drops unrequested fields and collapses unexpanded
+    relations, based on the 'fieldset' and 'expand' trees in the root context.
+    """
+
+    def _fieldset_path(self):
+        path, node = [], self
+        while node.parent is not None:
+            if node.field_name:  # ListSerializer children are bound with ''
+                path.append(node.field_name)
+            node = node.parent
+        return path[::-1]
+
+    @staticmethod
+    def _subtree(tree, path):
+        for name in path:
+            if tree is None:
+                return None
+            tree = tree.get(name)
+            if tree is None:
+                return None  # Field requested without sub-fields: default set
+        return tree
+
+    def get_fields(self):
+        fields = super().get_fields()
+        path = self._fieldset_path()
+        optional = set(getattr(self.Meta, 'optional_fields', ()))
+
+        selected = self._subtree(self.context.get('fieldset'), path)
+        if selected:
+            unknown = set(selected) - set(fields)
+            if unknown:
+                raise ParseError(f"Unknown fields: {', '.join(sorted('.'.join(path + [n]) for n in unknown))}")
+            fields = {name: field for name, field in fields.items() if name in selected}
+        else:
+            fields = {name: field for name, field in fields.items() if name not in optional}
+
+        expand = self.context.get('expand')
+        if expand is not None:
+            expanded = self._subtree(expand, path) or {}
+            for name, field in list(fields.items()):
+                if isinstance(field, serializers.BaseSerializer) and name not in expanded:
+                    fields[name] = self._collapse(field)
+        return fields
+
+    @staticmethod
+    def _collapse(field):
+        """Nested object(s) -> primary key(s)."""
+        many = isinstance(field, serializers.ListSerializer)
+        return serializers.PrimaryKeyRelatedField(read_only=True, many=many, source=field.source)
+
+
+def _serializer_of(field):
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+def load_tree(serializer):
+    """
+    Model lookups a (bound, already trimmed) serializer will read, as a tree:
+    {'price': {}, 'category': {'name': {}}, 'images': {}}. An empty dict on a
+    relation means "only its id".
+    """
+    tree = {}
+    field_sources = getattr(getattr(serializer, 'Meta', None), 'field_sources', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in field_sources:
+            for lookup in field_sources[name]:
+                _merge(tree, lookup.replace('.', '__').split('__'))
+        elif isinstance(field, serializers.BaseSerializer):
+            _merge(tree, field.source.split('.'), load_tree(_serializer_of(field)))
+        elif field.source != '*':
+            _merge(tree, field.source.split('.'))
+    return tree
+
+
+class QueryPlan:
+    """only()/select_related()/prefetch_related() arguments for a load tree."""
+
+    def __init__(self, model, tree):
+        self.only, self.select_related, self.prefetch_related = [], [], []
+        self.trim = True  # False when something reads a property we can't map to columns
+        self._plan(model, tree, '')
+
+    def _plan(self, model, tree, prefix):
+        for name, subtree in tree.items():
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                self.trim = False
+                continue
+
+            if not field.is_relation or name == getattr(field, 'attname', None) != field.name:
+                self.only.append(prefix + name)
+            elif field.many_to_one or (field.one_to_one and field.concrete):
+                self.only.append(prefix + field.name)
+                if subtree:
+                    self.select_related.append(prefix + field.name)
+                    self._plan(field.related_model, subtree, f'{prefix}{field.name}__')
+            else:
+                # Reverse FK / M2M: its own trimmed queryset, always carrying the join column
+                related = QueryPlan(field.related_model, subtree)
+                if field.one_to_many:
+                    related.only.append(field.field.attname)
+                self.prefetch_related.append(
+                    Prefetch(prefix + name, queryset=related.apply(field.related_model._default_manager.all()))
+                )
+
+    def apply(self, queryset):
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.trim:
+            queryset = queryset.only(*self.only) if self.only else queryset.only('pk')
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        return queryset.prefetch_related(*self.prefetch_related)
+
+    def prefetch(self, instances):
+        """For objects that are already loaded (e.g. the cart from CartService)."""
+        prefetch_related_objects(list(instances), *self.prefetch_related)
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin: parses ?fields=/?expand=, passes them to the serializer context
+    and trims the queryset in filter_queryset(), so views keep their own
+    get_queryset(). Requests without either parameter are unchanged.
+    """
+
+    def get_fieldset_context(self):
+        if not hasattr(self, '_fieldset_context'):
+            params = self.request.query_params
+            self._fieldset_context = {
+                'fieldset': parse_paths(params['fields']) if 'fields' in params else None,
+                'expand': parse_paths(params['expand']) if 'expand' in params else None,
+            }
+        return self._fieldset_context
+
+    def has_fieldset(self):
+        context = self.get_fieldset_context()
+        return context['fieldset'] is not None or context['expand'] is not None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(self.get_fieldset_context())
+        return context
+
+    def get_query_plan(self, serializer_class=None, context=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        context = context or {'request': self.request, **self.get_fieldset_context()}
+        serializer = serializer_class(context=context)
+        return QueryPlan(serializer_class.Meta.model, load_tree(serializer))
+
+    def get_fieldset_serializer(self, serializer_class, instance, **context):
+        """
+        For plain APIViews that already hold the object (e.g. the user's cart).
+        Its relations are prefetched per the plan even without ?fields=, since
+        nothing else would load them in bulk.
+        """
+        context.update(self.get_fieldset_context())
+        if isinstance(instance, models.Model):  # Not e.g. a Redis cart
+            self.get_query_plan(serializer_class, context).prefetch([instance])
+        return serializer_class(instance, context=context)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.has_fieldset():
+            queryset = self.get_query_plan().apply(queryset)
+        return queryset
@@ -0,0 +1,67 @@
+"""
+DRF renderers and parsers on the fast encoder, plus MessagePack.
+
+FastJSONRenderer produces the same bytes as rest_framework's JSONRenderer;
+only ?indent / Accept: ...; indent= requests go through the stdlib one.
+MessagePack (application/msgpack) is negotiated with Accept / Content-Type
+and carries the same primitives as the JSON body: Decimal and datetime values
+are converted exactly like the JSON encoder does.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import encoders
+
+try:
+    import msgpack
+except ImportError:  # Optional content type
+    msgpack = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return encoders.dumps(data, encoder=self.encoder_class)
+
+
+class FastJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoders.orjson is None or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return encoders.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -1,3 +1,4 @@
+import importlib.util
 import os
 from pathlib import Path
 import environ
@@ -62,6 +63,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.cart.middleware.GuestCartMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -130,6 +132,80 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Recommender
+# Leave empty to train the model inside each process. Set to 'unix:/path.sock' or
+# 'host:port' to share one model served by `manage.py run_recommender_server`.
+RECOMMENDER_SERVER_ADDRESS = env('RECOMMENDER_SERVER_ADDRESS', default='')
+RECOMMENDER_SERVER_TIMEOUT = env.float('RECOMMENDER_SERVER_TIMEOUT', default=0.25)
+# Share of unknown tokens in incrementally indexed products that triggers a full refit
+RECOMMENDER_DRIFT_THRESHOLD = env.float('RECOMMENDER_DRIFT_THRESHOLD', default=0.15)
+
+# check_stock polling: per-process micro-cache (seconds, minimum 0.25) + request coalescing
+STOCK_MICROCACHE_TTL = env.float('STOCK_MICROCACHE_TTL', default=0.5)
+STOCK_MICROCACHE_WAIT_TIMEOUT = 2.0  # Followers fall back to their own read after this
+
+# ws/stock/ multiplexed stock stream
+STOCK_STREAM_TICK = env.float('STOCK_STREAM_TICK', default=0.2)  # Seconds between coalesced frames
+STOCK_STREAM_MAX_SUBSCRIPTIONS = 200  # Products per connection
+
+# Stock changes are coalesced per product for this long before broadcasting (100-250ms works well)
+STOCK_BROADCAST_WINDOW = env.float('STOCK_BROADCAST_WINDOW', default=0.15)
+STOCK_BROADCAST_SHARDS = 16  # stock_shard_<n> groups; one group_send per shard per window at most
+STOCK_SUBSCRIBER_TTL = 180  # Subscriber counts expire this long after the consumers' last refresh
+# True when `manage.py listen_stock_changes` runs: the database trigger then covers
+# every write path and the post_save broadcast is turned off
+STOCK_NOTIFY_ENABLED = env.bool('STOCK_NOTIFY_ENABLED', default=False)
+
+# Transactional outbox (apps.notifications.outbox, manage.py relay_outbox)
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_RELAY_INTERVAL = env.float('OUTBOX_RELAY_INTERVAL', default=0.5)  # Idle poll, seconds
+OUTBOX_MAX_ATTEMPTS = 10  # Then the event is left for inspection in the admin
+OUTBOX_LAG_WARNING_SECONDS = 60
+OUTBOX_RETENTION_DAYS = 7  # Published events are purged after this
+
+# Change-data-capture to Redis Streams (apps.notifications.cdc, manage.py consume_cdc)
+CDC_ENABLED = env.bool('CDC_ENABLED', default=True)
+CDC_REDIS_URL = env('CDC_REDIS_URL', default='') or env('REDIS_URL', default='redis://redis:6379/1')
+CDC_STREAM_PREFIX = 'cdc:'
+CDC_STREAM_MAXLEN = 100000  # Per stream, approximate; consumers further behind lose records
+CDC_BATCH_SIZE = 200
+CDC_RETRY_AFTER = 30  # Seconds to stop publishing after Redis errors
+CDC_CONSUMERS = {
+    'product-cache': 'apps.products.cache_warmer.ProductCacheWarmer',
+}
+
+# Cart storage: apps.cart.backends.DatabaseCartBackend or RedisCartBackend (write-behind)
+CART_BACKEND = env('CART_BACKEND', default='apps.cart.backends.DatabaseCartBackend')
+CART_REDIS_URL = env('CART_REDIS_URL', default='') or env('REDIS_URL', default='redis://redis:6379/1')
+CART_REDIS_TTL = 30 * 24 * 3600  # Idle carts leave Redis after this; the tables keep them
+CART_WRITE_BEHIND_INTERVAL = 5.0  # Seconds between write-behind flushes (Celery beat)
+CART_WRITE_BEHIND_BATCH = 500  # Carts per flush
+# Keep Cart.cached_item_count/cached_total_price current (two extra queries per cart
+# change, none per read). Carts with NULL totals fall back to an aggregate query;
+# after running with this off, `refresh_cart_totals` brings the columns up to date.
+CART_DENORMALIZED_TOTALS = env.bool('CART_DENORMALIZED_TOTALS', default=False)
+CART_BULK_MAX_ITEMS = 100  # Lines per POST /api/v1/cart/items/bulk/
+CART_RESERVATION_TTL = 30 * 60  # Seconds a cart line holds stock after the cart's last activity
+CART_RESERVATION_SWEEP_BATCH = 1000  # Reservations released per sweeper transaction
+# Also schedule a delayed Celery task per cart at its expiry (the sweeper alone runs once a minute)
+CART_RESERVATION_EXACT_EXPIRY = env.bool('CART_RESERVATION_EXACT_EXPIRY', default=False)
+INVENTORY_RECONCILE_BATCH = 1000  # Products compared per query by `reconcile_inventory`
+INVENTORY_LEDGER_SETTLE_SECONDS = 60  # Ledger compaction leaves movements this recent for the next run
+INVENTORY_LEDGER_RETENTION_DAYS = 365  # Older monthly partitions are detached for archiving (PostgreSQL)
+GUEST_CART_COOKIE = 'guest_cart'
+GUEST_CART_COOKIE_MAX_ITEMS = 8  # Larger guest carts move from the signed cookie to the cache
+GUEST_CART_TTL = 7 * 24 * 3600
+
+# Sitemaps & product feeds (written by `manage.py generate_feeds`, served as static files)
+SITE_URL = env('SITE_URL', default='http://localhost:8000')
+FEEDS_URL = '/feeds/'
+FEEDS_ROOT = BASE_DIR / 'feeds'
+SITEMAP_CHUNK_SIZE = 50000  # Sitemap protocol limit per file
+FEED_CURRENCY = env('FEED_CURRENCY', default='NPR')
+
+# Catalog export: partners authenticate with 'Authorization: Token <CATALOG_EXPORT_TOKEN>'
+CATALOG_EXPORT_TOKEN = env('CATALOG_EXPORT_TOKEN', default='')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
@@ -166,6 +242,34 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson-backed, byte-compatible with DRF's JSON renderer/parser
+    'DEFAULT_RENDERER_CLASSES': [
+        'django_ecommerce.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'django_ecommerce.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# MessagePack (Accept: application/msgpack) when the optional package is installed
+if importlib.util.find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('django_ecommerce.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('django_ecommerce.renderers.MessagePackParser')
+
+# Catalog API reads build JSON from values() rows instead of ProductSerializer
+API_FAST_PATH = env.bool('API_FAST_PATH', default=True)
+
+# Cache-Control per API view (kwargs for django.utils.cache.patch_cache_control).
+# Responses also carry ETag/Last-Modified, so clients and nginx revalidate cheaply.
+API_CACHE_CONTROL = {
+    'ProductListAPIView': {'public': True, 'max_age': 60},
+    'ProductDetailAPIView': {'public': True, 'max_age': 30},
+    'CategoryListAPIView': {'public': True, 'max_age': 300},
+    # Carries real-time stock: always revalidate
+    'get_product_detail_api': {'no_cache': True},
 }
 
 
@@ -13,21 +13,22 @@ urlpatterns = [
 
     # --- API URLs ---
     # FIX: Changed 'apps.products.api_urls' to 'apps.products.api.urls'
-    # path('api/v1/products/', include('apps.products.api.urls')),
+    path('api/v1/products/', include(('apps.products.api.api_urls', 'products_api'))),
 
     # # Accounts API
     # path('api/v1/accounts/', include('apps.accounts.api_urls')),
     
-    # # Orders API
-    # path('api/v1/orders/', include('apps.orders.api_urls')),
-    
-    # # Cart API (Adding this to ensure Cart API works)
-    # path('api/v1/cart/', include('apps.cart.api_urls')),
+    # Orders API
+    path('api/v1/orders/', include('apps.orders.api.api_urls')),
+
+    # Cart API
+    path('api/v1/cart/', include('apps.cart.api.api_urls')),
 ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    urlpatterns += static(settings.FEEDS_URL, document_root=settings.FEEDS_ROOT)
 
 handler404 = 'django_ecommerce.views.custom_page_not_found_view'
 handler500 = 'django_ecommerce.views.custom_error_view'
@@ -394,6 +394,110 @@ class ProductWebSocketManager {
 // Global WebSocket manager instance
 const productWebSocketManager = new ProductWebSocketManager();
 
+/**
+ * Stock for many products over a single socket (ws/stock/).
+ * Use on listing pages instead of one ProductWebSocketManager connection per card.
+ */
+class ProductStockStream {
+    constructor(manager) {
+        this.manager = manager;
+        this.productIds = new Set();
+        this.ws = null;
+        this.reconnectDelay = 5000;
+    }
+
+    connect() {
+        if (this.ws) {
+            return this.ws;
+        }
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        this.ws = new WebSocket(`${scheme}://${window.location.host}/ws/stock/`);
+
+        this.ws.onopen = () => {
+            // Resubscribe after a reconnect
+            if (this.productIds.size) {
+                this.send('subscribe', [...this.productIds]);
+            }
+        };
+        this.ws.onmessage = (event) => {
+            try {
+                this.handleMessage(JSON.parse(event.data));
+            } catch (error) {
+                console.error('Error parsing stock stream message:', error);
+            }
+        };
+        this.ws.onclose = (event) => {
+            this.ws = null;
+            if (event.code !== 1000) {
+                setTimeout(() => this.connect(), this.reconnectDelay);
+            }
+        };
+        return this.ws;
+    }
+
+    send(action, productIds) {
+        if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            this.ws.send(JSON.stringify({ action: action, product_ids: productIds }));
+        }
+    }
+
+    /**
+     * @param {number[]} productIds - Products to add
+     */
+    subscribe(productIds) {
+        const added = productIds.filter(id => !this.productIds.has(id));
+        added.forEach(id => this.productIds.add(id));
+        this.connect();
+        if (added.length) {
+            this.send('subscribe', added);
+        }
+    }
+
+    /**
+     * @param {number[]} productIds - Products to drop
+     */
+    unsubscribe(productIds) {
+        const removed = productIds.filter(id => this.productIds.delete(id));
+        if (removed.length) {
+            this.send('unsubscribe', removed);
+        }
+    }
+
+    handleMessage(data) {
+        switch (data.type) {
+            case 'initial_stock':
+                data.products.forEach(product => {
+                    this.manager.handleInitialStock(product.product_id, product);
+                });
+                break;
+            case 'stock_updates':
+                data.updates.forEach(update => {
+                    this.manager.handleStockUpdate(update.product_id, {
+                        ...update,
+                        available_stock: update.new_stock,
+                        is_in_stock: update.new_stock > 0
+                    });
+                });
+                break;
+            case 'error':
+                console.warn(`Stock stream: ${data.message}`);
+                break;
+            default:
+                console.warn(`Unknown message type: ${data.type}`);
+        }
+    }
+
+    disconnect() {
+        if (this.ws) {
+            this.ws.close(1000, 'Stream closed');
+            this.ws = null;
+        }
+        this.productIds.clear();
+    }
+}
+
+const productStockStream = new ProductStockStream(productWebSocketManager);
+
 // Utility functions for common WebSocket operations
 function initializeProductWebSocket(productId) {
     return productWebSocketManager.connect(productId);
@@ -410,9 +514,10 @@ function getProductConnectionStatus(productId) {
 // Cleanup on page unload
 window.addEventListener('beforeunload', () => {
     productWebSocketManager.disconnectAll();
+    productStockStream.disconnect();
 });
 
 // Export for use in other modules
 if (typeof module !== 'undefined' && module.exports) {
-    module.exports = { ProductWebSocketManager, productWebSocketManager };
+    module.exports = { ProductWebSocketManager, productWebSocketManager, ProductStockStream, productStockStream };
 }
\ No newline at end of file
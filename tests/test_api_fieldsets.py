@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+
+from apps.cart.services import CartService
+from apps.products.models import Product, Category, ProductImage
+
+User = get_user_model()
+
+
+class SparseFieldsetTestCase(TransactionTestCase):
+    """?fields= / ?expand= on the products and cart APIs."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='fields@example.com', password='testpass123')
+        category = Category.objects.create(name='Audio', slug='audio')
+        self.product = Product.objects.create(
+            name='Headphones', slug='headphones', description='Over-ear',
+            category=category, price='59.90', stock=10, sku='FIELDS-001'
+        )
+        ProductImage.objects.create(product=self.product, image='products/headphones.jpg', is_primary=True)
+        CartService.add_to_cart(self.user, self.product.id, 2)
+
+    def test_product_fields_and_thumbnail(self):
+        response = self.client.get('/api/v1/products/products/?fields=id,name,price,thumbnail')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{
+            'id': self.product.id,
+            'name': 'Headphones',
+            'price': '59.90',
+            'thumbnail': 'http://testserver/media/products/headphones.jpg',
+        }])
+
+    def test_unexpanded_relations_collapse_to_ids(self):
+        response = self.client.get(f'/api/v1/products/products/{self.product.id}/?fields=id,category,images&expand=')
+        data = response.json()
+        self.assertEqual(data['category'], self.product.category_id)
+        self.assertEqual(data['images'], list(self.product.images.values_list('id', flat=True)))
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/v1/products/products/?fields=id,nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cart_nested_fields(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/v1/cart/?fields=total_price,items.quantity,items.product.name')
+        self.assertEqual(response.json(), {
+            'items': [{'product': {'name': 'Headphones'}, 'quantity': 2}],
+            'total_price': '119.80',
+        })
@@ -0,0 +1,107 @@
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from apps.cart import reservations
+from apps.cart.backends import RedisCartBackend
+from apps.cart.models import CartItem, StockReservation
+from apps.products.models import Category, Product
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+User = get_user_model()
+
+
+@unittest.skipIf(fakeredis is None, 'fakeredis is not installed')
+class RedisCartBackendTestCase(TransactionTestCase):
+    """Redis carts keep reservations in step and write back losslessly."""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.backend = RedisCartBackend(client=self.redis)
+        self.user = User.objects.create_user(email='redis-cart@example.com', password='testpass123')
+        category = Category.objects.create(name='Carts', slug='carts')
+        self.phone = Product.objects.create(
+            name='Phone', slug='phone', category=category, price='10.00', stock=5, sku='CART-1'
+        )
+        self.case = Product.objects.create(
+            name='Case', slug='case', category=category, price='2.50', stock=5, sku='CART-2'
+        )
+
+    def reserved(self, product):
+        product.refresh_from_db()
+        return product.reserved_stock
+
+    def test_add_update_remove(self):
+        cart = self.backend.add_to_cart(self.user, self.phone.id, 2)
+        self.assertEqual((cart.item_count, cart.total_price), (2, 20))
+
+        self.backend.add_to_cart(self.user, self.case.id, 1)
+        cart = self.backend.update_quantity(self.user, self.phone.id, 4)
+        self.assertEqual(cart.quantities, {self.phone.id: 4, self.case.id: 1})
+        self.assertEqual(self.reserved(self.phone), 4)
+
+        cart = self.backend.remove_from_cart(self.user, self.case.id)
+        self.assertEqual(self.backend.get_cart(self.user).quantities, {self.phone.id: 4})
+        self.assertEqual(self.reserved(self.case), 0)
+
+    def test_rolled_back_reservation_never_reaches_redis(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.backend.add_to_cart(self.user, self.phone.id, 1)
+                raise RuntimeError
+
+        self.assertEqual(self.backend.get_cart(self.user).item_count, 0)
+        self.assertEqual(self.reserved(self.phone), 0)
+
+    def test_write_behind_and_recovery(self):
+        self.backend.add_to_cart(self.user, self.phone.id, 3)
+        self.backend.add_to_cart(self.user, self.case.id, 1)
+        self.assertFalse(CartItem.objects.exists())  # Nothing written synchronously
+
+        self.assertEqual(self.backend.flush_dirty_carts(), 1)
+        self.assertEqual(
+            dict(CartItem.objects.values_list('product_id', 'quantity')),
+            {self.phone.id: 3, self.case.id: 1},
+        )
+
+        self.redis.flushall()  # Lost Redis: the cart comes back from the tables
+        self.assertEqual(self.backend.get_cart(self.user).quantities, {self.phone.id: 3, self.case.id: 1})
+
+    def test_clear_releases_everything(self):
+        self.backend.add_to_cart(self.user, self.phone.id, 2)
+        self.backend.add_to_cart(self.user, self.case.id, 2)
+
+        self.backend.clear_cart(self.user)
+
+        self.assertEqual(self.backend.get_cart(self.user).item_count, 0)
+        self.assertEqual((self.reserved(self.phone), self.reserved(self.case)), (0, 0))
+
+    def test_merge_caps_at_available_stock(self):
+        self.backend.add_to_cart(self.user, self.phone.id, 4)
+
+        cart, short = self.backend.merge(self.user, {self.phone.id: 3, self.case.id: 2})
+
+        self.assertEqual(cart.quantities, {self.phone.id: 5, self.case.id: 2})
+        self.assertEqual(short, {self.phone.id: 2})
+        self.assertEqual(self.backend.get_cart(self.user).quantities, {self.phone.id: 5, self.case.id: 2})
+        self.assertEqual((self.reserved(self.phone), self.reserved(self.case)), (5, 2))
+
+    def test_expired_lines_leave_the_redis_cart(self):
+        self.backend.add_to_cart(self.user, self.phone.id, 2)
+        self.backend.add_to_cart(self.user, self.case.id, 1)
+        StockReservation.objects.filter(product=self.phone).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        with mock.patch('apps.cart.backends.get_cart_backend', return_value=self.backend):
+            self.assertEqual(reservations.release_expired(), 1)
+
+        self.assertEqual(self.backend.get_cart(self.user).quantities, {self.case.id: 1})
+        self.assertEqual((self.reserved(self.phone), self.reserved(self.case)), (0, 1))
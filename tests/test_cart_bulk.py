@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.cart.models import CartItem
+from apps.cart.services import CartService
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Category, Product
+
+User = get_user_model()
+
+
+class CartBulkAPITestCase(TestCase):
+    """Bulk add and reorder: one lock query, one reservation UPDATE, per-item results."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='bulk@example.com', password='testpass123')
+        category = Category.objects.create(name='Bulk', slug='bulk')
+        self.products = [
+            Product.objects.create(
+                name=f'Bulk {i}', slug=f'bulk-{i}', category=category, price='3.00', stock=4, sku=f'BULK-{i}'
+            )
+            for i in range(6)
+        ]
+        self.client.force_login(self.user)
+
+    def post_bulk(self, items):
+        return self.client.post('/api/v1/cart/items/bulk/', {'items': items}, content_type='application/json')
+
+    def test_partial_success(self):
+        first, second, third = self.products[:3]
+        CartService.add_to_cart(self.user, first.id, 1)
+        Product.objects.filter(id=third.id).update(is_active=False)
+
+        response = self.post_bulk([
+            {'product_id': second.id, 'quantity': 6},
+            {'product_id': first.id, 'quantity': 2},
+            {'product_id': third.id, 'quantity': 1},
+            {'product_id': first.id, 'quantity': 1},  # Same product twice: added up
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r['product_id'], r['requested'], r['added'], r['status']) for r in response.json()['results']],
+            [(second.id, 6, 4, 'partial'), (first.id, 3, 3, 'added'), (third.id, 1, 0, 'unavailable')],
+        )
+        self.assertEqual(response.json()['cart']['item_count'], 8)
+        self.assertEqual(
+            dict(Product.objects.filter(id__in=[first.id, second.id]).values_list('id', 'reserved_stock')),
+            {first.id: 4, second.id: 4},
+        )
+
+    def test_batch_cost_does_not_grow_with_lines(self):
+        def reservation_queries(products):
+            with CaptureQueriesContext(connection) as queries:
+                CartService.add_items(self.user, [(product.id, 1) for product in products])
+            sql = [q['sql'] for q in queries]
+            return (
+                sum('FOR UPDATE' in q or q.startswith('SELECT "products_product"') for q in sql),
+                sum(q.startswith('UPDATE "products_product"') for q in sql),
+            )
+
+        self.assertEqual(reservation_queries(self.products[:1]), (1, 1))
+        self.assertEqual(reservation_queries(self.products[1:]), (1, 1))
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 6)
+
+    def test_nothing_available(self):
+        Product.objects.filter(id=self.products[0].id).update(stock=0)
+
+        response = self.post_bulk([{'product_id': self.products[0].id, 'quantity': 1}])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['results'][0]['status'], 'unavailable')
+
+    def test_invalid_payload(self):
+        self.assertEqual(self.post_bulk([]).status_code, 400)
+        self.assertEqual(self.post_bulk([{'product_id': self.products[0].id, 'quantity': 0}]).status_code, 400)
+
+    def test_reorder(self):
+        order = Order.objects.create(
+            user=self.user, subtotal=9, total=9, shipping_address='1 Test St',
+            billing_address='1 Test St', customer_email=self.user.email, payment_method='cod',
+        )
+        for product, quantity in ((self.products[0], 2), (self.products[1], 1)):
+            OrderItem.objects.create(
+                order=order, product=product, quantity=quantity, unit_price=Decimal(product.price),
+                product_name_at_purchase=product.name, product_sku_at_purchase=product.sku,
+            )
+
+        response = self.client.post(f'/api/v1/cart/reorder/{order.order_number}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(CartItem.objects.filter(cart__user=self.user).values_list('product_id', 'quantity')),
+            {self.products[0].id: 2, self.products[1].id: 1},
+        )
+
+        other = User.objects.create_user(email='bulk-other@example.com', password='testpass123')
+        self.client.force_login(other)
+        self.assertEqual(self.client.post(f'/api/v1/cart/reorder/{order.order_number}/').status_code, 404)
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.cart.models import Cart
+from apps.cart.services import CartService
+from apps.products.models import Category, Product
+
+User = get_user_model()
+
+
+class CartQueryCountTestCase(TestCase):
+    """Cart totals cost one aggregate query, however many lines the cart has."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='cart-queries@example.com', password='testpass123')
+        category = Category.objects.create(name='Counted', slug='counted')
+        self.products = [
+            Product.objects.create(
+                name=f'Counted {i}', slug=f'counted-{i}', category=category, price='4.50', stock=10, sku=f'CQ-{i}'
+            )
+            for i in range(5)
+        ]
+        self.client.force_login(self.user)
+        self.lines = 0
+
+    def fill(self, lines):
+        """Grow the cart to `lines` lines of 2 each."""
+        for product in self.products[self.lines:lines]:
+            CartService.add_to_cart(self.user, product.id, 2)
+        self.lines = max(self.lines, lines)
+
+    def test_summary_is_one_query_and_memoized(self):
+        self.fill(5)
+        cart = Cart.objects.get(user=self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(cart.item_count, 10)
+            self.assertEqual(cart.total_price, Decimal('45.00'))
+            self.assertEqual(cart.item_count, 10)
+
+    def test_checkout_page(self):
+        for lines in (1, 5):
+            self.fill(lines)
+            # savepoint pair (ATOMIC_REQUESTS), session, user, cart, reservation touch, summary, items, images
+            with self.assertNumQueries(9):
+                response = self.client.get(reverse('orders:checkout'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_cart_page(self):
+        for lines in (1, 5):
+            self.fill(lines)
+            # savepoint pair, session, user, cart, reservation touch, items, images, summary
+            with self.assertNumQueries(9):
+                response = self.client.get(reverse('cart:detail'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_cart_api(self):
+        for lines in (1, 5):
+            self.fill(lines)
+            # savepoint pair, session, user, cart, items + products, images; totals reuse the items
+            with self.assertNumQueries(7):
+                response = self.client.get('/api/v1/cart/')
+            self.assertEqual(response.json()['item_count'], lines * 2)
+
+    def test_cart_api_totals_only(self):
+        self.fill(5)
+        with self.assertNumQueries(6):  # savepoint pair, session, user, cart, summary
+            response = self.client.get('/api/v1/cart/?fields=item_count,total_price')
+        self.assertEqual(response.json(), {'item_count': 10, 'total_price': '45.00'})
+
+    @override_settings(CART_DENORMALIZED_TOTALS=True)
+    def test_denormalized_totals(self):
+        self.fill(2)
+        first = self.products[0]
+
+        with self.assertNumQueries(5):  # savepoint pair, session, user, cart; totals come with the cart row
+            response = self.client.get('/api/v1/cart/?fields=item_count,total_price')
+        self.assertEqual(response.json(), {'item_count': 4, 'total_price': '18.00'})
+
+        first.price = Decimal('10.00')
+        first.save()  # Carts holding it are re-priced
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual((cart.cached_item_count, cart.cached_total_price), (4, Decimal('29.00')))
+
+        CartService.remove_from_cart(self.user, self.products[1].id)
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual((cart.cached_item_count, cart.cached_total_price), (2, Decimal('20.00')))
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from apps.notifications import cdc
+from apps.products.cache_warmer import ProductCacheWarmer
+from apps.products.models import Category, Product
+
+
+@override_settings(CDC_ENABLED=True)
+class CDCTestCase(TransactionTestCase):
+    """Records are appended after commit only; the reference consumer warms the cache."""
+
+    def setUp(self):
+        self.client = mock.MagicMock()
+        patcher = mock.patch.object(cdc, 'get_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cdc._suspended_until = 0.0  # An earlier test may have tripped it against a real Redis
+        cache.clear()
+
+        self.category = Category.objects.create(name='Streams', slug='streams')
+        self.product = Product.objects.create(
+            name='Stream Phone', slug='stream-phone', category=self.category, price=10, stock=5, sku='CDC-1'
+        )
+        self.client.reset_mock()
+
+    def appended(self):
+        return [
+            (stream, fields['op'], fields['id'], fields['fields'])
+            for (stream, fields), _ in self.client.xadd.call_args_list
+        ]
+
+    def test_records_after_commit(self):
+        with transaction.atomic():
+            self.product.reserve_stock(2)
+            self.assertEqual(self.appended(), [])
+
+        self.assertEqual(self.appended(), [('cdc:product', 'upsert', str(self.product.id), 'reserved_stock')])
+
+    def test_rollback_publishes_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.product.reserve_stock(2)
+                raise RuntimeError
+
+        self.assertEqual(self.appended(), [])
+
+    def test_delete_record(self):
+        product_id = self.product.id
+        self.product.delete()
+
+        self.assertIn(('cdc:product', 'delete', str(product_id), ''), self.appended())
+
+    def test_cache_warmer_skips_stock_only_changes(self):
+        warmer = ProductCacheWarmer('test')
+        key = f'product_detail_{self.product.id}'
+
+        warmer.handle_batch([('product', '1-0', {'op': 'upsert', 'id': str(self.product.id), 'fields': 'stock'})])
+        self.assertIsNone(cache.get(key))
+
+        warmer.handle_batch([('product', '1-1', {'op': 'upsert', 'id': str(self.product.id), 'fields': 'name'})])
+        self.assertEqual(cache.get(key)['name'], 'Stream Phone')
+
+    def test_cache_warmer_drops_deleted_products(self):
+        warmer = ProductCacheWarmer('test')
+        key = f'product_detail_{self.product.id}'
+        warmer.handle_batch([('category', '1-0', {'op': 'upsert', 'id': str(self.category.id), 'fields': ''})])
+        self.assertIsNotNone(cache.get(key))
+
+        Product.objects.filter(id=self.product.id).update(is_active=False)
+        warmer.handle_batch([('product', '1-1', {'op': 'upsert', 'id': str(self.product.id), 'fields': 'is_active'})])
+        self.assertIsNone(cache.get(key))
+
+    def test_poll_acknowledges_batch(self):
+        self.client.xreadgroup.return_value = [
+            ['cdc:product', [('1-0', {'op': 'upsert', 'id': str(self.product.id), 'fields': ''}), ('1-1', None)]],
+        ]
+        warmer = ProductCacheWarmer('test')
+
+        self.assertEqual(warmer.poll(), 2)
+        self.client.pipeline.return_value.xack.assert_called_once_with('cdc:product', 'product-cache', '1-0', '1-1')
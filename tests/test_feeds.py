@@ -0,0 +1,66 @@
+import tempfile
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.cart.reservations import reserve_available
+from apps.products.exporters import iter_catalog_rows
+from apps.products.feeds import CatalogFeedGenerator
+from apps.products.models import Category, Product, ProductImage
+
+
+class CatalogFeedWatermarkTestCase(TestCase):
+    """Only chunks whose watermark moved are rewritten, stock-only changes included."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Feeds', slug='feeds')
+        self.products = [
+            Product.objects.create(
+                name=f'Feed {i}', slug=f'feed-{i}', category=category, price='1.00', stock=2, sku=f'FEED-{i}'
+            )
+            for i in range(2)
+        ]
+        self.generator = CatalogFeedGenerator(root=tempfile.mkdtemp(), chunk_size=1, site_url='http://shop.test')
+
+    def test_availability_change_rewrites_its_chunk(self):
+        self.assertEqual(self.generator.generate()['written'], 2)
+        self.assertEqual(self.generator.generate()['written'], 0)
+
+        # Reservations are queryset updates: updated_at doesn't move
+        Product.objects.filter(id=self.products[0].id).update(reserved_stock=2)
+
+        self.assertEqual(self.generator.generate()['written'], 1)
+
+    def test_gallery_change_rewrites_its_chunk(self):
+        self.generator.generate()
+        product = self.products[0]
+
+        image = ProductImage.objects.create(product=product, image='products/front.jpg')
+        self.assertEqual(self.generator.generate()['written'], 1)
+        self.assertEqual(self.generator.generate()['written'], 0)
+
+        image.delete()
+        self.assertEqual(self.generator.generate()['written'], 1)
+
+        ProductImage.objects.create(product=product, image='products/back.jpg')
+        self.assertEqual(self.generator.generate()['written'], 1)
+
+
+class IncrementalExportTestCase(TestCase):
+    """Incremental exports carry stock-only changes, found through the inventory ledger."""
+
+    def test_stock_only_changes_are_exported(self):
+        category = Category.objects.create(name='Export', slug='export')
+        products = [
+            Product.objects.create(
+                name=f'Export {i}', slug=f'export-{i}', category=category, price='1.00', stock=5, sku=f'EXP-{i}'
+            )
+            for i in range(2)
+        ]
+        since = timezone.now()
+        Product.objects.filter(id__in=[p.id for p in products]).update(updated_at=since.replace(year=2000))
+
+        reserve_available({products[1].id: 2})  # Queryset UPDATE: updated_at stays old
+
+        rows = list(iter_catalog_rows(updated_since=since))
+        self.assertEqual([(row['id'], row['reserved_stock']) for row in rows], [(products[1].id, 2)])
@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.cart.models import Cart, CartItem
+from apps.products.models import Category, Product
+
+User = get_user_model()
+
+
+class GuestCartTestCase(TestCase):
+    """Guest carts write nothing to the database until login merges them."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='guest-merge@example.com', password='testpass123')
+        category = Category.objects.create(name='Guests', slug='guests')
+        self.products = [
+            Product.objects.create(
+                name=f'Guest {i}', slug=f'guest-{i}', category=category, price='5.00', stock=3, sku=f'GUEST-{i}'
+            )
+            for i in range(3)
+        ]
+
+    def add(self, product, quantity=1):
+        return self.client.post(reverse('cart:add', args=[product.id]), {'quantity': quantity})
+
+    def login(self):
+        return self.client.post(
+            reverse('accounts:login'), {'username': 'guest-merge@example.com', 'password': 'testpass123'}
+        )
+
+    def test_guest_add_writes_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.add(self.products[0], 2)
+
+        writes = [q['sql'] for q in queries if q['sql'].split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(writes, [])
+        self.assertIn(settings.GUEST_CART_COOKIE, self.client.cookies)
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.client.get(reverse('cart:detail'))
+        self.assertEqual(response.context['cart'].item_count, 2)
+
+    @override_settings(GUEST_CART_COOKIE_MAX_ITEMS=1)
+    def test_large_cart_moves_to_cache(self):
+        self.add(self.products[0])
+        cookie_cart = self.client.cookies[settings.GUEST_CART_COOKIE].value
+        self.add(self.products[1])
+
+        self.assertNotEqual(self.client.cookies[settings.GUEST_CART_COOKIE].value, cookie_cart)
+        response = self.client.get(reverse('cart:detail'))
+        self.assertIsNotNone(response.context['cart'].token)
+        self.assertEqual(response.context['cart'].item_count, 2)
+
+    def test_login_merges_and_reserves(self):
+        first, second, gone = self.products
+        existing = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=existing, product=first, quantity=1)
+        Product.objects.filter(id=first.id).update(reserved_stock=1)
+
+        self.add(first, 2)
+        self.add(second, 3)
+        self.add(gone)
+        Product.objects.filter(id=second.id).update(reserved_stock=1)  # Someone else took one meanwhile
+        gone.delete()
+
+        self.login()
+
+        self.assertEqual(
+            dict(existing.items.values_list('product_id', 'quantity')), {first.id: 3, second.id: 2}
+        )
+        self.assertEqual(
+            dict(Product.objects.filter(id__in=[first.id, second.id]).values_list('id', 'reserved_stock')),
+            {first.id: 3, second.id: 3},
+        )
+        self.assertEqual(self.client.cookies[settings.GUEST_CART_COOKIE].value, '')  # Cookie dropped
+
+    def test_tampered_cookie_is_ignored(self):
+        self.client.cookies[settings.GUEST_CART_COOKIE] = 'not-a-signed-cart'
+
+        response = self.client.get(reverse('cart:detail'))
+
+        self.assertEqual(response.context['cart'].item_count, 0)
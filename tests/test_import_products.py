@@ -0,0 +1,186 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.cart.reconciliation import reconcile
+from apps.products.ledger import balances
+from apps.products.models import Category, InventoryMovement, Product, ProductReview
+from apps.products.services import ProductCacheService
+
+COLUMNS = ['SKU', 'Product Name', 'Price', 'Category', 'Brand', 'Description', 'Rating', 'Sentiment Score']
+
+
+class ImportTestMixin:
+    def setUp(self):
+        cache.clear()
+
+    def write_csv(self, rows):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({'Brand': 'Acme', 'Description': 'Test', 'Sentiment Score': '0.5', **row})
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, rows, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_products', self.write_csv(rows), stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+
+class ImportProductsTestCase(ImportTestMixin, TestCase):
+    """Streaming bulk upsert on SKU: bad rows are skipped, never the chunk."""
+
+    def test_upsert_refreshes_catalog_fields_only(self):
+        self.run_import([{'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden'}])
+        product = Product.objects.get()
+        Product.objects.filter(pk=product.pk).update(stock=3)
+
+        self.run_import([{'SKU': 'IMP-1', 'Product Name': 'Steel Rake', 'Price': '12.50', 'Category': 'Tools'}])
+
+        updated = Product.objects.get()
+        self.assertEqual(updated.pk, product.pk)
+        self.assertEqual((updated.name, str(updated.price), updated.category.name), ('Steel Rake', '12.50', 'Tools'))
+        self.assertEqual((updated.stock, updated.slug), (3, product.slug))
+
+    def test_last_row_wins_for_repeated_skus(self):
+        self.run_import([
+            {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden', 'Rating': '2'},
+            {'SKU': 'IMP-1', 'Product Name': 'Better Rake', 'Price': '15', 'Category': 'Garden', 'Rating': '5'},
+        ])
+
+        product = Product.objects.get()
+        self.assertEqual((product.name, str(product.price)), ('Better Rake', '15.00'))
+        self.assertEqual(list(product.reviews.values_list('rating', flat=True)), [5])
+
+    def test_bad_rows_are_skipped(self):
+        _, err = self.run_import([
+            {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': 'ten', 'Category': 'Garden'},
+            {'SKU': 'IMP-2', 'Product Name': 'Hose', 'Price': '-1', 'Category': 'Garden'},
+            {'SKU': 'X' * 101, 'Product Name': 'Spade', 'Price': '9', 'Category': 'Garden'},
+            {'SKU': 'IMP-4', 'Product Name': 'Shovel', 'Price': '20', 'Category': 'Garden'},
+        ])
+
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['IMP-4'])
+        self.assertEqual(err.count('Skipping row'), 3)
+
+    def test_bad_rating_only_drops_the_review(self):
+        with self.assertLogs('apps.products.management.commands.import_products', 'WARNING'):
+            self.run_import([
+                {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden', 'Rating': 'great'},
+                {'SKU': 'IMP-2', 'Product Name': 'Hose', 'Price': '12', 'Category': 'Garden', 'Rating': '9'},
+                {'SKU': 'IMP-3', 'Product Name': 'Spade', 'Price': '9', 'Category': 'Garden', 'Rating': 'inf'},
+                {'SKU': 'IMP-4', 'Product Name': 'Shovel', 'Price': '20', 'Category': 'Garden', 'Rating': '4.0'},
+            ])
+
+        self.assertEqual(Product.objects.count(), 4)
+        self.assertEqual(list(ProductReview.objects.values_list('product__sku', 'rating')), [('IMP-4', 4)])
+
+    def test_reviews_upsert_on_product_and_user(self):
+        row = {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden'}
+        self.run_import([{**row, 'Rating': '3', 'Sentiment Score': '0.1'}])
+        self.run_import([{**row, 'Rating': '4', 'Sentiment Score': '0.9'}])
+
+        review = ProductReview.objects.get()
+        self.assertEqual((review.rating, review.comment, review.user.email), (4, 'Sentiment: 0.9', 'admin@example.com'))
+
+    def test_dry_run_writes_nothing(self):
+        rows = [{'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden'}]
+        out, _ = self.run_import(rows, dry_run=True)
+        self.assertIn('1 rows, 0 invalid', out)
+
+        with self.assertRaises(CommandError):
+            self.run_import(rows + [{'SKU': 'IMP-2', 'Product Name': 'Hose', 'Price': 'n/a', 'Category': 'Garden'}],
+                            dry_run=True)
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(Category.objects.exists())
+
+    def test_categories_sharing_a_slug_are_one_category(self):
+        self.run_import([
+            {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Home & Garden'},
+            {'SKU': 'IMP-2', 'Product Name': 'Hose', 'Price': '12', 'Category': 'Home Garden'},
+        ])
+
+        category = Category.objects.get(slug='home-garden')
+        self.assertEqual(
+            set(Product.objects.values_list('sku', 'category')), {('IMP-1', category.id), ('IMP-2', category.id)}
+        )
+
+    def test_category_name_taken_under_another_slug_skips_the_row(self):
+        Category.objects.create(name='Garden', slug='outdoor')
+        _, err = self.run_import([
+            {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden'},
+            {'SKU': 'IMP-2', 'Product Name': 'Hose', 'Price': '12', 'Category': 'Tools'},
+        ])
+
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['IMP-2'])
+        self.assertIn("category 'Garden'", err)
+
+    def test_imported_products_open_their_ledger(self):
+        rows = [
+            {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden'},
+            {'SKU': 'IMP-2', 'Product Name': 'Hose', 'Price': '12', 'Category': 'Garden'},
+        ]
+        self.run_import(rows)
+        self.run_import(rows)  # Updates: stock is untouched, nothing more to record
+
+        self.assertEqual(
+            list(InventoryMovement.objects.values_list('kind', 'stock_delta', 'reference')),
+            [(InventoryMovement.RESTOCK, 100, 'import_products')] * 2,
+        )
+        self.assertEqual(set(balances().values()), {(100, 0)})
+        self.assertEqual(reconcile(fix=False)['ledger_drifted'], 0)
+
+    @override_settings(CDC_ENABLED=True)
+    def test_imported_products_are_announced_after_commit(self):
+        with mock.patch('apps.notifications.cdc._append'), self.captureOnCommitCallbacks(execute=True):
+            self.run_import([{'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden'}])
+        product = Product.objects.get()
+        version = ProductCacheService.get_product_version(product.id)
+        card_key = ProductCacheService._card_version_key(product.id)
+        card_version = cache.get(card_key)
+        self.assertIsNotNone(card_version)
+
+        with mock.patch('apps.notifications.cdc._append') as append, self.captureOnCommitCallbacks(execute=True):
+            self.run_import([{'SKU': 'IMP-1', 'Product Name': 'Garden Rake', 'Price': '11', 'Category': 'Garden'}])
+
+        append.assert_called_once_with('product', {'op': 'upsert', 'id': str(product.id), 'fields': ''})
+        self.assertGreater(ProductCacheService.get_product_version(product.id), version)
+        self.assertGreater(cache.get(card_key), card_version)
+
+    def test_repeated_skus_are_counted_as_rows_read(self):
+        out, _ = self.run_import([
+            {'SKU': 'IMP-1', 'Product Name': 'Rake', 'Price': '10', 'Category': 'Garden'},
+            {'SKU': 'IMP-1', 'Product Name': 'Rake v2', 'Price': '11', 'Category': 'Garden'},
+            {'SKU': 'IMP-2', 'Product Name': 'Hose', 'Price': 'free', 'Category': 'Garden'},
+            {'SKU': 'IMP-3', 'Product Name': 'Spade', 'Price': '9', 'Category': 'Garden'},
+        ], chunk_size=2)
+
+        self.assertIn('3 rows imported', out)
+        self.assertIn('3 rows, 1 repeated SKUs merged, 1 skipped', out)
+
+
+class ParallelImportTestCase(ImportTestMixin, TransactionTestCase):
+    """Workers run chunks on their own connections; TransactionTestCase lets them see the data."""
+
+    def test_workers_import_every_chunk(self):
+        rows = [
+            {'SKU': f'PAR-{i:03}', 'Product Name': f'Item {i}', 'Price': '5', 'Category': f'Group {i % 3}', 'Rating': '4'}
+            for i in range(40)
+        ]
+        out, _ = self.run_import(rows, chunk_size=5, workers=3)
+
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(Category.objects.count(), 3)
+        self.assertEqual(ProductReview.objects.count(), 40)
+        self.assertEqual(InventoryMovement.objects.count(), 40)
+        self.assertIn('40 rows, 0 repeated SKUs merged, 0 skipped', out)
@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.cart.reconciliation import reconcile
+from apps.cart.services import CartService
+from apps.orders.models import Order
+from apps.orders.services import OrderService
+from apps.products import ledger
+from apps.products.models import Category, InventoryMovement, InventorySnapshot, Product
+
+User = get_user_model()
+
+
+@override_settings(INVENTORY_LEDGER_SETTLE_SECONDS=0)
+class InventoryLedgerTestCase(TestCase):
+    """Every stock change leaves a movement; balances come back from snapshots at any moment."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='ledger@example.com', password='testpass123')
+        category = Category.objects.create(name='Ledger', slug='ledger')
+        self.products = [
+            Product.objects.create(
+                name=f'Ledger {i}', slug=f'ledger-{i}', category=category, price='5.00', stock=10, sku=f'LEDGER-{i}'
+            )
+            for i in range(2)
+        ]
+
+    def movements(self, product):
+        return list(
+            InventoryMovement.objects.filter(product=product).order_by('id')
+            .values_list('kind', 'stock_delta', 'reserved_delta')
+        )
+
+    def counters(self):
+        return {product_id: (stock, reserved) for product_id, stock, reserved in
+                Product.objects.values_list('id', 'stock', 'reserved_stock')}
+
+    def test_every_stock_path_is_recorded(self):
+        first, second = self.products
+        CartService.add_to_cart(self.user, first.id, 3)
+        CartService.add_items(self.user, [(second.id, 2)])
+        CartService.update_quantity(self.user, first.id, 2)
+        result = OrderService.create_order(
+            self.user, [{'product_id': first.id, 'quantity': 2}], '1 Ledger St', None, 'cod', '555-0100'
+        )
+        CartService.clear_cart(self.user)
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(self.movements(first), [
+            ('restock', 10, 0), ('reserve', 0, 3), ('release', 0, -1), ('sale', -2, 0), ('release', 0, -2),
+        ])
+        self.assertEqual(InventoryMovement.objects.get(kind='sale').reference, result['order_number'])
+        self.assertEqual(ledger.balances(), self.counters())
+
+        order = Order.objects.get(order_number=result['order_number'])
+        OrderService.cancel_order(order.id, self.user)
+        self.assertEqual(self.movements(first)[-1], ('cancel', 2, 0))
+        self.assertEqual(ledger.balances(), self.counters())
+
+    def test_compaction_and_balances_as_of(self):
+        first, _ = self.products
+        CartService.add_to_cart(self.user, first.id, 4)
+        before_sale = timezone.now()
+        OrderService.create_order(
+            self.user, [{'product_id': first.id, 'quantity': 3}], '1 Ledger St', None, 'cod', '555-0100'
+        )
+
+        self.assertEqual(ledger.compact_ledger(), 2)
+        self.assertEqual(InventorySnapshot.objects.get(product=first).stock, 7)
+        CartService.clear_cart(self.user)  # After the snapshot: read on top of it
+        self.assertEqual(ledger.balances(), self.counters())
+        self.assertEqual(ledger.compact_ledger(), 1)  # Only what changed since
+
+        # Backward from the snapshot, and forward for a product without changes since
+        self.assertEqual(ledger.balances_as_of(before_sale)[first.id], (10, 4))
+        self.assertEqual(ledger.balances_as_of(timezone.now()), self.counters())
+        with self.assertRaises(ValueError):
+            ledger.balances_as_of(before_sale - timedelta(days=1))
+
+    def test_reconciliation_records_unrecorded_changes(self):
+        first, second = self.products
+        CartService.add_to_cart(self.user, first.id, 2)
+        Product.objects.filter(id=second.id).update(stock=25)  # e.g. a bulk import
+
+        report = reconcile()
+
+        self.assertEqual((report['drifted'], report['ledger_drifted'], report['ledger_unrecorded_units']), (0, 1, 15))
+        self.assertEqual(self.movements(second)[-1], ('adjust', 15, 0))
+        self.assertEqual(ledger.balances(), self.counters())
+        self.assertEqual(reconcile()['ledger_drifted'], 0)
+
+    def test_balances_api(self):
+        staff = User.objects.create_user(email='ledger-staff@example.com', password='testpass123', is_staff=True)
+        self.client.force_login(staff)
+        first = self.products[0]
+
+        response = self.client.get('/api/stock/ledger/', {'products': str(first.id)})
+        self.assertEqual(response.json()['balances'], {str(first.id): {'stock': 10, 'reserved_stock': 0}})
+        self.assertEqual(self.client.get('/api/stock/ledger/', {'at': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/stock/ledger/', {'at': '2000-01-01T00:00:00Z'}).status_code, 400)
@@ -0,0 +1,133 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from apps.products import microcache
+from apps.products.microcache import MicroCache
+
+
+class MicroCacheTestCase(SimpleTestCase):
+    """A fresh entry skips the loader; a stale or missing one is loaded once for every concurrent caller."""
+
+    def setUp(self):
+        cache.clear()
+        self.now = 100.0
+        patcher = mock.patch.object(microcache.time, 'monotonic', side_effect=lambda: self.now)
+        self.clock = patcher
+
+    def counting_loader(self):
+        calls = []
+
+        def load(key):
+            calls.append(key)
+            return f'{key}:{len(calls)}'
+        return calls, load
+
+    def test_ttl(self):
+        calls, load = self.counting_loader()
+        stock = MicroCache('test', load, ttl=0.5)
+        with self.clock:
+            self.assertEqual(stock.get(1), '1:1')
+            self.now += 0.4
+            self.assertEqual(stock.get(1), '1:1')  # Still fresh
+            self.now += 0.1
+            self.assertEqual(stock.get(1), '1:2')  # Exactly ttl old: reloaded
+            stock.invalidate(1)
+            self.assertEqual(stock.get(1), '1:3')
+            self.assertEqual(stock.get(2), '2:4')  # Keys don't share entries
+
+        metrics = stock.metrics()
+        self.assertEqual((metrics['requests'], metrics['hits'], metrics['db_reads']), (5, 1, 4))
+        self.assertEqual(metrics['max_staleness_ms'], 400.0)
+
+    def test_failed_load_is_not_cached(self):
+        load = mock.Mock(side_effect=[ValueError('db down'), 7])
+        stock = MicroCache('test', load, ttl=60)
+        with self.assertRaises(ValueError):
+            stock.get(1)
+        self.assertEqual(stock.get(1), 7)
+        self.assertEqual(stock.get(1), 7)
+        self.assertEqual(load.call_count, 2)
+
+    def test_concurrent_misses_are_coalesced(self):
+        entered, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_load(key):
+            calls.append(key)
+            entered.set()
+            release.wait(5)
+            return 42
+
+        stock = MicroCache('test', slow_load, ttl=60, wait_timeout=5)
+        results = []
+        leader = threading.Thread(target=lambda: results.append(stock.get(1)))
+        leader.start()
+        self.assertTrue(entered.wait(5))
+
+        followers = [threading.Thread(target=lambda: results.append(stock.get(1))) for _ in range(5)]
+        for thread in followers:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while stock.metrics()['coalesced'] < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(results, [42] * 6)
+        self.assertEqual(calls, [1])
+        metrics = stock.metrics()
+        self.assertEqual((metrics['coalesced'], metrics['db_reads']), (5, 1))
+
+    def test_follower_reads_for_itself_when_the_leader_fails(self):
+        entered, release = threading.Event(), threading.Event()
+        calls = []
+
+        def load(key):
+            calls.append(key)
+            if len(calls) == 1:
+                entered.set()
+                release.wait(5)
+                raise ValueError('db down')
+            return 42
+
+        stock = MicroCache('test', load, ttl=60, wait_timeout=5)
+        errors = []
+
+        def lead():
+            try:
+                stock.get(1)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        self.assertTrue(entered.wait(5))
+        results = []
+        follower = threading.Thread(target=lambda: results.append(stock.get(1)))
+        follower.start()
+        deadline = time.monotonic() + 5
+        while stock.metrics()['coalesced'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, [42])
+        self.assertEqual(len(calls), 2)
+
+    def test_shared_metrics_add_up_processes(self):
+        _, load = self.counting_loader()
+        workers = [MicroCache('shared', load, ttl=60, flush_interval=0) for _ in range(2)]
+        for stock in workers:
+            stock.get(1)
+            stock.get(1)
+
+        shared = workers[0].shared_metrics()
+        self.assertEqual((shared['requests'], shared['hits'], shared['db_reads']), (4, 2, 2))
+        self.assertEqual(shared['hit_ratio'], 0.5)
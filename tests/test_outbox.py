@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from apps.notifications import outbox
+from apps.notifications.models import OutboxEvent
+from apps.notifications.tasks import send_order_confirmation_email
+from apps.orders.models import Order
+from apps.products.models import Category, Product
+
+User = get_user_model()
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, STOCK_NOTIFY_ENABLED=False)
+class OutboxTestCase(TransactionTestCase):
+    """Events exist only for committed changes and are delivered once per event_id."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='outbox@example.com', password='testpass123', first_name='Out', last_name='Box'
+        )
+
+    def create_order(self):
+        return Order.objects.create(
+            user=self.user, subtotal=10, total=10, shipping_address='1 Test St',
+            billing_address='1 Test St', customer_email=self.user.email, payment_method='cod',
+        )
+
+    def test_rolled_back_order_leaves_no_event(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.create_order()
+                raise RuntimeError('payment failed')
+
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_relay_publishes_committed_events(self):
+        order = self.create_order()
+        order.status = Order.Status.SHIPPED
+        order.save()
+
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('topic', flat=True)),
+            [outbox.ORDER_CREATED, outbox.ORDER_SHIPPED],
+        )
+        self.assertEqual(outbox.lag()['pending'], 2)
+
+        self.assertEqual(outbox.drain(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(OutboxEvent.objects.filter(published_at__isnull=True).exists())
+        self.assertEqual(outbox.lag(), {'pending': 0, 'oldest_pending_seconds': 0.0, 'dead': 0})
+
+    def test_redelivery_is_deduplicated(self):
+        order = self.create_order()
+        event = OutboxEvent.objects.get(topic=outbox.ORDER_CREATED)
+
+        send_order_confirmation_email(order.id, event_id=str(event.event_id))
+        send_order_confirmation_email(order.id, event_id=str(event.event_id))
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_stock_change_is_recorded(self):
+        category = Category.objects.create(name='Outbox', slug='outbox')
+        product = Product.objects.create(
+            name='Outbox Phone', slug='outbox-phone', category=category, price=10, stock=5, sku='OUTBOX-1'
+        )
+        product.reserve_stock(2)
+
+        event = OutboxEvent.objects.get(topic=outbox.STOCK_CHANGED)
+        self.assertEqual(event.payload, {'product_id': product.id, 'available_stock': 3})
+
+    def test_failing_handler_is_retried_then_left(self):
+        OutboxEvent.objects.create(topic='unknown.topic', payload={})
+
+        with override_settings(OUTBOX_MAX_ATTEMPTS=2):
+            self.assertEqual(outbox.relay(), (0, 1))
+            self.assertEqual(outbox.relay(), (0, 1))
+            self.assertEqual(outbox.relay(), (0, 0))
+            self.assertEqual(outbox.lag()['dead'], 1)
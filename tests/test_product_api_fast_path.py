@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from apps.products.models import Product, Category, ProductImage
+from apps.products.services import ProductCacheService
+
+
+class ProductAPIFastPathTestCase(TransactionTestCase):
+    """
+    The values() fast path must return the same bytes as ProductSerializer.
+    TransactionTestCase: the catalog views opt out of ATOMIC_REQUESTS, and DRF
+    would otherwise mark the test's wrapping transaction for rollback on a 404.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(
+            name='Électronique',
+            slug='electronique',
+            description='Gadgets & gear'
+        )
+        self.product = Product.objects.create(
+            name='Téléphone “Pro”',
+            slug='telephone-pro',
+            description='Line separator, <html> & emoji 📱',
+            category=self.category,
+            price='1299.50',
+            stock=3,
+            reserved_stock=3,
+            sku='FAST-001'
+        )
+        Product.objects.create(
+            name='Plain Product',
+            slug='plain-product',
+            description='No images',
+            category=self.category,
+            price=10,
+            stock=7,
+            sku='FAST-002'
+        )
+        ProductImage.objects.create(product=self.product, image='products/front view.jpg', alt_text='Front')
+        ProductImage.objects.create(product=self.product, image='products/main.jpg', is_primary=True)
+
+    def assertSameAsSerializer(self, url):
+        fast = self.client.get(url)
+        with override_settings(API_FAST_PATH=False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast['Content-Type'], slow['Content-Type'])
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_detail_matches_serializer(self):
+        response = self.assertSameAsSerializer(f'/api/v1/products/products/{self.product.id}/')
+        data = response.json()
+        self.assertEqual(data['price'], '1299.50')
+        self.assertFalse(data['is_in_stock'])
+        self.assertEqual(data['images'][0]['image'], 'http://testserver/media/products/main.jpg')
+
+    def test_list_matches_serializer(self):
+        self.assertSameAsSerializer('/api/v1/products/products/')
+        self.assertSameAsSerializer('/api/v1/products/products/?category=electronique&page=1')
+
+    def test_missing_product_matches_serializer(self):
+        self.assertSameAsSerializer('/api/v1/products/products/999999/')
+
+    def test_lazily_created_versions_expire(self):
+        cache.clear()
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            self.client.get('/api/v1/products/products/')
+        add.assert_any_call('product_list_version', mock.ANY, ProductCacheService.TTL_DETAIL)
+
+
+class ConditionalGetTestCase(TransactionTestCase):
+    """ETag / Last-Modified from the version counters; only products that exist get validators."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Conditional', slug='conditional')
+        self.product = Product.objects.create(
+            name='Cached Phone', slug='cached-phone', category=category, price=10, stock=5, sku='COND-1'
+        )
+        self.urls = [f'/api/v1/products/products/{self.product.id}/', f'/api/product/{self.product.id}/']
+
+    def test_validators_and_304s(self):
+        for url, cache_control in zip(self.urls, ['public, max-age=30', 'no-cache']):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Cache-Control'], cache_control)
+                etag, last_modified = response['ETag'], response['Last-Modified']
+
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified['Cache-Control'], cache_control)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+                ProductCacheService.bump_product_version(self.product.id)
+                changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(changed.status_code, 200)
+                self.assertNotEqual(changed['ETag'], etag)
+
+    def test_missing_products_never_get_304(self):
+        future = 'Fri, 01 Jan 2100 00:00:00 GMT'
+        for url in ['/api/v1/products/products/999999/', '/api/product/999999/']:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=future, HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(response.status_code, 404)
+                self.assertFalse(response.has_header('ETag'))
+                self.assertFalse(response.has_header('Last-Modified'))
+                self.assertFalse(response.has_header('Cache-Control'))
+        self.assertIsNone(cache.get('product_version_999999'))
+
+    def test_deactivated_product_gets_404_for_its_old_validators(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        self.product.is_active = False
+        self.product.save()
+
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 404)
+                self.assertFalse(response.has_header('ETag'))
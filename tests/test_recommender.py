@@ -0,0 +1,188 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.products.models import Category, Product
+from apps.products.recommender import (
+    DjangoContentRecommender, RecommenderClient, RecommenderIndexer, get_recommender, recommender_engine,
+)
+from apps.products.recommender_server import create_server
+from apps.products.services import ProductCacheService
+
+
+class StubEngine:
+    model_version = 3
+    df = None
+    vocabulary_drift = 0.0
+
+    def get_recommendations_batch(self, product_ids, n=4):
+        return {pid: [pid + 1, pid + 2][:n] for pid in product_ids}
+
+
+class RecommenderServerTestCase(SimpleTestCase):
+    """One shared server answers every worker; clients fall back to the last good answer."""
+
+    def setUp(self):
+        cache.clear()
+        self.server = create_server('127.0.0.1:0', engine=StubEngine())
+        self.address = '127.0.0.1:%d' % self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+
+    def stop_server(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_round_trip_and_errors(self):
+        client = RecommenderClient(self.address, timeout=2)
+
+        self.assertEqual(client.get_recommendations_batch([10, 20], n=2), {10: [11, 12], 20: [21, 22]})
+        self.assertEqual(client._request({'op': 'status'})['products'], 0)
+        self.assertEqual(client._request({'op': 'bogus'})['status'], 'error')
+        self.assertEqual(client._request({'op': 'recommend'})['status'], 'error')  # No product_ids
+
+    def test_fallback_serves_last_good_answer(self):
+        client = RecommenderClient(self.address, timeout=2)
+        client.get_recommendations_batch([10], n=2)
+        self.stop_server()
+
+        with self.assertLogs('apps.products.recommender', 'WARNING'):
+            self.assertEqual(client.get_recommendations_batch([10, 30], n=2), {10: [11, 12], 30: []})
+        self.assertFalse(client.update([10]))
+
+    def test_client_only_when_configured(self):
+        self.assertIs(get_recommender(), recommender_engine)
+        with override_settings(RECOMMENDER_SERVER_ADDRESS=self.address):
+            self.assertIsInstance(get_recommender(), RecommenderClient)
+
+
+@override_settings(RECOMMENDER_DRIFT_THRESHOLD=0.15)
+class IncrementalIndexerDriftTestCase(TestCase):
+    """Incremental updates reuse the fitted vocabulary until too many words are new to it."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Apparel', slug='apparel')
+        self.products = [
+            Product.objects.create(
+                name=name, slug=name.lower().replace(' ', '-'), description=description,
+                category=category, price=10, stock=5, sku=f'REC-{index}',
+            )
+            for index, (name, description) in enumerate([
+                ('Cotton Shirt', 'soft cotton shirt with long sleeves'),
+                ('Wool Sweater', 'warm wool sweater for winter'),
+                ('Denim Jacket', 'classic denim jacket with pockets'),
+            ])
+        ]
+        # A private engine: the module-level one is shared with the signals' indexer thread
+        self.engine = object.__new__(DjangoContentRecommender)
+        self.engine.initialized = False
+        self.engine.__init__()
+        self.engine.DRIFT_MIN_TOKENS = 10
+        self.engine.train()
+        self.indexer = RecommenderIndexer(self.engine, local_only=True)
+
+    def describe(self, product, description):
+        # A queryset update: no post_save, so the shared indexer stays out of it
+        Product.objects.filter(pk=product.pk).update(description=description)
+
+    def test_known_words_update_in_place(self):
+        shirt = self.products[0]
+        self.describe(shirt, 'warm cotton sweater with denim pockets and long sleeves')
+
+        self.assertFalse(self.engine.update_products([shirt.id]))
+        self.assertEqual(self.engine.vocabulary_drift, 0.0)
+        self.assertEqual(self.engine.model_version, 2)
+        self.assertEqual(len(self.engine.df), 3)
+
+    def test_update_invalidates_cached_fragments(self):
+        shirt = self.products[0]
+        version = cache.get(ProductCacheService.RECOMMENDER_VERSION_KEY)
+        self.describe(shirt, 'soft wool shirt')
+
+        self.engine.update_products([shirt.id])
+        self.assertGreater(cache.get(ProductCacheService.RECOMMENDER_VERSION_KEY), version)
+
+        version = cache.get(ProductCacheService.RECOMMENDER_VERSION_KEY)
+        self.engine.update_products([999999])  # Unknown and not in the model: nothing moved
+        self.assertEqual(cache.get(ProductCacheService.RECOMMENDER_VERSION_KEY), version)
+
+    def test_drift_needs_enough_tokens(self):
+        shirt = self.products[0]
+        self.describe(shirt, 'linen')  # Unknown, but too few words to judge
+
+        self.assertFalse(self.engine.update_products([shirt.id]))
+        self.assertGreater(self.engine.vocabulary_drift, 0.15)
+
+    def test_drift_over_threshold_refits(self):
+        shirt = self.products[0]
+        self.describe(shirt, 'linen bamboo hemp tunic kaftan poncho sarong alpaca cashmere mohair')
+
+        self.assertTrue(self.engine.update_products([shirt.id]))
+
+        self.describe(shirt, 'linen bamboo hemp tunic kaftan poncho sarong alpaca cashmere mohair silk')
+        with self.assertLogs('apps.products.recommender', 'INFO'):
+            self.indexer._apply({shirt.id})
+        # The refit learned the new words and starts counting again
+        self.assertEqual(self.engine.vocabulary_drift, 0.0)
+        self.assertIn('linen', self.engine.vectorizer.vocabulary_)
+
+
+class RecommendationsFragmentCacheTestCase(TestCase):
+    """The cached block is valid while the model version and every recommended card's version are."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Kitchen', slug='kitchen')
+        self.product, self.kettle, self.toaster, self.other = [
+            Product.objects.create(
+                name=name, slug=name.lower(), description=name, category=category,
+                price=20, stock=5, sku=f'FRAG-{index}',
+            )
+            for index, name in enumerate(['Teapot', 'Kettle', 'Toaster', 'Blender'])
+        ]
+        self.recommender = mock.Mock()
+        self.recommender.get_recommendations.return_value = [self.kettle.id, self.toaster.id]
+        patcher = mock.patch('apps.products.recommender.get_recommender', return_value=self.recommender)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fragment(self):
+        return str(ProductCacheService.get_recommendations_fragment(self.product.id))
+
+    def test_hit_needs_no_database(self):
+        self.assertIn('Kettle', self.fragment())
+        with self.assertNumQueries(0):
+            self.assertIn('Kettle', self.fragment())
+        self.assertEqual(self.recommender.get_recommendations.call_count, 1)
+
+    def test_card_version_bump_invalidates(self):
+        self.fragment()
+        Product.objects.filter(pk=self.kettle.pk).update(name='Electric Kettle')
+        self.assertNotIn('Electric Kettle', self.fragment())  # No bump, still the cached block
+
+        ProductCacheService.bump_product_card_version(self.kettle.id)
+        self.assertIn('Electric Kettle', self.fragment())
+        self.assertEqual(self.recommender.get_recommendations.call_count, 2)
+
+    def test_unrelated_bump_keeps_the_entry(self):
+        self.fragment()
+        ProductCacheService.bump_product_card_version(self.other.id)
+        self.fragment()
+        self.assertEqual(self.recommender.get_recommendations.call_count, 1)
+
+    def test_model_version_bump_invalidates(self):
+        self.fragment()
+        self.recommender.get_recommendations.return_value = [self.other.id]
+        ProductCacheService.bump_recommender_version()
+        html = self.fragment()
+        self.assertIn('Blender', html)
+        self.assertNotIn('Kettle', html)
+
+    def test_empty_recommendations_are_not_cached(self):
+        self.recommender.get_recommendations.return_value = []
+        self.fragment()
+        self.fragment()
+        self.assertEqual(self.recommender.get_recommendations.call_count, 2)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.cart import reservations
+from apps.cart.reconciliation import last_report, reconcile
+from apps.cart.models import CartItem, StockReservation
+from apps.cart.services import CartService
+from apps.products.models import Category, Product
+
+User = get_user_model()
+
+
+class InventoryReconciliationTestCase(TestCase):
+    """reserved_stock is brought back to the sum of the live reservations."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='reconcile@example.com', password='testpass123')
+        category = Category.objects.create(name='Drift', slug='drift')
+        self.products = [
+            Product.objects.create(
+                name=f'Drift {i}', slug=f'drift-{i}', category=category, price='2.00', stock=10, sku=f'DRIFT-{i}'
+            )
+            for i in range(4)
+        ]
+
+    def reserved_stock(self):
+        return dict(Product.objects.values_list('id', 'reserved_stock'))
+
+    def test_drift_is_reported_and_corrected(self):
+        first, second, third, fourth = self.products
+        CartService.add_items(self.user, [(first.id, 2), (second.id, 3)])
+        Product.objects.filter(id=first.id).update(reserved_stock=5)   # Leaked: 3 units nobody holds
+        Product.objects.filter(id=second.id).update(reserved_stock=1)  # Lost: 2 held units look available
+        Product.objects.filter(id=third.id).update(reserved_stock=4)
+
+        dry = reconcile(batch_size=3, fix=False)
+        self.assertEqual((dry['checked'], dry['drifted'], dry['fixed']), (4, 3, 0))
+        self.assertEqual(self.reserved_stock()[first.id], 5)
+
+        report = reconcile(batch_size=3)
+
+        self.assertEqual((report['drifted'], report['fixed']), (3, 3))
+        self.assertEqual((report['over_reserved_units'], report['under_reserved_units']), (7, 2))
+        self.assertEqual(report['max_drift'], 4)
+        self.assertEqual(
+            self.reserved_stock(),
+            {first.id: 2, second.id: 3, third.id: 0, fourth.id: 0},
+        )
+        self.assertEqual(last_report(), report)
+        self.assertEqual(reconcile()['drifted'], 0)
+
+    def test_in_sync_products_are_not_written(self):
+        CartService.add_to_cart(self.user, self.products[0].id, 2)
+        self.assertEqual(self.reserved_stock()[self.products[0].id], reservations.reserved_by_product()[self.products[0].id])
+
+        with self.assertNumQueries(2):  # One chunk, then the empty page that ends the walk
+            report = reconcile()
+        self.assertEqual(report['drifted'], 0)
+
+    def test_removing_an_expired_line_releases_it_once(self):
+        product = self.products[0]
+        other = User.objects.create_user(email='reconcile-other@example.com', password='testpass123')
+        CartService.add_to_cart(other, product.id, 3)  # Must survive whatever happens to the expired line
+        for remove_first in (True, False):
+            CartService.add_to_cart(self.user, product.id, 2)
+            StockReservation.objects.filter(cart__user=self.user).update(
+                expires_at=timezone.now() - timedelta(seconds=1)
+            )
+
+            if remove_first:
+                CartService.remove_from_cart(self.user, product.id)
+                self.assertEqual(reservations.release_expired(), 0)
+            else:
+                self.assertEqual(reservations.release_expired(), 1)
+                CartService.remove_from_cart(self.user, product.id)  # The sweeper dropped it already
+
+            self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+            self.assertEqual(self.reserved_stock()[product.id], 3)
+            self.assertEqual(reconcile()['drifted'], 0)
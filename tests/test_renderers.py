@@ -0,0 +1,97 @@
+import io
+import json
+import uuid
+from datetime import datetime, timezone as dt_timezone, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse as DjangoJsonResponse
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from django_ecommerce.encoders import JsonResponse
+from django_ecommerce.renderers import FastJSONParser, FastJSONRenderer, MessagePackParser, MessagePackRenderer
+
+
+PAYLOAD = {
+    'price': Decimal('1299.50'),
+    'prices': [Decimal('0.10'), Decimal('19.99'), Decimal('100')],
+    'utc': datetime(2026, 3, 1, 12, 30, 45, 123456, tzinfo=dt_timezone.utc),
+    'kathmandu': datetime(2026, 3, 1, 18, 15, 45, tzinfo=ZoneInfo('Asia/Kathmandu')),
+    'negative_offset': datetime(2026, 7, 4, 9, 0, tzinfo=dt_timezone(timedelta(hours=-5))),
+    'date': datetime(2026, 3, 1).date(),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'text': 'Ünïcode “quotes” 📦 and a line\u2028separator',
+    'nested': {'ids': (1, 2, 3), 'empty': None, 'flag': True},
+}
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """FastJSONRenderer must be byte-compatible with DRF's JSONRenderer."""
+
+    def test_same_bytes_as_drf(self):
+        self.assertEqual(FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_decimal_prices(self):
+        data = json.loads(FastJSONRenderer().render({'price': Decimal('1299.50')}))
+        self.assertEqual(data['price'], 1299.5)
+
+    def test_aware_datetimes(self):
+        data = json.loads(FastJSONRenderer().render(PAYLOAD))
+        self.assertEqual(data['utc'], '2026-03-01T12:30:45.123456Z')
+        self.assertEqual(data['kathmandu'], '2026-03-01T18:15:45+05:45')
+        self.assertEqual(data['negative_offset'], '2026-07-04T09:00:00-05:00')
+
+    def test_indent_uses_stdlib_renderer(self):
+        media_type = 'application/json; indent=2'
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type),
+        )
+
+    def test_parser_round_trip(self):
+        body = FastJSONRenderer().render(PAYLOAD)
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), json.loads(body))
+
+    def test_parser_rejects_invalid_json(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"price": NaN}'))
+
+
+class MessagePackTestCase(SimpleTestCase):
+    """MessagePack carries the same primitives as the JSON body."""
+
+    def test_same_values_as_json(self):
+        packed = MessagePackRenderer().render(PAYLOAD)
+        self.assertEqual(msgpack.unpackb(packed, raw=False), json.loads(JSONRenderer().render(PAYLOAD)))
+
+    def test_parser_round_trip(self):
+        packed = msgpack.packb({'product_id': 1, 'quantity': 2})
+        self.assertEqual(MessagePackParser().parse(io.BytesIO(packed)), {'product_id': 1, 'quantity': 2})
+
+
+class JsonResponseTestCase(SimpleTestCase):
+    """The fast JsonResponse keeps django.http.JsonResponse semantics."""
+
+    def test_same_values_as_django(self):
+        fast = JsonResponse(PAYLOAD)
+        django = DjangoJsonResponse(PAYLOAD)
+        self.assertEqual(fast['Content-Type'], django['Content-Type'])
+        self.assertEqual(json.loads(fast.content), json.loads(django.content))
+
+    def test_decimal_stays_a_string(self):
+        data = json.loads(JsonResponse({'price': Decimal('19.90')}).content)
+        self.assertEqual(data['price'], '19.90')
+
+    def test_aware_datetime_matches_django_encoder(self):
+        value = PAYLOAD['kathmandu']
+        data = json.loads(JsonResponse({'at': value}).content)
+        self.assertEqual(data['at'], DjangoJSONEncoder().default(value))
+
+    def test_safe_flag(self):
+        with self.assertRaises(TypeError):
+            JsonResponse([1, 2])
+        self.assertEqual(json.loads(JsonResponse([1, 2], safe=False).content), [1, 2])
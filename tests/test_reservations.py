@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.cart import reservations
+from apps.cart.models import CartItem, StockReservation
+from apps.cart.services import CartService
+from apps.notifications.models import OutboxEvent
+from apps.products.models import Category, Product
+
+User = get_user_model()
+
+
+class StockReservationTestCase(TestCase):
+    """Per-line holds that expire on their own; reserved_stock follows them."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='holds@example.com', password='testpass123')
+        self.other = User.objects.create_user(email='holds-other@example.com', password='testpass123')
+        category = Category.objects.create(name='Holds', slug='holds')
+        self.products = [
+            Product.objects.create(
+                name=f'Hold {i}', slug=f'hold-{i}', category=category, price='1.00', stock=10, sku=f'HOLD-{i}'
+            )
+            for i in range(3)
+        ]
+
+    def held(self, user):
+        return dict(StockReservation.objects.filter(cart__user=user).values_list('product_id', 'quantity'))
+
+    def reserved_stock(self):
+        return {
+            product_id: reserved
+            for product_id, reserved in Product.objects.values_list('id', 'reserved_stock')
+            if reserved
+        }
+
+    def expire(self, user, product):
+        StockReservation.objects.filter(cart__user=user, product=product).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_reservations_follow_cart_lines(self):
+        first, second, third = self.products
+        CartService.add_to_cart(self.user, first.id, 2)
+        CartService.add_to_cart(self.user, first.id, 1)
+        CartService.add_items(self.user, [(second.id, 4), (third.id, 1)])
+        CartService.update_quantity(self.user, second.id, 2)
+        CartService.remove_from_cart(self.user, third.id)
+
+        self.assertEqual(self.held(self.user), {first.id: 3, second.id: 2})
+        self.assertEqual(self.reserved_stock(), reservations.reserved_by_product())
+
+        CartService.clear_cart(self.user)
+        self.assertEqual(self.held(self.user), {})
+        self.assertEqual(self.reserved_stock(), {})
+
+    def test_sweeper_releases_only_expired_lines(self):
+        first, second, third = self.products
+        CartService.add_items(self.user, [(first.id, 2), (second.id, 3)])
+        CartService.add_items(self.other, [(first.id, 1), (third.id, 4)])
+        self.expire(self.user, first)
+        self.expire(self.user, second)
+        self.expire(self.other, third)
+
+        self.assertEqual(reservations.release_expired(batch_size=2), 3)  # Two keyset chunks
+
+        self.assertEqual(self.held(self.user), {})
+        self.assertEqual(self.held(self.other), {first.id: 1})
+        self.assertEqual(dict(CartItem.objects.filter(cart__user=self.other).values_list('product_id', 'quantity')),
+                         {first.id: 1})
+        self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+        self.assertEqual(self.reserved_stock(), {first.id: 1})
+
+    def test_activity_extends_the_whole_cart(self):
+        first, second, _ = self.products
+        CartService.add_to_cart(self.user, first.id, 1)
+        self.expire(self.user, first)
+
+        CartService.add_to_cart(self.user, second.id, 1)  # Activity on another line
+
+        self.assertEqual(reservations.release_expired(), 0)
+        self.assertEqual(self.held(self.user), {first.id: 1, second.id: 1})
+
+    def test_touch_writes_only_past_half_life(self):
+        CartService.add_to_cart(self.user, self.products[0].id, 1)
+        fresh = StockReservation.objects.get(cart__user=self.user).expires_at
+
+        CartService.touch(self.user)
+        self.assertEqual(StockReservation.objects.get(cart__user=self.user).expires_at, fresh)
+
+        StockReservation.objects.update(expires_at=timezone.now() + timedelta(seconds=60))
+        CartService.touch(self.user)
+        self.assertGreater(StockReservation.objects.get(cart__user=self.user).expires_at, fresh - timedelta(seconds=1))
+
+    @override_settings(STOCK_NOTIFY_ENABLED=False)
+    def test_bulk_reserve_runs_the_stock_hooks_not_post_save(self):
+        first, second, _ = self.products
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=Product)
+        self.addCleanup(post_save.disconnect, receiver, sender=Product)
+
+        with mock.patch('apps.products.services.cdc.capture') as capture, \
+                self.captureOnCommitCallbacks(execute=True):
+            reservations.reserve_available({first.id: 3, second.id: 20})
+
+        receiver.assert_not_called()
+        self.assertEqual(
+            sorted(OutboxEvent.objects.values_list('payload', flat=True), key=lambda p: p['product_id']),
+            [{'product_id': first.id, 'available_stock': 7}, {'product_id': second.id, 'available_stock': 0}],
+        )
+        capture.assert_has_calls([
+            mock.call('product', first.id, ('reserved_stock',)),
+            mock.call('product', second.id, ('reserved_stock',)),
+        ])
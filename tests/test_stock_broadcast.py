@@ -0,0 +1,194 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.products.broadcast import (
+    SUBSCRIBERS_SINCE_KEY, StockBroadcaster, add_subscribers, refresh_subscribers, remove_subscribers,
+)
+
+
+@override_settings(STOCK_BROADCAST_SHARDS=4, STOCK_SUBSCRIBER_TTL=30)
+class StockBroadcasterTestCase(SimpleTestCase):
+    """Changes are coalesced per product, unwatched products dropped and the rest sent one message per shard."""
+
+    def setUp(self):
+        cache.clear()
+        cache.set(SUBSCRIBERS_SINCE_KEY, 0, None)  # Counts long established
+        self.channel_layer = mock.Mock()
+        self.channel_layer.group_send = mock.AsyncMock()
+        patcher = mock.patch('apps.products.broadcast.get_channel_layer', return_value=self.channel_layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # A long window: the tests flush by hand
+        self.broadcaster = StockBroadcaster(window=60)
+        self.addCleanup(self.cancel_timer)
+
+    def cancel_timer(self):
+        if self.broadcaster._timer is not None:
+            self.broadcaster._timer.cancel()
+
+    def flush(self):
+        self.cancel_timer()
+        self.broadcaster.flush()
+
+    def sent(self):
+        """{group: {product_id: new_stock}} from the channel layer calls."""
+        batches = {}
+        for call in self.channel_layer.group_send.await_args_list:
+            group, message = call.args
+            self.assertEqual(message['type'], 'stock_batch')
+            self.assertNotIn(group, batches)  # One message per shard per flush
+            batches[group] = {update['product_id']: update['new_stock'] for update in message['updates']}
+        return batches
+
+    def test_changes_are_coalesced_to_the_latest(self):
+        add_subscribers([1])
+        for stock in (9, 8, 7):
+            self.broadcaster.publish(1, stock)
+        self.flush()
+
+        self.assertEqual(self.sent(), {'stock_shard_1': {1: 7}})
+        metrics = self.broadcaster.metrics()
+        self.assertEqual((metrics['published'], metrics['coalesced'], metrics['sent']), (3, 2, 1))
+        self.assertEqual(metrics['messages_saved'], 2)
+
+    def test_products_without_subscribers_are_skipped(self):
+        add_subscribers([1, 2, 2])
+        remove_subscribers([2, 2])
+        for product_id in (1, 2, 3):
+            self.broadcaster.publish(product_id, 5)
+        self.flush()
+
+        self.assertEqual(self.sent(), {'stock_shard_1': {1: 5}})
+        self.assertEqual(self.broadcaster.metrics()['skipped_no_subscribers'], 2)
+
+    def test_nothing_watched_means_no_channel_layer_call(self):
+        self.broadcaster.publish(1, 5)
+        self.flush()
+        self.channel_layer.group_send.assert_not_awaited()
+
+    def test_one_message_per_shard(self):
+        add_subscribers([1, 2, 5, 9, 6])
+        for product_id in (1, 2, 5, 9, 6):
+            self.broadcaster.publish(product_id, product_id * 10)
+        self.flush()
+
+        self.assertEqual(self.sent(), {
+            'stock_shard_1': {1: 10, 5: 50, 9: 90},
+            'stock_shard_2': {2: 20, 6: 60},
+        })
+        metrics = self.broadcaster.metrics()
+        self.assertEqual((metrics['sent'], metrics['channel_layer_calls']), (5, 2))
+
+    def test_subscriber_lookup_failure_sends_everything(self):
+        self.broadcaster.publish(1, 5)
+        with mock.patch.object(cache, 'get_many', side_effect=ConnectionError('cache down')), \
+                self.assertLogs('apps.products.broadcast', 'WARNING'):
+            self.flush()
+        self.assertEqual(self.sent(), {'stock_shard_1': {1: 5}})
+
+    def test_publish_schedules_one_flush_per_window(self):
+        self.broadcaster.publish(1, 5)
+        timer = self.broadcaster._timer
+        self.broadcaster.publish(2, 5)
+        self.assertIs(self.broadcaster._timer, timer)
+
+        self.flush()
+        self.assertIsNone(self.broadcaster._timer)
+        self.broadcaster.publish(1, 4)
+        self.assertIsNot(self.broadcaster._timer, timer)
+
+    def test_shared_metrics_add_up_processes(self):
+        add_subscribers([1])
+        other = StockBroadcaster(window=60)
+        for broadcaster in (self.broadcaster, other):
+            broadcaster.publish(1, 5)
+            broadcaster._timer.cancel()
+            broadcaster.flush()
+
+        shared = other.shared_metrics()
+        self.assertEqual((shared['published'], shared['sent'], shared['channel_layer_calls']), (2, 2, 2))
+
+    def clock(self, now):
+        """Cache expiry and the broadcaster's rebuild window both read time.time()."""
+        self.now = now
+        patcher = mock.patch('time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_counts_left_by_a_crashed_worker_expire(self):
+        self.clock(1000.0)
+        add_subscribers([1])  # Never removed
+        self.now += 31
+        self.broadcaster.publish(1, 5)
+        self.flush()
+        self.channel_layer.group_send.assert_not_awaited()
+
+    def test_refreshed_counts_stay(self):
+        self.clock(1000.0)
+        add_subscribers([1])
+        for _ in range(3):
+            self.now += 20
+            refresh_subscribers([1])
+        self.broadcaster.publish(1, 5)
+        self.flush()
+        self.assertEqual(self.sent(), {'stock_shard_1': {1: 5}})
+        self.assertEqual(cache.get('stock_subscribers_1'), 1)
+
+    def test_refresh_repairs_evicted_counts(self):
+        add_subscribers([1, 1])
+        cache.delete('stock_subscribers_1')  # Evicted
+        remove_subscribers([1])  # Doesn't raise, nothing to take back
+        refresh_subscribers([1])  # The other socket is still connected
+
+        self.broadcaster.publish(1, 5)
+        self.flush()
+        self.assertEqual(self.sent(), {'stock_shard_1': {1: 5}})
+
+    def test_flushed_cache_sends_everything_until_counts_are_rebuilt(self):
+        self.clock(1000.0)
+        cache.clear()
+        self.broadcaster.publish(1, 5)
+        self.flush()
+        self.assertEqual(self.sent(), {'stock_shard_1': {1: 5}})
+
+        self.now += 11  # One refresh interval (TTL / 3): live consumers have counted themselves again
+        self.channel_layer.group_send.reset_mock()
+        self.broadcaster.publish(1, 4)
+        self.flush()
+        self.channel_layer.group_send.assert_not_awaited()
+
+
+class ListenStockChangesRelayTestCase(SimpleTestCase):
+    """relay() turns a trigger payload into one publish; anything else is logged and skipped."""
+
+    def setUp(self):
+        from apps.products.management.commands.listen_stock_changes import Command
+        self.command = Command()
+        patcher = mock.patch('apps.products.management.commands.listen_stock_changes.stock_broadcaster')
+        self.broadcaster = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_valid_payload(self):
+        self.command.relay('{"id": 7, "stock": 5, "reserved_stock": 2}')
+        self.command.relay('{"id": "8", "stock": 1, "reserved_stock": 3}')
+        self.assertEqual(self.broadcaster.publish.call_args_list, [mock.call(7, 3), mock.call(8, 0)])
+
+    def test_malformed_payloads_are_skipped(self):
+        payloads = [
+            'not json',
+            '',
+            '[1, 2]',
+            'null',
+            '{"stock": 5, "reserved_stock": 2}',
+            '{"id": 7, "stock": 5}',
+            '{"id": "seven", "stock": 5, "reserved_stock": 2}',
+            '{"id": null, "stock": 5, "reserved_stock": 2}',
+            '{"id": 7, "stock": "5", "reserved_stock": 2}',
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload), \
+                    self.assertLogs('apps.products.management.commands.listen_stock_changes', 'WARNING'):
+                self.command.relay(payload)
+        self.broadcaster.publish.assert_not_called()
@@ -0,0 +1,141 @@
+import asyncio
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from apps.products.consumers import ProductStreamConsumer
+from apps.products.models import Category, Product
+
+
+@override_settings(STOCK_BROADCAST_SHARDS=4, STOCK_STREAM_TICK=0.05, STOCK_STREAM_MAX_SUBSCRIPTIONS=3)
+class ProductStreamConsumerTestCase(TransactionTestCase):
+    """
+    One socket, many products: shard groups in, this socket's products out,
+    one frame per tick. TransactionTestCase: the consumer reads the DB from
+    another thread.
+    """
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Stream', slug='stream')
+        # Ids 1..5 land in shards 1, 2, 3, 0, 1
+        self.products = [
+            Product.objects.create(
+                id=i, name=f'Stream {i}', slug=f'stream-{i}', category=category, price=1, stock=10, sku=f'STREAM-{i}'
+            )
+            for i in range(1, 6)
+        ]
+        Product.objects.filter(id=1).update(reserved_stock=4)
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(ProductStreamConsumer.as_asgi(), '/ws/stock/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def subscribe(self, communicator, ids, action='subscribe'):
+        await communicator.send_json_to({'action': action, 'product_ids': ids})
+        if action == 'subscribe':
+            return await communicator.receive_json_from()
+        await asyncio.sleep(0.05)  # Unsubscribe sends nothing back
+
+    def members(self, group):
+        return set(get_channel_layer().groups.get(group, {}))
+
+    def subscribers(self, product_id):
+        return cache.get(f'stock_subscribers_{product_id}', 0)
+
+    async def send_batch(self, group, updates):
+        await get_channel_layer().group_send(group, {'type': 'stock_batch', 'updates': updates})
+
+    async def test_subscribe_sends_one_initial_frame(self):
+        communicator = await self.connect()
+        frame = await self.subscribe(communicator, [1, 2, 999])
+
+        self.assertEqual(frame['type'], 'initial_stock')
+        self.assertEqual(sorted(frame['products'], key=lambda p: p['product_id']), [
+            {'product_id': 1, 'stock': 10, 'available_stock': 6, 'is_in_stock': True},
+            {'product_id': 2, 'stock': 10, 'available_stock': 10, 'is_in_stock': True},
+        ])
+        self.assertTrue(await communicator.receive_nothing(0.1))
+
+        # Already subscribed: nothing new to send
+        await communicator.send_json_to({'action': 'subscribe', 'product_ids': [1]})
+        self.assertTrue(await communicator.receive_nothing(0.1))
+        await communicator.disconnect()
+
+    async def test_errors(self):
+        communicator = await self.connect()
+        for payload in ['not json', '{"action": "subscribe"}', '{"action": "subscribe", "product_ids": ["x"]}',
+                        '{"product_ids": [1]}', '{"action": "dance", "product_ids": [1]}']:
+            with self.subTest(payload=payload):
+                await communicator.send_to(text_data=payload)
+                self.assertEqual((await communicator.receive_json_from())['type'], 'error')
+
+        await self.subscribe(communicator, [1, 2])
+        frame = await self.subscribe(communicator, [3, 4])
+        self.assertEqual(frame, {'type': 'error', 'message': 'At most 3 products per connection'})
+        self.assertEqual(self.subscribers(3), 0)
+        await communicator.disconnect()
+
+    async def test_only_own_products_from_a_shard_batch(self):
+        communicator = await self.connect()
+        await self.subscribe(communicator, [1])
+
+        await self.send_batch('stock_shard_1', [
+            {'product_id': 5, 'new_stock': 1, 'timestamp': 't'},  # Same shard, not subscribed
+            {'product_id': 1, 'new_stock': 3, 'timestamp': 't'},
+        ])
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame, {'type': 'stock_updates', 'updates': [{'product_id': 1, 'new_stock': 3, 'timestamp': 't'}]})
+
+        await self.send_batch('stock_shard_1', [{'product_id': 5, 'new_stock': 0, 'timestamp': 't'}])
+        self.assertTrue(await communicator.receive_nothing(0.15))
+        await communicator.disconnect()
+
+    async def test_updates_within_a_tick_share_one_frame(self):
+        communicator = await self.connect()
+        await self.subscribe(communicator, [1, 2])
+
+        await self.send_batch('stock_shard_1', [{'product_id': 1, 'new_stock': 5, 'timestamp': 'a'}])
+        await self.send_batch('stock_shard_2', [{'product_id': 2, 'new_stock': 7, 'timestamp': 'b'}])
+        await self.send_batch('stock_shard_1', [{'product_id': 1, 'new_stock': 4, 'timestamp': 'c'}])
+
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame['type'], 'stock_updates')
+        self.assertEqual(sorted(frame['updates'], key=lambda u: u['product_id']), [
+            {'product_id': 1, 'new_stock': 4, 'timestamp': 'c'},
+            {'product_id': 2, 'new_stock': 7, 'timestamp': 'b'},
+        ])
+        self.assertTrue(await communicator.receive_nothing(0.15))
+        await communicator.disconnect()
+
+    async def test_unsubscribe_and_disconnect_leave_groups(self):
+        communicator = await self.connect()
+        await self.subscribe(communicator, [1, 5, 2])
+        self.assertEqual((self.subscribers(1), self.subscribers(5), self.subscribers(2)), (1, 1, 1))
+        self.assertEqual(len(self.members('stock_shard_1')), 1)
+
+        await self.subscribe(communicator, [1], action='unsubscribe')
+        self.assertEqual(self.subscribers(1), 0)
+        self.assertEqual(len(self.members('stock_shard_1')), 1)  # Product 5 still needs it
+
+        await self.subscribe(communicator, [5], action='unsubscribe')
+        self.assertEqual(self.members('stock_shard_1'), set())
+        self.assertEqual(len(self.members('stock_shard_2')), 1)
+
+        await communicator.disconnect()
+        self.assertEqual(self.subscribers(2), 0)
+        self.assertEqual(self.members('stock_shard_2'), set())
+
+    @override_settings(STOCK_SUBSCRIBER_TTL=0.3)
+    async def test_connected_socket_refreshes_its_counts(self):
+        communicator = await self.connect()
+        await self.subscribe(communicator, [1])
+        cache.delete('stock_subscribers_1')  # Evicted
+
+        await asyncio.sleep(0.25)  # Past one refresh interval (TTL / 3)
+        self.assertEqual(self.subscribers(1), 1)
+        await communicator.disconnect()